@@ -24,6 +24,25 @@ class Config:
     # AI Model settings
     AI_MODEL_PATH = os.environ.get('AI_MODEL_PATH') or 'models/'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file upload
+    
+    # Per hospital/user token-bucket rate limits (budgets in hospital/services/rate_limiter.py)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    
+    # Number of reverse proxies in front of the app (e.g. the Next.js server) whose
+    # X-Forwarded-For/-Proto headers are trusted; 0 uses the socket address as is
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT') or 0)
+    
+    # Serialize JSON with orjson when it is installed
+    ORJSON_ENABLED = os.environ.get('ORJSON_ENABLED', 'true').lower() in ['true', 'on', '1']
+    
+    # Weak ETags/304s for GET responses and gzip (or brotli) for bodies above the size threshold
+    HTTP_ETAGS = os.environ.get('HTTP_ETAGS', 'true').lower() in ['true', 'on', '1']
+    HTTP_COMPRESSION = os.environ.get('HTTP_COMPRESSION', 'true').lower() in ['true', 'on', '1']
+    HTTP_COMPRESSION_MIN_SIZE = int(os.environ.get('HTTP_COMPRESSION_MIN_SIZE') or 1024)
+    HTTP_GZIP_LEVEL = int(os.environ.get('HTTP_GZIP_LEVEL') or 6)
+    
+    # Debugging: add X-DB-Query-Count to every response
+    QUERY_COUNT_HEADER = os.environ.get('QUERY_COUNT_HEADER', 'false').lower() in ['true', 'on', '1']
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -31,8 +50,14 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
 
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    RATE_LIMIT_ENABLED = False
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
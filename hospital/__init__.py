@@ -15,11 +15,26 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Behind a proxy, take the client address from X-Forwarded-For (rate limits are keyed by it)
+    if app.config.get('TRUSTED_PROXY_COUNT'):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        proxies = app.config['TRUSTED_PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+    
+    from hospital.utils.json_provider import install_json_provider
+    install_json_provider(app)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     
+    from hospital.services.token_revocation import init_token_revocation
+    init_token_revocation(app, jwt)
+    
+    # Registers the flush hooks that keep subscription usage counters current
+    import hospital.services.usage_counters  # noqa: F401
+    
     # Configure CORS to allow frontend requests
     CORS(app, 
          origins=['http://localhost:3000', 'http://localhost:3001', 'http://127.0.0.1:3000', 'http://127.0.0.1:3001'],
@@ -29,6 +44,17 @@ def create_app(config_name='default'):
     
     mail.init_app(app)
     
+    if app.config.get('RATE_LIMIT_ENABLED'):
+        from hospital.services.rate_limiter import init_rate_limiting
+        init_rate_limiting(app)
+    
+    from hospital.utils.http_middleware import install_http_middleware
+    install_http_middleware(app)
+    
+    if app.config.get('QUERY_COUNT_HEADER'):
+        from hospital.utils.query_stats import install_query_counter
+        install_query_counter(app)
+    
     # Register blueprints
     from hospital.routes.auth import auth_bp
     from hospital.routes.hospital_auth import hospital_auth_bp
@@ -6,10 +6,14 @@ from .doctor import Doctor
 from .appointment import Appointment
 from .medical_record import MedicalRecord
 from .prescription import Prescription
-from .ai_diagnosis import AIDiagnosis
+from .ai_diagnosis import AIDiagnosis, AIDiagnosisConditionCount
 from .medicine import Medicine, StockMovement
+from .import_record import ImportBatch, ImportedRow
+from .risk_score import PatientRiskScore
+from .hospital_usage import HospitalUsage
 
 __all__ = [
     'db', 'Hospital', 'User', 'Patient', 'Doctor', 'Appointment', 
-    'MedicalRecord', 'Prescription', 'AIDiagnosis', 'Medicine', 'StockMovement'
+    'MedicalRecord', 'Prescription', 'AIDiagnosis', 'AIDiagnosisConditionCount', 'Medicine', 'StockMovement',
+    'ImportBatch', 'ImportedRow', 'PatientRiskScore', 'HospitalUsage'
 ]
\ No newline at end of file
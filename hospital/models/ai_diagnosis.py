@@ -3,41 +3,67 @@ from hospital import db
 
 class AIDiagnosis(db.Model):
     __tablename__ = 'ai_diagnoses'
-    
+    __table_args__ = (
+        # History is always read newest first within a hospital or a patient
+        db.Index('ix_ai_diagnoses_hospital_created', 'hospital_id', 'created_at', 'id'),
+        db.Index('ix_ai_diagnoses_patient_created', 'patient_id', 'created_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    # patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)  # Disabled for now
+    # Added after the table first shipped: existing databases need scripts/upgrade_ai_diagnoses.py
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'))
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'))
     symptoms = db.Column(db.Text, nullable=False)
-    predicted_conditions = db.Column(db.JSON)  # List of conditions with confidence scores
+    predicted_conditions = db.Column(db.JSON)  # [{'condition', 'confidence'}], compacted on save
     risk_assessment = db.Column(db.String(20))  # low, medium, high, critical
     recommended_tests = db.Column(db.JSON)  # List of recommended diagnostic tests
     recommended_specialists = db.Column(db.JSON)  # List of specialist recommendations
     ai_confidence_score = db.Column(db.Float)  # 0.0 to 1.0
     model_version = db.Column(db.String(20))
-    input_data = db.Column(db.JSON)  # Store the input features used
+    input_data = db.deferred(db.Column(db.JSON))  # Store the input features used (never listed)
     doctor_verified = db.Column(db.Boolean, default=False)
     doctor_notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
+
     # Relationships
     hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'))
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            # 'patient_id': self.patient_id,  # Disabled for now
-            'doctor_id': self.doctor_id,
-            # 'patient_name': self.patient.full_name if self.patient else None,  # Disabled for now
-            'doctor_name': self.doctor.user.full_name if self.doctor and self.doctor.user else None,
-            'symptoms': self.symptoms,
-            'predicted_conditions': self.predicted_conditions,
-            'risk_assessment': self.risk_assessment,
-            'recommended_tests': self.recommended_tests,
-            'recommended_specialists': self.recommended_specialists,
-            'ai_confidence_score': self.ai_confidence_score,
-            'model_version': self.model_version,
-            'doctor_verified': self.doctor_verified,
-            'doctor_notes': self.doctor_notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+    patient = db.relationship('Patient')
+    doctor = db.relationship('Doctor')
+
+    # to_dict() fields in output order; *_name fields come from the linked profile's user
+    FIELDS = (
+        'id', 'patient_id', 'doctor_id', 'patient_name', 'doctor_name', 'symptoms', 'predicted_conditions',
+        'risk_assessment', 'recommended_tests', 'recommended_specialists', 'ai_confidence_score',
+        'model_version', 'doctor_verified', 'doctor_notes', 'created_at'
+    )
+    PROFILE_FIELDS = {'patient_name': 'patient', 'doctor_name': 'doctor'}
+
+    def to_dict(self, fields=None):
+        """All fields, or only those in `fields`; only the attributes they need are read"""
+        data = {}
+        for field in self.FIELDS:
+            if fields is not None and field not in fields:
+                continue
+            if field in self.PROFILE_FIELDS:
+                profile = getattr(self, self.PROFILE_FIELDS[field])
+                data[field] = profile.user.full_name if profile and profile.user else None
+            elif field == 'created_at':
+                data[field] = self.created_at.isoformat() if self.created_at else None
+            else:
+                data[field] = getattr(self, field)
+        return data
+
+
+class AIDiagnosisConditionCount(db.Model):
+    """Predicted-condition counts per hospital and day, bumped as diagnoses are saved"""
+    __tablename__ = 'ai_diagnosis_condition_counts'
+    __table_args__ = (
+        db.UniqueConstraint('hospital_id', 'day', 'condition', name='uq_ai_condition_count_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    condition = db.Column(db.String(100), nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
@@ -45,26 +45,32 @@ class HospitalSubscription(db.Model):
     
     def get_usage_stats(self):
         """Get current usage statistics for the hospital"""
-        from hospital.models import Doctor, User
-        
-        current_patients = 0  # Patient functionality disabled
-        current_doctors = Doctor.query.filter_by(hospital_id=self.hospital_id).count()
-        current_staff = User.query.filter_by(hospital_id=self.hospital_id).count()
-        
-        return {
-            'patients': {
-                'current': current_patients,
-                'limit': self.max_patients,
-                'percentage': (current_patients / self.max_patients * 100) if self.max_patients > 0 else 0
-            },
-            'doctors': {
-                'current': current_doctors,
-                'limit': self.max_doctors,
-                'percentage': (current_doctors / self.max_doctors * 100) if self.max_doctors > 0 else 0
-            },
-            'staff': {
-                'current': current_staff,
-                'limit': self.max_staff,
-                'percentage': (current_staff / self.max_staff * 100) if self.max_staff > 0 else 0
-            }
-        }
\ No newline at end of file
+        return usage_stats(self.hospital_id, self.max_patients, self.max_doctors, self.max_staff)
+
+
+def usage_stats(hospital_id, max_patients, max_doctors, max_staff):
+    """Current usage against plan limits for a hospital (maintained counters, no COUNT queries)"""
+    from hospital.services.usage_counters import get_usage
+    
+    usage = get_usage(hospital_id)
+    current_patients = usage['patients']
+    current_doctors = usage['doctors']
+    current_staff = usage['staff']
+    
+    return {
+        'patients': {
+            'current': current_patients,
+            'limit': max_patients,
+            'percentage': (current_patients / max_patients * 100) if max_patients > 0 else 0
+        },
+        'doctors': {
+            'current': current_doctors,
+            'limit': max_doctors,
+            'percentage': (current_doctors / max_doctors * 100) if max_doctors > 0 else 0
+        },
+        'staff': {
+            'current': current_staff,
+            'limit': max_staff,
+            'percentage': (current_staff / max_staff * 100) if max_staff > 0 else 0
+        }
+    }
\ No newline at end of file
@@ -0,0 +1,27 @@
+from datetime import datetime
+from hospital import db
+
+class HospitalUsage(db.Model):
+    """Maintained usage counters for subscription quotas (see services.usage_counters)"""
+    __tablename__ = 'hospital_usage'
+
+    id = db.Column(db.Integer, primary_key=True)
+    hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'), unique=True, nullable=False)
+    patients = db.Column(db.Integer, default=0, nullable=False)
+    doctors = db.Column(db.Integer, default=0, nullable=False)
+    staff = db.Column(db.Integer, default=0, nullable=False)  # users other than patients
+    appointments_month = db.Column(db.String(7))  # YYYY-MM that monthly_appointments counts
+    monthly_appointments = db.Column(db.Integer, default=0, nullable=False)
+    reconciled_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'hospital_id': self.hospital_id,
+            'patients': self.patients,
+            'doctors': self.doctors,
+            'staff': self.staff,
+            'appointments_month': self.appointments_month,
+            'monthly_appointments': self.monthly_appointments,
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
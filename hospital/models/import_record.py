@@ -0,0 +1,46 @@
+from datetime import datetime
+from hospital import db
+
+class ImportBatch(db.Model):
+    __tablename__ = 'import_batches'
+    __table_args__ = (
+        db.UniqueConstraint('hospital_id', 'entity', 'file_hash', name='uq_import_batch_file'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'), nullable=False)
+    entity = db.Column(db.String(30), nullable=False)  # medicines, patients
+    file_hash = db.Column(db.String(64), nullable=False)  # sha256 of the uploaded bytes
+    filename = db.Column(db.String(255))
+    row_count = db.Column(db.Integer, default=0)
+    applied_count = db.Column(db.Integer, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'hospital_id': self.hospital_id,
+            'entity': self.entity,
+            'file_hash': self.file_hash,
+            'filename': self.filename,
+            'row_count': self.row_count,
+            'applied_count': self.applied_count,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class ImportedRow(db.Model):
+    __tablename__ = 'imported_rows'
+    __table_args__ = (
+        db.UniqueConstraint('hospital_id', 'entity', 'key_hash', name='uq_imported_row_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'), nullable=False)
+    entity = db.Column(db.String(30), nullable=False)
+    key_hash = db.Column(db.String(32), nullable=False)  # natural key, e.g. medicine name
+    content_hash = db.Column(db.String(32), nullable=False)  # all imported values of the row
+    batch_id = db.Column(db.Integer, db.ForeignKey('import_batches.id'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
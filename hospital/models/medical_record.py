@@ -13,9 +13,10 @@ class MedicalRecord(db.Model):
     symptoms = db.Column(db.Text)
     diagnosis = db.Column(db.Text)
     treatment = db.Column(db.Text)
-    medications = db.Column(db.JSON)  # List of prescribed medications
-    lab_results = db.Column(db.JSON)  # Lab test results
-    vital_signs = db.Column(db.JSON)  # Blood pressure, temperature, etc.
+    # JSON documents load together on first access, not with every row
+    medications = db.deferred(db.Column(db.JSON), group='clinical_data')  # List of prescribed medications
+    lab_results = db.deferred(db.Column(db.JSON), group='clinical_data')  # Lab test results
+    vital_signs = db.deferred(db.Column(db.JSON), group='clinical_data')  # Blood pressure, temperature, etc.
     notes = db.Column(db.Text)
     follow_up_date = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
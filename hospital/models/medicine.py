@@ -2,6 +2,43 @@ from hospital import db
 from datetime import datetime, date
 from sqlalchemy import func
 
+
+# Computed medicine fields as plain functions of column values, shared by the
+# properties below and the row serializers (hospital/utils/serialization.py)
+def is_expired(expiry_date):
+    if expiry_date:
+        return expiry_date < date.today()
+    return False
+
+
+def days_to_expiry(expiry_date):
+    if expiry_date:
+        delta = expiry_date - date.today()
+        return delta.days
+    return None
+
+
+def is_low_stock(quantity_in_stock, reorder_level):
+    return quantity_in_stock <= reorder_level
+
+
+def stock_status(quantity_in_stock, reorder_level, max_stock_level):
+    if quantity_in_stock == 0:
+        return 'Out of Stock'
+    elif is_low_stock(quantity_in_stock, reorder_level):
+        return 'Low Stock'
+    elif quantity_in_stock >= max_stock_level:
+        return 'Overstock'
+    else:
+        return 'In Stock'
+
+
+def profit_margin(cost_price, selling_price):
+    if cost_price and selling_price:
+        return ((selling_price - cost_price) / cost_price) * 100
+    return 0
+
+
 class Medicine(db.Model):
     __tablename__ = 'medicines'
     
@@ -17,7 +54,7 @@ class Medicine(db.Model):
     # Medical Information
     category = db.Column(db.String(100))  # Tablet, Syrup, Injection, etc.
     therapeutic_class = db.Column(db.String(100))  # Antibiotic, Painkiller, etc.
-    composition = db.Column(db.Text)  # Active ingredients
+    composition = db.deferred(db.Column(db.Text))  # Active ingredients (loaded on first access)
     strength = db.Column(db.String(50))  # 500mg, 10ml, etc.
     dosage_form = db.Column(db.String(50))  # Tablet, Capsule, Syrup, etc.
     
@@ -65,41 +102,27 @@ class Medicine(db.Model):
     @property
     def is_expired(self):
         """Check if medicine is expired"""
-        if self.expiry_date:
-            return self.expiry_date < date.today()
-        return False
+        return is_expired(self.expiry_date)
     
     @property
     def days_to_expiry(self):
         """Calculate days until expiry"""
-        if self.expiry_date:
-            delta = self.expiry_date - date.today()
-            return delta.days
-        return None
+        return days_to_expiry(self.expiry_date)
     
     @property
     def is_low_stock(self):
         """Check if stock is below reorder level"""
-        return self.quantity_in_stock <= self.reorder_level
+        return is_low_stock(self.quantity_in_stock, self.reorder_level)
     
     @property
     def stock_status(self):
         """Get stock status"""
-        if self.quantity_in_stock == 0:
-            return 'Out of Stock'
-        elif self.is_low_stock:
-            return 'Low Stock'
-        elif self.quantity_in_stock >= self.max_stock_level:
-            return 'Overstock'
-        else:
-            return 'In Stock'
+        return stock_status(self.quantity_in_stock, self.reorder_level, self.max_stock_level)
     
     @property
     def profit_margin(self):
         """Calculate profit margin percentage"""
-        if self.cost_price and self.selling_price:
-            return ((self.selling_price - self.cost_price) / self.cost_price) * 100
-        return 0
+        return profit_margin(self.cost_price, self.selling_price)
     
     def to_dict(self):
         return {
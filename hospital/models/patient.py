@@ -1,6 +1,13 @@
 from datetime import datetime, date
 from hospital import db
 
+def age(date_of_birth):
+    """Age in whole years today"""
+    if date_of_birth:
+        today = date.today()
+        return today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+    return None
+
 class Patient(db.Model):
     __tablename__ = 'patients'
     
@@ -10,11 +17,12 @@ class Patient(db.Model):
     date_of_birth = db.Column(db.Date)
     gender = db.Column(db.String(10))
     blood_group = db.Column(db.String(5))
-    address = db.Column(db.Text)
+    # Long free-text columns load on first access (all three together), not with every row
+    address = db.deferred(db.Column(db.Text), group='details')
     emergency_contact_name = db.Column(db.String(100))
     emergency_contact_phone = db.Column(db.String(15))
-    medical_history = db.Column(db.Text)
-    allergies = db.Column(db.Text)
+    medical_history = db.deferred(db.Column(db.Text), group='details')
+    allergies = db.deferred(db.Column(db.Text), group='details')
     hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -25,10 +33,7 @@ class Patient(db.Model):
     
     @property
     def age(self):
-        if self.date_of_birth:
-            today = date.today()
-            return today.year - self.date_of_birth.year - ((today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day))
-        return None
+        return age(self.date_of_birth)
     
     def to_dict(self):
         return {
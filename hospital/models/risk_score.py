@@ -0,0 +1,27 @@
+from datetime import datetime
+from hospital import db
+
+class PatientRiskScore(db.Model):
+    __tablename__ = 'patient_risk_scores'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), unique=True, nullable=False)
+    hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'), nullable=False, index=True)
+    risk_score = db.Column(db.Float, nullable=False)
+    risk_category = db.Column(db.String(20), nullable=False, index=True)  # minimal, low, medium, high, critical
+    risk_factors = db.Column(db.JSON)
+    input_hash = db.Column(db.String(32), nullable=False)  # inputs the score was computed from
+    knowledge_checksum = db.Column(db.String(12))  # knowledge base snapshot used
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'hospital_id': self.hospital_id,
+            'risk_score': self.risk_score,
+            'risk_category': self.risk_category,
+            'risk_factors': self.risk_factors or [],
+            'knowledge_checksum': self.knowledge_checksum,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -1,5 +1,6 @@
 from datetime import datetime
 from hospital import db
+from hospital.services.auth_service import hash_password
 import bcrypt
 
 class User(db.Model):
@@ -13,6 +14,7 @@ class User(db.Model):
     phone = db.Column(db.String(15))
     role = db.Column(db.String(20), nullable=False)  # admin, doctor, nurse, receptionist
     is_active = db.Column(db.Boolean, default=True)
+    tokens_valid_after = db.Column(db.Integer)  # Unix time; tokens issued (iat) before it are revoked
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -21,7 +23,7 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
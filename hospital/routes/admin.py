@@ -4,6 +4,10 @@ from hospital import db
 from hospital.models import Hospital, User, Doctor
 from hospital.models.hospital_subscription import HospitalSubscription
 from hospital.models.appointment import Appointment
+from hospital.services.bulk_onboarding import BulkOnboardingService
+from hospital.services.tenant_context import invalidate_tenant_context
+from hospital.services.token_revocation import revoke_user_tokens
+from hospital.utils.http_middleware import transfer_stats
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -385,6 +389,7 @@ def admin_upgrade_subscription(subscription_id):
             ).date()
         
         db.session.commit()
+        invalidate_tenant_context(subscription.hospital_id)
         
         return jsonify({
             'message': f'Successfully updated subscription to {new_plan} plan',
@@ -412,6 +417,7 @@ def extend_subscription(subscription_id):
         subscription.updated_at = datetime.utcnow()
         
         db.session.commit()
+        invalidate_tenant_context(subscription.hospital_id)
         
         return jsonify({
             'message': f'Subscription extended by {extend_days} days',
@@ -444,6 +450,7 @@ def update_hospital(hospital_id):
         
         hospital.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_tenant_context(hospital_id)
         
         return jsonify({
             'message': 'Hospital updated successfully',
@@ -494,6 +501,7 @@ def change_hospital_password(hospital_id):
         hospital_user.updated_at = datetime.utcnow()
         
         db.session.commit()
+        revoke_user_tokens(hospital_user.id)
         
         return jsonify({
             'message': f'Password successfully updated for {hospital.name}',
@@ -527,6 +535,7 @@ def reset_hospital_password(hospital_id):
         hospital_user.updated_at = datetime.utcnow()
         
         db.session.commit()
+        revoke_user_tokens(hospital_user.id)
         
         return jsonify({
             'message': f'Password reset to default for {hospital.name}',
@@ -574,6 +583,7 @@ def delete_hospital(hospital_id):
         # You could also add a deleted_at timestamp field if you modify the model
         
         db.session.commit()
+        invalidate_tenant_context(hospital_id)
         
         return jsonify({
             'message': f'Hospital "{original_name}" has been successfully deactivated and all associated subscriptions have been cancelled.'
@@ -636,4 +646,31 @@ def get_admin_analytics():
         }), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/onboarding/bulk', methods=['POST'])
+def bulk_onboard_hospitals():
+    """Onboard a bundle of hospitals with their staff, doctors, patients and medicines"""
+    try:
+        if not verify_admin_token():
+            return jsonify({'error': 'Unauthorized access'}), 401
+        
+        bundle = request.get_json()
+        if not bundle or not bundle.get('hospitals'):
+            return jsonify({'error': 'Bundle must contain a non-empty "hospitals" list'}), 400
+        
+        report = BulkOnboardingService().load(bundle)
+        status = 200 if report['failed_hospitals'] == 0 else 207
+        return jsonify(report), status
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/system/http-stats', methods=['GET'])
+def get_http_stats():
+    """Bandwidth saved by 304 answers and compression in this worker"""
+    if not verify_admin_token():
+        return jsonify({'error': 'Unauthorized access'}), 401
+    
+    return jsonify(transfer_stats.report()), 200
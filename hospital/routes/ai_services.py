@@ -1,29 +1,43 @@
-from flask import Blueprint, request, jsonify
+import json
+import time
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from hospital import db
 from hospital.models.ai_diagnosis import AIDiagnosis
-# from hospital.models.patient import Patient  # Disabled for now
+from hospital.models.risk_score import PatientRiskScore
+from hospital.models.patient import Patient
+from hospital.routes.admin import verify_admin_token
+from hospital.utils.current_user import get_current_user, hospital_role_required
+from hospital.utils.serialization import InvalidFields, parse_fields
 from hospital.services.simple_ai import (
     SimpleSymptomChecker,
     SimpleRiskAssessment,
     SimpleTreatmentRecommendations,
     SimpleHealthChatbot
 )
-from hospital.services.gemini_ai import GeminiHealthChatbot
+from hospital.services.gemini_ai import get_chatbot
+from hospital.services.knowledge_base import get_knowledge_base
+from hospital.services.risk_engine import BatchRiskEngine
+from hospital.services.diagnosis_history import DiagnosisHistory, InvalidCursor
 
 ai_bp = Blueprint('ai', __name__)
 
+MAX_BATCH_SYMPTOM_CHECKS = 500
+MAX_DIAGNOSES_PER_PAGE = 100
+
 @ai_bp.route('/test-gemini', methods=['GET'])
+@hospital_role_required('admin')
 def test_gemini():
-    """Test endpoint to check if Gemini AI is properly configured."""
+    """Test endpoint to check if Gemini AI is properly configured (admins only; ?probe=1 calls the providers)."""
     try:
-        bot = GeminiHealthChatbot()
+        bot = get_chatbot()
+        if request.args.get('probe'):
+            bot.probe_providers()
         return jsonify({
             'gemini_available': bot.is_available(),
-            'api_key_present': bool(bot.api_key),
-            'model_initialized': bot.model is not None,
-            'init_error': bot.init_error,
-            'message': 'Gemini is working!' if bot.is_available() else 'Gemini is NOT available - using fallback'
+            'api_key_present': bool(bot.gemini_key or bot.groq_key),
+            **bot.status(),
+            'message': 'AI is working!' if bot.is_available() else 'AI is NOT available - using fallback'
         }), 200
     except Exception as e:
         return jsonify({
@@ -31,6 +45,20 @@ def test_gemini():
             'gemini_available': False
         }), 500
 
+@ai_bp.route('/chatbot/cache-stats', methods=['GET'])
+def chatbot_cache_stats():
+    """Hit rate and size of the chatbot response cache for this worker (platform admin only)."""
+    if not verify_admin_token():
+        return jsonify({'error': 'Unauthorized access'}), 401
+    
+    return jsonify(get_chatbot().cache.metrics()), 200
+
+@ai_bp.route('/knowledge-base', methods=['GET'])
+@jwt_required()
+def knowledge_base_info():
+    """Version and size of the loaded medical knowledge base."""
+    return jsonify(get_knowledge_base().info()), 200
+
 @ai_bp.route('/symptom-checker', methods=['POST'])
 @jwt_required()
 def symptom_checker():
@@ -55,24 +83,23 @@ def symptom_checker():
             patient_gender=additional_info.get('gender')
         )
         
-        # Save AI diagnosis if patient_id provided (disabled for now)
-        # if patient_id:
-        #     ai_diagnosis = AIDiagnosis(
-        #         patient_id=patient_id,
-        #         symptoms=symptoms,
-        #         predicted_conditions=analysis_result['predicted_conditions'],
-        #         risk_assessment=analysis_result['risk_level'],
-        #         recommended_tests=analysis_result['recommended_tests'],
-        #         recommended_specialists=analysis_result['recommended_specialists'],
-        #         ai_confidence_score=analysis_result['confidence_score'],
-        #         model_version='v1.0',
-        #         input_data=additional_info
-        #     )
-        #     
-        #     db.session.add(ai_diagnosis)
-        #     db.session.commit()
-        #     
-        #     analysis_result['diagnosis_id'] = ai_diagnosis.id
+        # Save to the hospital's diagnosis history when run for a patient
+        if patient_id:
+            user = get_current_user()
+            if not user or not user.hospital_id:
+                return jsonify({'error': 'User not associated with any hospital'}), 404
+            
+            patient = Patient.query.filter_by(id=patient_id, hospital_id=user.hospital_id).first()
+            if not patient:
+                return jsonify({'error': 'Patient not found'}), 404
+            
+            ai_diagnosis = DiagnosisHistory(user.hospital_id).record(
+                symptoms,
+                analysis_result,
+                patient_id=patient.id,
+                input_data=additional_info
+            )
+            analysis_result['diagnosis_id'] = ai_diagnosis.id
         
         return jsonify({
             'success': True,
@@ -84,6 +111,37 @@ def symptom_checker():
         return jsonify({'error': str(e)}), 500
 
 
+@ai_bp.route('/symptom-checker/batch', methods=['POST'])
+@jwt_required()
+def symptom_checker_batch():
+    """Analyze a triage queue of symptom texts in one call, ranked by risk"""
+    try:
+        data = request.get_json() or {}
+        patients = data.get('patients', [])
+        
+        if not patients:
+            return jsonify({'error': 'patients list is required'}), 400
+        if len(patients) > MAX_BATCH_SYMPTOM_CHECKS:
+            return jsonify({'error': f'At most {MAX_BATCH_SYMPTOM_CHECKS} patients per batch'}), 400
+        
+        for position, patient in enumerate(patients):
+            if not isinstance(patient, dict) or not patient.get('symptoms'):
+                return jsonify({'error': f'Symptoms are required (patient {position + 1})'}), 400
+        
+        started = time.perf_counter()
+        results = SimpleSymptomChecker().analyze_batch(patients)
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @ai_bp.route('/chatbot', methods=['POST'])
 def ai_chatbot():
     """AI-powered chatbot for health guidance using Gemini AI with fallback."""
@@ -95,8 +153,11 @@ def ai_chatbot():
         if not message:
             return jsonify({'error': 'Message is required'}), 400
 
+        if data.get('stream') or 'text/event-stream' in request.headers.get('Accept', ''):
+            return _chatbot_event_stream(message, context)
+
         # Try Gemini AI first, fallback to simple chatbot if not available
-        gemini_bot = GeminiHealthChatbot()
+        gemini_bot = get_chatbot()
         if gemini_bot.is_available():
             result = gemini_bot.respond(message, context)
         else:
@@ -111,6 +172,77 @@ def ai_chatbot():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _sse(event, payload):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _chatbot_event_stream(message, context):
+    """Relay chatbot tokens to the client as Server-Sent Events"""
+    def generate():
+        gemini_bot = get_chatbot()
+        if gemini_bot.is_available():
+            for event in gemini_bot.respond_stream(message, context):
+                name = event.pop('event')
+                yield _sse(name, event)
+        else:
+            # Fallback to simple rule-based chatbot in one event
+            simple_bot = SimpleHealthChatbot()
+            yield _sse('done', {'response': simple_bot.respond(message, context)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop nginx buffering the stream
+    })
+
+@ai_bp.route('/risk-scores/recompute', methods=['POST'])
+@hospital_role_required('admin', 'doctor')
+def recompute_risk_scores():
+    """Score all patients of the hospital (only changed ones unless ?full=1)"""
+    try:
+        user = get_current_user()
+        
+        full = request.args.get('full', '').lower() in ['1', 'true', 'yes']
+        summary = BatchRiskEngine(user.hospital_id).run(full=full)
+        
+        return jsonify({
+            'success': True,
+            'summary': summary
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/risk-scores', methods=['GET'])
+@hospital_role_required()
+def get_risk_scores():
+    """Stored patient risk scores for the hospital, highest risk first"""
+    try:
+        user = get_current_user()
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 200)
+        category = request.args.get('category', '')
+        
+        query = PatientRiskScore.query.filter_by(hospital_id=user.hospital_id)
+        if category:
+            query = query.filter(PatientRiskScore.risk_category == category)
+        
+        scores = query.order_by(PatientRiskScore.risk_score.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'risk_scores': [score.to_dict() for score in scores.items],
+            'total': scores.total,
+            'pages': scores.pages,
+            'current_page': page,
+            'per_page': per_page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @ai_bp.route('/risk-assessment', methods=['POST'])
 @jwt_required()
 def risk_assessment():
@@ -174,21 +306,74 @@ def treatment_recommendations():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _diagnosis_page(user, patient_id=None):
+    """One cursor page of the hospital's diagnosis history as a response"""
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_DIAGNOSES_PER_PAGE))
+    try:
+        # ?fields= picks the entry fields (e.g. fields=id,risk_assessment,created_at);
+        # only their columns are selected and the name joins only run when asked for
+        fields = parse_fields(AIDiagnosis.FIELDS)
+        diagnoses, next_cursor = DiagnosisHistory(user.hospital_id).page(
+            patient_id=patient_id,
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            fields=fields
+        )
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'patient_id': patient_id,
+        'diagnoses': [
+            diagnosis.to_dict(fields) for diagnosis in diagnoses
+        ],
+        'next_cursor': next_cursor,
+        'limit': limit
+    }), 200
+
+@ai_bp.route('/diagnoses', methods=['GET'])
+@hospital_role_required()
+def get_ai_diagnoses():
+    """AI diagnosis history of the hospital, newest first (?cursor=&limit=)"""
+    try:
+        user = get_current_user()
+        
+        return _diagnosis_page(user)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @ai_bp.route('/diagnoses/<int:patient_id>', methods=['GET'])
-@jwt_required()
+@hospital_role_required()
 def get_patient_ai_diagnoses(patient_id):
-    """Get all AI diagnoses for a patient"""
+    """Get AI diagnoses for a patient, newest first (?cursor=&limit=)"""
     try:
-        patient = Patient.query.get(patient_id)
+        user = get_current_user()
+        
+        patient = Patient.query.filter_by(id=patient_id, hospital_id=user.hospital_id).first()
         if not patient:
             return jsonify({'error': 'Patient not found'}), 404
         
-        diagnoses = AIDiagnosis.query.filter_by(patient_id=patient_id).order_by(AIDiagnosis.created_at.desc()).all()
+        return _diagnosis_page(user, patient_id=patient.id)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/diagnoses/top-conditions', methods=['GET'])
+@hospital_role_required()
+def get_top_predicted_conditions():
+    """Most common predicted conditions this week (?days=7&limit=10)"""
+    try:
+        user = get_current_user()
+        
+        days = max(1, min(request.args.get('days', 7, type=int), 90))
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
         
         return jsonify({
             'success': True,
-            'patient_id': patient_id,
-            'diagnoses': [diagnosis.to_dict() for diagnosis in diagnoses]
+            'days': days,
+            'conditions': DiagnosisHistory(user.hospital_id).top_conditions(days=days, limit=limit)
         }), 200
         
     except Exception as e:
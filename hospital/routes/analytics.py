@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from hospital import db
 from hospital.models.user import User
 from hospital.models.patient import Patient
 from hospital.models.doctor import Doctor
 from hospital.models.appointment import Appointment
 from hospital.models.medical_record import MedicalRecord
+from hospital.utils.current_user import get_current_user
 from sqlalchemy import func, extract, desc, and_
 from datetime import datetime, timedelta, date
 from collections import defaultdict
@@ -17,8 +18,7 @@ analytics_bp = Blueprint('analytics', __name__)
 def get_analytics_overview():
     """Get overview analytics data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -153,8 +153,7 @@ def get_analytics_overview():
 def get_appointments_analytics():
     """Get appointment analytics data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -317,8 +316,7 @@ def get_appointments_analytics():
 def get_patients_analytics():
     """Get patient analytics data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -460,8 +458,7 @@ def get_patients_analytics():
 def get_doctors_analytics():
     """Get doctor analytics data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -548,8 +545,7 @@ def get_doctors_analytics():
 def get_revenue_analytics():
     """Get revenue analytics data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
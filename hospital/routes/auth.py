@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required
 from hospital import db
 from hospital.models.user import User
+from hospital.services.auth_service import AuthService, AuthBusy
+from hospital.utils.current_user import get_current_user, user_claims
 from hospital.utils.validators import validate_email
 
 auth_bp = Blueprint('auth', __name__)
@@ -78,13 +80,18 @@ def login():
             elif login_identifier.lower() == 'receptionist':
                 user = User.query.filter_by(role='receptionist').first()
         
-        if not user or not user.check_password(password):
+        try:
+            authenticated = AuthService().authenticate(user, password)
+        except AuthBusy as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+        
+        if not authenticated:
             return jsonify({'error': 'Invalid credentials'}), 401
         
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 401
         
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=user_claims(user))
         refresh_token = create_refresh_token(identity=user.id)
         
         return jsonify({
@@ -100,8 +107,13 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     try:
-        current_user_id = get_jwt_identity()
-        new_token = create_access_token(identity=current_user_id)
+        # Refresh tokens carry no claims, so this reads role and hospital from the database
+        user = get_current_user()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        new_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
         return jsonify({'access_token': new_token}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -110,8 +122,7 @@ def refresh():
 @jwt_required()
 def get_profile():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -1,12 +1,14 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from hospital import db
 from hospital.models.user import User
 from hospital.models.doctor import Doctor
 from hospital.models.patient import Patient
 from hospital.models.appointment import Appointment
 from hospital.models.hospital import Hospital
+from hospital.utils.current_user import get_current_user
 from datetime import datetime, timedelta
+from sqlalchemy.orm import undefer_group
 import uuid
 
 hospital_appointments_bp = Blueprint('hospital_appointments', __name__)
@@ -16,8 +18,7 @@ hospital_appointments_bp = Blueprint('hospital_appointments', __name__)
 def get_appointments():
     """Get all appointments for the hospital"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -99,8 +100,7 @@ def get_appointments():
 def create_appointment():
     """Create a new appointment"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -213,8 +213,7 @@ def create_appointment():
 def update_appointment(appointment_id):
     """Update an appointment"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -268,8 +267,7 @@ def update_appointment(appointment_id):
 def cancel_appointment(appointment_id):
     """Cancel an appointment (mark as cancelled)"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -302,8 +300,7 @@ def cancel_appointment(appointment_id):
 def delete_appointment(appointment_id):
     """Permanently delete an appointment"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -339,8 +336,7 @@ def delete_appointment(appointment_id):
 def create_quick_patient():
     """Create a quick patient record for appointment booking"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -409,8 +405,7 @@ def create_quick_patient():
 def search_patients():
     """Search patients for appointment booking"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -433,7 +428,7 @@ def search_patients():
                 Patient.phone.ilike(f'%{search_term}%'),
                 Patient.patient_id.ilike(f'%{search_term}%')
             )
-        ).limit(limit)
+        ).options(undefer_group('details')).limit(limit)
         
         patients = query.all()
         
@@ -449,8 +444,7 @@ def search_patients():
 def get_all_patients():
     """Get all patients for the hospital"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -461,7 +455,7 @@ def get_all_patients():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
-        patients = Patient.query.filter_by(hospital_id=user.hospital_id).paginate(
+        patients = Patient.query.filter_by(hospital_id=user.hospital_id).options(undefer_group('details')).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -481,8 +475,7 @@ def get_all_patients():
 def delete_patient(patient_id):
     """Permanently delete a patient and all related data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -528,8 +521,7 @@ def delete_patient(patient_id):
 def get_available_doctors():
     """Get available doctors for appointment booking"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
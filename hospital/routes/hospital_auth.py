@@ -1,14 +1,22 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt
 from hospital import db
 from hospital.models.hospital import Hospital
 from hospital.models.user import User
-from hospital.models.doctor import Doctor
 from hospital.models.hospital_subscription import HospitalSubscription
+from hospital.services.auth_service import AuthService, AuthBusy
+from hospital.services.tenant_context import get_tenant_context
+from hospital.services.directory import get_directory
+from hospital.services.usage_counters import get_usage
+from hospital.services.token_revocation import revoke_token
+from hospital.utils.current_user import get_current_user, user_claims
 from hospital.utils.validators import validate_email, validate_password
 from datetime import datetime, date, timedelta
 import uuid
 
+# Public directory responses may be reused by browsers/CDNs for this long
+DIRECTORY_MAX_AGE = 60
+
 hospital_auth_bp = Blueprint('hospital_auth', __name__)
 
 @hospital_auth_bp.route('/register', methods=['POST'])
@@ -113,24 +121,24 @@ def hospital_login():
             if login_identifier.lower() == 'admin':
                 user = User.query.filter_by(role='admin').first()
         
-        if not user or not user.check_password(password):
+        try:
+            authenticated = AuthService().authenticate(user, password)
+        except AuthBusy as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+        
+        if not authenticated:
             return jsonify({'error': 'Invalid credentials'}), 401
         
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 401
         
         # Check hospital subscription status
+        tenant = get_tenant_context(user.hospital_id)
         if user.hospital_id:
-            hospital = Hospital.query.get(user.hospital_id)
-            subscription = HospitalSubscription.query.filter_by(
-                hospital_id=user.hospital_id, 
-                is_active=True
-            ).first()
-            
-            if not subscription or subscription.subscription_end < date.today():
+            if not tenant or not tenant.has_subscription or tenant.is_expired():
                 return jsonify({'error': 'Hospital subscription has expired'}), 403
         
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
         refresh_token = create_refresh_token(identity=str(user.id))
         
         # Include hospital and subscription info in response
@@ -140,45 +148,45 @@ def hospital_login():
             'user': user.to_dict()
         }
         
-        if user.hospital_id:
-            hospital = Hospital.query.get(user.hospital_id)
-            subscription = HospitalSubscription.query.filter_by(
-                hospital_id=user.hospital_id, 
-                is_active=True
-            ).first()
-            
-            response_data['hospital'] = hospital.to_dict() if hospital else None
-            response_data['subscription'] = subscription.to_dict() if subscription else None
+        if tenant:
+            response_data['hospital'] = tenant.hospital
+            response_data['subscription'] = tenant.subscription
         
         return jsonify(response_data), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@hospital_auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def hospital_logout():
+    """Revoke the presented token (call once with the access and once with the refresh token)"""
+    try:
+        revoke_token(get_jwt())
+        return jsonify({'message': 'Logged out successfully'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @hospital_auth_bp.route('/hospital-profile', methods=['GET'])
 @jwt_required()
 def get_hospital_profile():
     """Get hospital profile and subscription details"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
         
-        hospital = Hospital.query.get(user.hospital_id)
-        subscription = HospitalSubscription.query.filter_by(
-            hospital_id=user.hospital_id, 
-            is_active=True
-        ).first()
+        tenant = get_tenant_context(user.hospital_id)
         
-        if not hospital:
+        if not tenant:
             return jsonify({'error': 'Hospital not found'}), 404
         
         response_data = {
-            'hospital': hospital.to_dict(),
-            'subscription': subscription.to_dict() if subscription else None,
-            'usage_stats': subscription.get_usage_stats() if subscription else None
+            'hospital': tenant.hospital,
+            'subscription': tenant.subscription,
+            'usage_stats': tenant.usage_stats() if tenant.has_subscription else None
         }
         
         return jsonify(response_data), 200
@@ -191,28 +199,24 @@ def get_hospital_profile():
 def get_subscription_status():
     """Get current subscription status and usage"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
         
-        subscription = HospitalSubscription.query.filter_by(
-            hospital_id=user.hospital_id, 
-            is_active=True
-        ).first()
+        tenant = get_tenant_context(user.hospital_id)
         
-        if not subscription:
+        if not tenant or not tenant.has_subscription:
             return jsonify({'error': 'No active subscription found'}), 404
         
-        usage_stats = subscription.get_usage_stats()
-        days_remaining = (subscription.subscription_end - date.today()).days
+        usage_stats = tenant.usage_stats()
         
         return jsonify({
-            'subscription': subscription.to_dict(),
+            'subscription': tenant.subscription,
             'usage_stats': usage_stats,
-            'days_remaining': max(0, days_remaining),
-            'is_trial': subscription.plan_name == 'trial',
+            'monthly_appointments': get_usage(user.hospital_id)['monthly_appointments'],
+            'days_remaining': tenant.days_remaining(),
+            'is_trial': tenant.plan_name == 'trial',
             'needs_upgrade': any(
                 usage['percentage'] > 80 
                 for usage in usage_stats.values()
@@ -221,41 +225,45 @@ def get_subscription_status():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+def _directory_response(snapshot, payload):
+    """Public directory JSON with a version ETag; answers 304 when the client already has it"""
+    etag = snapshot.version
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = f'public, max-age={DIRECTORY_MAX_AGE}'
+    return response
+
+def _paginate(items, default_per_page=None):
+    """Slice a snapshot list by ?page and ?per_page; the whole list unless asked (or a default is given)"""
+    per_page = request.args.get('per_page', default_per_page, type=int)
+    if not per_page and 'page' not in request.args:
+        return items, {}
+    per_page = min(max(per_page or 50, 1), 200)
+    page = max(request.args.get('page', 1, type=int), 1)
+    start = (page - 1) * per_page
+    return items[start:start + per_page], {
+        'page': page,
+        'per_page': per_page,
+        'pages': (len(items) + per_page - 1) // per_page
+    }
+
 @hospital_auth_bp.route('/hospitals', methods=['GET'])
 def get_all_hospitals():
     """Get all active hospitals for patient dashboard"""
     try:
-        # Filter out deleted hospitals (those with [DELETED] in name) and inactive hospitals
-        hospitals = Hospital.query.filter(
-            Hospital.is_active == True,
-            ~Hospital.name.like('%[DELETED]%')
-        ).all()
-        
-        hospitals_data = []
-        for hospital in hospitals:
-            # Skip hospitals with [DELETED] in name as extra safety check
-            if '[DELETED]' in hospital.name:
-                continue
-                
-            # Get doctor count for this hospital
-            doctor_count = User.query.filter_by(
-                hospital_id=hospital.id, 
-                role='doctor', 
-                is_active=True
-            ).count()
-            
-            hospital_data = hospital.to_dict()
-            hospital_data['total_doctors'] = doctor_count
-            hospital_data['rating'] = 4.5  # Mock rating
-            hospital_data['specializations'] = ['General Medicine', 'Cardiology', 'Neurology']  # Mock specializations
-            
-            hospitals_data.append(hospital_data)
+        snapshot = get_directory()
+        hospitals, pagination = _paginate(snapshot.hospitals)
         
-        return jsonify({
+        return _directory_response(snapshot, {
             'success': True,
-            'hospitals': hospitals_data,
-            'total': len(hospitals_data)
-        }), 200
+            'hospitals': hospitals,
+            'total': len(snapshot.hospitals),
+            **pagination
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -264,31 +272,23 @@ def get_all_hospitals():
 def get_hospital_details(hospital_id):
     """Get specific hospital details"""
     try:
-        hospital = Hospital.query.get_or_404(hospital_id)
+        snapshot = get_directory()
+        hospital = snapshot.hospitals_by_id.get(hospital_id)
         
-        # Check if hospital is active and not deleted
-        if not hospital.is_active or '[DELETED]' in hospital.name:
+        # Inactive and deleted hospitals are not in the directory
+        if not hospital:
             return jsonify({'error': 'Hospital not found'}), 404
         
-        # Get doctor count
-        doctor_count = User.query.filter_by(
-            hospital_id=hospital.id, 
-            role='doctor', 
-            is_active=True
-        ).count()
-        
-        hospital_data = hospital.to_dict()
-        hospital_data['total_doctors'] = doctor_count
+        hospital_data = dict(hospital)
         hospital_data['total_beds'] = 150  # Mock data
-        hospital_data['rating'] = 4.5  # Mock rating
         hospital_data['specializations'] = ['General Medicine', 'Cardiology', 'Neurology', 'Pediatrics']
-        hospital_data['description'] = f"{hospital.name} is a leading healthcare provider committed to delivering exceptional medical care with state-of-the-art facilities and experienced medical professionals."
+        hospital_data['description'] = f"{hospital['name']} is a leading healthcare provider committed to delivering exceptional medical care with state-of-the-art facilities and experienced medical professionals."
         hospital_data['established_year'] = 2010  # Mock data
         
-        return jsonify({
+        return _directory_response(snapshot, {
             'success': True,
             'hospital': hospital_data
-        }), 200
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -297,40 +297,22 @@ def get_hospital_details(hospital_id):
 def get_hospital_doctors(hospital_id):
     """Get all doctors for a specific hospital (public endpoint for patients)"""
     try:
-        # Check if hospital exists and is active
-        hospital = Hospital.query.get_or_404(hospital_id)
+        snapshot = get_directory()
+        hospital = snapshot.hospitals_by_id.get(hospital_id)
         
-        if not hospital.is_active or '[DELETED]' in hospital.name:
+        if not hospital:
             return jsonify({'error': 'Hospital not found'}), 404
         
-        # Get all active doctors for this hospital
-        doctors = db.session.query(Doctor, User).join(User).filter(
-            Doctor.hospital_id == hospital_id,
-            User.is_active == True,
-            Doctor.is_available == True
-        ).all()
-        
-        doctors_data = []
-        for doctor, user in doctors:
-            doctor_data = doctor.to_dict()
-            # Add user information
-            doctor_data['name'] = user.full_name
-            doctor_data['email'] = user.email
-            doctor_data['phone'] = user.phone
-            # Add mock data for patient view
-            doctor_data['consultation_fee'] = 150 + (doctor.experience_years * 10)  # Dynamic fee based on experience
-            doctor_data['available_days'] = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-            doctor_data['available_times'] = ['09:00', '10:00', '11:00', '14:00', '15:00', '16:00']
-            doctor_data['rating'] = min(5.0, 4.0 + (doctor.experience_years * 0.05))  # Rating based on experience
-            
-            doctors_data.append(doctor_data)
+        all_doctors = snapshot.doctors_by_hospital.get(hospital_id, [])
+        doctors, pagination = _paginate(all_doctors)
         
-        return jsonify({
+        return _directory_response(snapshot, {
             'success': True,
-            'doctors': doctors_data,
-            'hospital_name': hospital.name,
-            'total': len(doctors_data)
-        }), 200
+            'doctors': doctors,
+            'hospital_name': hospital['name'],
+            'total': len(all_doctors),
+            **pagination
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -340,47 +322,22 @@ def get_all_doctors():
     """Get all doctors from all hospitals (public endpoint for patients)"""
     try:
         hospital_id = request.args.get('hospital_id', type=int)
-        specialization = request.args.get('specialization', '')
-        
-        # Base query - join Doctor with User and Hospital
-        query = db.session.query(Doctor, User, Hospital).join(User).join(Hospital).filter(
-            User.is_active == True,
-            Doctor.is_available == True,
-            Hospital.is_active == True,
-            ~Hospital.name.like('%[DELETED]%')
-        )
+        specialization = request.args.get('specialization', '').lower()
         
-        # Apply filters
-        if hospital_id:
-            query = query.filter(Doctor.hospital_id == hospital_id)
+        snapshot = get_directory()
+        doctors = snapshot.doctors_by_hospital.get(hospital_id, []) if hospital_id else snapshot.doctors
         
         if specialization:
-            query = query.filter(Doctor.specialization.ilike(f'%{specialization}%'))
-        
-        results = query.all()
-        
-        doctors_data = []
-        for doctor, user, hospital in results:
-            doctor_data = doctor.to_dict()
-            # Add user and hospital information
-            doctor_data['name'] = user.full_name
-            doctor_data['email'] = user.email
-            doctor_data['phone'] = user.phone
-            doctor_data['hospital_name'] = hospital.name
-            doctor_data['hospital_id'] = hospital.id
-            # Add mock data for patient view
-            doctor_data['consultation_fee'] = 150 + (doctor.experience_years * 10)
-            doctor_data['available_days'] = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-            doctor_data['available_times'] = ['09:00', '10:00', '11:00', '14:00', '15:00', '16:00']
-            doctor_data['rating'] = min(5.0, 4.0 + (doctor.experience_years * 0.05))
-            
-            doctors_data.append(doctor_data)
+            doctors = [doctor for doctor in doctors if specialization in (doctor['specialization'] or '').lower()]
         
-        return jsonify({
+        page, pagination = _paginate(doctors, default_per_page=50)
+        
+        return _directory_response(snapshot, {
             'success': True,
-            'doctors': doctors_data,
-            'total': len(doctors_data)
-        }), 200
+            'doctors': page,
+            'total': len(doctors),
+            **pagination
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -4,9 +4,13 @@ from hospital import db
 from hospital.models.user import User
 from hospital.models.patient import Patient
 from hospital.models.doctor import Doctor
-from hospital.models.hospital import Hospital
-from hospital.models.hospital_subscription import HospitalSubscription
+from hospital.services.tenant_context import get_tenant_context
+from hospital.services.usage_counters import get_usage
+from hospital.services.token_revocation import revoke_user_tokens
+from hospital.utils.current_user import get_current_user
+from hospital.utils.serialization import InvalidFields, doctor_rows, patient_rows, requested_fields, user_rows
 from hospital.utils.validators import validate_email, validate_password
+from hospital.utils.allocators import EmailAllocator, hospital_email_domain
 import uuid
 
 hospital_staff_bp = Blueprint('hospital_staff', __name__)
@@ -16,8 +20,7 @@ hospital_staff_bp = Blueprint('hospital_staff', __name__)
 def get_hospital_staff():
     """Get all staff members for the hospital"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -35,16 +38,30 @@ def get_hospital_staff():
         if role_filter:
             query = query.filter(User.role == role_filter)
         
-        staff = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        # Get doctor profiles for doctor users
-        staff_with_profiles = []
-        for staff_member in staff.items:
-            staff_dict = staff_member.to_dict()
-            if staff_member.role == 'doctor':
-                doctor_profile = Doctor.query.filter_by(user_id=staff_member.id).first()
-                staff_dict['doctor_profile'] = doctor_profile.to_dict() if doctor_profile else None
-            staff_with_profiles.append(staff_dict)
+        fields, extras = requested_fields(user_rows, extra=('doctor_profile',), required=('id', 'role'))
+        plan = user_rows.plan(fields)
+        staff = query.with_entities(*plan.columns).paginate(page=page, per_page=per_page, error_out=False)
+        staff_with_profiles = plan.dump_all(staff.items)
+        
+        # Get doctor profiles for doctor users in one query
+        doctor_user_ids = []
+        if 'doctor_profile' in extras:
+            doctor_user_ids = [member['id'] for member in staff_with_profiles if member['role'] == 'doctor']
+        doctor_profiles = {}
+        if doctor_user_ids:
+            doctor_plan = doctor_rows.plan()
+            for row in db.session.query(*doctor_plan.columns).filter(Doctor.user_id.in_(doctor_user_ids)).all():
+                profile = doctor_plan.dump(row)
+                doctor_profiles.setdefault(profile['user_id'], profile)
+        
+        for staff_dict in staff_with_profiles:
+            if staff_dict['role'] == 'doctor' and 'doctor_profile' in extras:
+                doctor_profile = doctor_profiles.get(staff_dict['id'])
+                if doctor_profile:
+                    doctor_profile.update(
+                        full_name=staff_dict.get('full_name'), email=staff_dict.get('email'), phone=staff_dict.get('phone')
+                    )
+                staff_dict['doctor_profile'] = doctor_profile
         
         return jsonify({
             'staff': staff_with_profiles,
@@ -54,6 +71,8 @@ def get_hospital_staff():
             'per_page': per_page
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -62,8 +81,7 @@ def get_hospital_staff():
 def add_staff_member():
     """Add a new staff member to the hospital"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             print(f"DEBUG: User not associated with hospital. User: {user}, Hospital ID: {user.hospital_id if user else None}")
@@ -77,23 +95,14 @@ def add_staff_member():
         print(f"DEBUG: Received data: {data}")
         
         # Auto-generate email and password for all staff if not provided
+        tenant = get_tenant_context(user.hospital_id)
         if not data.get('email'):
-            hospital = Hospital.query.get(user.hospital_id)
-            hospital_domain = hospital.name.lower().replace(' ', '').replace('-', '') if hospital else 'hospital'
             first_name = data.get('first_name', '').lower().replace(' ', '')
             last_name = data.get('last_name', '').lower().replace(' ', '')
             
-            # Create email: firstname.lastname@hospitaldomain.com
-            base_email = f"{first_name}.{last_name}@{hospital_domain}.com"
-            
-            # Check if email exists, if so add number
-            counter = 1
-            generated_email = base_email
-            while User.query.filter_by(email=generated_email).first():
-                generated_email = f"{first_name}.{last_name}{counter}@{hospital_domain}.com"
-                counter += 1
-            
-            data['email'] = generated_email
+            # Create email: firstname.lastname@hospitaldomain.com, numbered if already taken
+            email_allocator = EmailAllocator(hospital_email_domain(tenant))
+            data['email'] = email_allocator.allocate(f"{first_name}.{last_name}")
         
         # Auto-generate simple password if not provided
         if not data.get('password'):
@@ -108,16 +117,11 @@ def add_staff_member():
                 return jsonify({'error': f'{field} is required'}), 422
         
         # Check subscription limits
-        subscription = HospitalSubscription.query.filter_by(
-            hospital_id=user.hospital_id, 
-            is_active=True
-        ).first()
-        
-        if subscription:
-            current_staff_count = User.query.filter_by(hospital_id=user.hospital_id).count()
-            if current_staff_count >= subscription.max_staff:
+        if tenant and tenant.has_subscription:
+            current_staff_count = get_usage(user.hospital_id)['staff']
+            if current_staff_count >= tenant.max_staff:
                 return jsonify({
-                    'error': f'Staff limit reached. Current plan allows {subscription.max_staff} staff members. Please upgrade your subscription.'
+                    'error': f'Staff limit reached. Current plan allows {tenant.max_staff} staff members. Please upgrade your subscription.'
                 }), 403
         
         # Validate email format
@@ -161,12 +165,12 @@ def add_staff_member():
         # If role is doctor, create doctor profile
         if data['role'] == 'doctor':
             # Check doctor limit
-            if subscription:
-                current_doctors = Doctor.query.filter_by(hospital_id=user.hospital_id).count()
-                if current_doctors >= subscription.max_doctors:
+            if tenant and tenant.has_subscription:
+                current_doctors = get_usage(user.hospital_id)['doctors']
+                if current_doctors >= tenant.max_doctors:
                     db.session.rollback()
                     return jsonify({
-                        'error': f'Doctor limit reached. Current plan allows {subscription.max_doctors} doctors. Please upgrade your subscription.'
+                        'error': f'Doctor limit reached. Current plan allows {tenant.max_doctors} doctors. Please upgrade your subscription.'
                     }), 403
             
             doctor_profile = Doctor(
@@ -214,8 +218,7 @@ def add_staff_member():
 def update_staff_member(staff_id):
     """Update a staff member"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -251,12 +254,14 @@ def update_staff_member(staff_id):
                 setattr(staff_member, field, data[field])
         
         # Handle password change
+        password_changed = False
         if 'password' in data and data['password']:
             # Skip password validation for now - will add restrictions later
             # if not validate_password(data['password']):
             #     return jsonify({'error': 'Password must be at least 8 characters with uppercase, lowercase, and number'}), 422
             
             staff_member.set_password(data['password'])
+            password_changed = True
         
         # Update doctor profile if exists
         if staff_member.role == 'doctor' and 'doctor_profile' in data:
@@ -273,6 +278,9 @@ def update_staff_member(staff_id):
         
         db.session.commit()
         
+        if password_changed:
+            revoke_user_tokens(staff_member.id)
+        
         response_data = staff_member.to_dict()
         if staff_member.role == 'doctor':
             doctor_profile = Doctor.query.filter_by(user_id=staff_member.id).first()
@@ -292,8 +300,7 @@ def update_staff_member(staff_id):
 def toggle_staff_status(staff_id):
     """Toggle staff member active status"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -310,12 +317,16 @@ def toggle_staff_status(staff_id):
             return jsonify({'error': 'Staff member not found'}), 404
         
         # Prevent admin from deactivating themselves
-        if staff_member.id == current_user_id:
+        if staff_member.id == user.id:
             return jsonify({'error': 'Cannot deactivate your own account'}), 400
         
         staff_member.is_active = not staff_member.is_active
         db.session.commit()
         
+        # Existing tokens of a deactivated member stop working right away
+        if not staff_member.is_active:
+            revoke_user_tokens(staff_member.id)
+        
         return jsonify({
             'message': f'Staff member {"activated" if staff_member.is_active else "deactivated"} successfully',
             'staff_member': staff_member.to_dict()
@@ -330,8 +341,7 @@ def toggle_staff_status(staff_id):
 def reset_staff_password(staff_id):
     """Reset staff member password"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -359,6 +369,7 @@ def reset_staff_password(staff_id):
         
         staff_member.set_password(new_password)
         db.session.commit()
+        revoke_user_tokens(staff_member.id)
         
         return jsonify({
             'message': 'Password reset successfully'
@@ -374,7 +385,7 @@ def delete_staff_member(staff_id):
     """Delete a staff member"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -401,8 +412,10 @@ def delete_staff_member(staff_id):
                 db.session.delete(doctor_profile)
         
         # Delete the user
+        deleted_user_id = staff_member.id
         db.session.delete(staff_member)
         db.session.commit()
+        revoke_user_tokens(deleted_user_id)
         
         return jsonify({
             'message': 'Staff member deleted successfully'
@@ -450,8 +463,7 @@ def get_available_roles():
 def get_hospital_patients():
     """Get all patients for the hospital"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -482,13 +494,21 @@ def get_hospital_patients():
                 )
             )
         
-        patients = query.paginate(page=page, per_page=per_page, error_out=False)
+        # ?fields= picks patient fields (plus 'user'); address/history/allergies only on request
+        fields, extras = requested_fields(patient_rows, extra=('user',))
+        patient_plan = patient_rows.plan(fields)
+        user_plan = user_rows.plan(offset=len(patient_plan.columns)) if 'user' in extras else None
+        columns = patient_plan.columns + (user_plan.columns if user_plan else [])
+        patients = query.with_entities(*columns).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
         
         # Format patient data
         patients_data = []
-        for patient, patient_user in patients.items:
-            patient_dict = patient.to_dict()
-            patient_dict['user'] = patient_user.to_dict()
+        for row in patients.items:
+            patient_dict = patient_plan.dump(row)
+            if user_plan:
+                patient_dict['user'] = user_plan.dump(row)
             patients_data.append(patient_dict)
         
         return jsonify({
@@ -499,5 +519,7 @@ def get_hospital_patients():
             'per_page': per_page
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,25 +1,29 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from hospital import db
 from hospital.models.user import User
 from hospital.models.doctor import Doctor
-from hospital.models.hospital import Hospital
-from hospital.models.hospital_subscription import HospitalSubscription
+from hospital.services.tenant_context import get_tenant_context
+from hospital.services.usage_counters import get_usage
+from hospital.utils.current_user import get_current_user
 from hospital.utils.validators import validate_email
+from hospital.utils.allocators import EmailAllocator, allocate_unique_ids, hospital_email_domain
+from hospital.utils.import_validation import ImportValidator, is_dry_run
+from hospital.utils.import_readers import read_import_file
 import pandas as pd
 import uuid
 import random
-import io
 
 import_doctors_bp = Blueprint('import_doctors', __name__)
 
+STAFF_ROLES = ['doctor', 'nurse', 'receptionist', 'admin']
+
 @import_doctors_bp.route('/import-doctors', methods=['POST'])
 @jwt_required()
 def import_doctors():
     """Import doctors from CSV/Excel file"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -45,10 +49,7 @@ def import_doctors():
         # Read file into pandas DataFrame
         try:
             file_content = file.read()
-            if file_ext == '.csv':
-                df = pd.read_csv(io.BytesIO(file_content))
-            else:
-                df = pd.read_excel(io.BytesIO(file_content))
+            df = read_import_file(file_content, file_ext, 'doctors', request.args.get('sheet'))
         except Exception as e:
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
         
@@ -63,31 +64,49 @@ def import_doctors():
                 'found_columns': list(df.columns)
             }), 400
         
+        # Validate the whole file without writing anything
+        if is_dry_run():
+            validator = ImportValidator(df)
+            validator.require(*required_columns)
+            validator.numeric('experience_years', min_value=0, integer=True)
+            validator.numeric('consultation_fee', min_value=0)
+            validator.unique_in_file('license_number')
+            
+            if 'license_number' in df.columns:
+                license_numbers = validator.text('license_number')
+                existing_licenses = {
+                    number for (number,) in db.session.query(Doctor.license_number).filter(
+                        Doctor.license_number.in_(license_numbers[license_numbers != ''].unique().tolist())
+                    ).all()
+                }
+                validator.not_in('license_number', existing_licenses)
+            
+            return jsonify(validator.report()), 200
+        
         # Get hospital info for email generation
-        hospital = Hospital.query.get(user.hospital_id)
-        hospital_domain = hospital.name.lower().replace(' ', '').replace('-', '') if hospital else 'hospital'
+        tenant = get_tenant_context(user.hospital_id)
+        email_allocator = EmailAllocator(hospital_email_domain(tenant))
         
         # Check subscription limits (temporarily disabled for testing)
-        subscription = HospitalSubscription.query.filter_by(
-            hospital_id=user.hospital_id, 
-            is_active=True
-        ).first()
-        
-        current_staff_count = User.query.filter_by(hospital_id=user.hospital_id).count()
-        current_doctors = Doctor.query.filter_by(hospital_id=user.hospital_id).count()
+        usage = get_usage(user.hospital_id)
+        current_staff_count = usage['staff']
+        current_doctors = usage['doctors']
         
         # Temporarily disable limits for testing
-        # if subscription:
-        #     if current_staff_count + len(df) > subscription.max_staff:
+        # if tenant.has_subscription:
+        #     if current_staff_count + len(df) > tenant.max_staff:
         #         return jsonify({
-        #             'error': f'Import would exceed staff limit. Current: {current_staff_count}, Trying to add: {len(df)}, Limit: {subscription.max_staff}'
+        #             'error': f'Import would exceed staff limit. Current: {current_staff_count}, Trying to add: {len(df)}, Limit: {tenant.max_staff}'
         #         }), 403
         #     
-        #     if current_doctors + len(df) > subscription.max_doctors:
+        #     if current_doctors + len(df) > tenant.max_doctors:
         #         return jsonify({
-        #             'error': f'Import would exceed doctor limit. Current: {current_doctors}, Trying to add: {len(df)}, Limit: {subscription.max_doctors}'
+        #             'error': f'Import would exceed doctor limit. Current: {current_doctors}, Trying to add: {len(df)}, Limit: {tenant.max_doctors}'
         #         }), 403
         
+        # Reserve doctor IDs for the whole batch up front
+        doctor_ids = allocate_unique_ids(Doctor.doctor_id, 'DOC', len(df))
+        
         # Process each row
         imported_doctors = []
         errors = []
@@ -112,12 +131,7 @@ def import_doctors():
                     continue
                 
                 # Generate email
-                base_email = f"{first_name.lower()}.{last_name.lower()}@{hospital_domain}.com"
-                counter = 1
-                generated_email = base_email
-                while User.query.filter_by(email=generated_email).first():
-                    generated_email = f"{first_name.lower()}.{last_name.lower()}{counter}@{hospital_domain}.com"
-                    counter += 1
+                generated_email = email_allocator.allocate(f"{first_name.lower()}.{last_name.lower()}")
                 
                 # Set default password to 123
                 generated_password = "123"
@@ -138,7 +152,7 @@ def import_doctors():
                 
                 # Create doctor profile
                 doctor_profile = Doctor(
-                    doctor_id=f"DOC{str(uuid.uuid4())[:8].upper()}",
+                    doctor_id=doctor_ids.pop(),
                     user_id=new_doctor.id,
                     specialization=specialization,
                     qualification=qualification,
@@ -181,8 +195,7 @@ def import_doctors():
 def import_staff():
     """Import staff from CSV/Excel file"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -208,10 +221,7 @@ def import_staff():
         # Read file into pandas DataFrame
         try:
             file_content = file.read()
-            if file_ext == '.csv':
-                df = pd.read_csv(io.BytesIO(file_content))
-            else:
-                df = pd.read_excel(io.BytesIO(file_content))
+            df = read_import_file(file_content, file_ext, 'staff', request.args.get('sheet'))
         except Exception as e:
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
         
@@ -226,9 +236,15 @@ def import_staff():
                 'found_columns': list(df.columns)
             }), 400
         
+        # Validate the whole file without writing anything
+        if is_dry_run():
+            validator = ImportValidator(df)
+            validator.require(*required_columns)
+            validator.choices('role', STAFF_ROLES, warning=True)
+            return jsonify(validator.report()), 200
+        
         # Get hospital info for email generation
-        hospital = Hospital.query.get(user.hospital_id)
-        hospital_domain = hospital.name.lower().replace(' ', '').replace('-', '') if hospital else 'hospital'
+        email_allocator = EmailAllocator(hospital_email_domain(get_tenant_context(user.hospital_id)))
         
         # Process each row
         imported_staff = []
@@ -250,12 +266,7 @@ def import_staff():
                     continue
                 
                 # Generate email
-                base_email = f"{first_name.lower()}.{last_name.lower()}@{hospital_domain}.com"
-                counter = 1
-                generated_email = base_email
-                while User.query.filter_by(email=generated_email).first():
-                    generated_email = f"{first_name.lower()}.{last_name.lower()}{counter}@{hospital_domain}.com"
-                    counter += 1
+                generated_email = email_allocator.allocate(f"{first_name.lower()}.{last_name.lower()}")
                 
                 # Set password to 123
                 generated_password = "123"
@@ -306,8 +317,7 @@ def import_staff():
 def get_staff_import_template():
     """Get CSV template for importing staff"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -332,7 +342,7 @@ def get_staff_import_template():
                 'Optional columns: phone',
                 'Email and password will be auto-generated',
                 'All passwords will be set to "123"',
-                'Save as CSV or Excel file',
+                'Save as CSV or Excel file (workbooks may hold one sheet per entity, e.g. "Doctors" and "Staff")',
                 'First row should contain column headers'
             ]
         }), 200
@@ -345,8 +355,7 @@ def get_staff_import_template():
 def get_import_template():
     """Get CSV template for importing doctors"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -374,7 +383,7 @@ def get_import_template():
                 'Required columns: first_name, last_name, specialization, qualification',
                 'Optional columns: phone, experience_years, consultation_fee, license_number',
                 'Email and password will be auto-generated',
-                'Save as CSV or Excel file',
+                'Save as CSV or Excel file (workbooks may hold one sheet per entity, e.g. "Doctors" and "Staff")',
                 'First row should contain column headers'
             ]
         }), 200
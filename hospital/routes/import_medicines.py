@@ -1,22 +1,74 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from hospital import db
-from hospital.models.user import User
-from hospital.models.medicine import Medicine
+from hospital.models.medicine import Medicine, StockMovement
 from hospital.models.hospital import Hospital
+from hospital.utils.current_user import get_current_user
+from hospital.utils.import_validation import ImportValidator, is_dry_run, MEDICINE_DATE_FORMATS
+from hospital.utils.import_readers import iter_import_chunks
+from hospital.utils.import_ledger import ImportLedger, file_content_hash, row_hash
 from datetime import datetime
 import pandas as pd
-import io
+import itertools
 
 import_medicines_bp = Blueprint('import_medicines', __name__)
 
+def _stock_rows(rows, existing_by_name, user):
+    """Add each parsed row's quantity to its medicine, creating medicines not stocked yet.
+    
+    Returns (medicine, created) per row. existing_by_name is not changed; the
+    caller adds the medicines once the enclosing savepoint has succeeded.
+    """
+    staged = {}
+    results = []
+    deliveries = []
+    for item in rows:
+        medicine = staged.get(item['name']) or existing_by_name.get(item['name'])
+        if medicine is None:
+            medicine = Medicine(
+                hospital_id=user.hospital_id,
+                name=item['name'],
+                quantity_in_stock=item['quantity'],
+                unit_of_measurement='pieces',
+                is_active=True,
+                prescription_required=True,
+                mrp=item['mrp'],
+                cost_price=item['cost_price'],
+                selling_price=item['selling_price'],
+                expiry_date=item['expiry_date']
+            )
+            db.session.add(medicine)
+            results.append((medicine, True))
+        else:
+            # A delivery: add to the stock on hand
+            medicine.quantity_in_stock = (medicine.quantity_in_stock or 0) + item['quantity']
+            if item['quantity']:
+                deliveries.append((medicine, item['quantity']))
+            results.append((medicine, False))
+        staged[item['name']] = medicine
+    
+    db.session.flush()  # IDs for new medicines and the movements below
+    for medicine, quantity in deliveries:
+        db.session.add(StockMovement(
+            medicine_id=medicine.id,
+            hospital_id=user.hospital_id,
+            movement_type='IN',
+            quantity=quantity,
+            unit_cost=medicine.cost_price,
+            total_cost=(medicine.cost_price or 0) * quantity,
+            reference_type='IMPORT',
+            created_by=user.id,
+            notes='Stock added by medicine import'
+        ))
+    db.session.flush()
+    return results
+
 @import_medicines_bp.route('/import-medicines', methods=['POST'])
 @jwt_required()
 def import_medicines():
     """Import medicines from CSV/Excel file"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -39,16 +91,17 @@ def import_medicines():
         if file_ext not in allowed_extensions:
             return jsonify({'error': 'File must be CSV or Excel format (.csv, .xlsx, .xls)'}), 400
         
-        # Read file into pandas DataFrame
+        # Stream the file in chunks; the first chunk carries the columns
         try:
             file_content = file.read()
-            if file_ext == '.csv':
-                df = pd.read_csv(io.BytesIO(file_content))
-            else:
-                df = pd.read_excel(io.BytesIO(file_content))
+            chunks = iter_import_chunks(file_content, file_ext, 'medicines', request.args.get('sheet'))
+            df = next(chunks, None)
         except Exception as e:
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
         
+        if df is None:
+            return jsonify({'error': 'File is empty or has no headers'}), 400
+        
         # Validate required columns
         required_columns = ['name', 'quantity']
         missing_columns = [col for col in required_columns if col not in df.columns]
@@ -63,147 +116,219 @@ def import_medicines():
         # Optional columns that can be imported
         optional_columns = ['mrp', 'cost_price', 'selling_price', 'expiry_date']
         
-        # Process each row
+        # Validate the whole file without writing anything
+        if is_dry_run():
+            df = pd.concat([df, *chunks])
+            existing_names = {
+                name for (name,) in db.session.query(Medicine.name).filter_by(
+                    hospital_id=user.hospital_id,
+                    is_active=True
+                ).all()
+            }
+            
+            validator = ImportValidator(df)
+            validator.require('name', 'quantity')
+            validator.numeric('quantity', min_value=0)
+            for column in ['mrp', 'cost_price', 'selling_price']:
+                validator.numeric(column, min_value=0, warning=True)  # Ignored by the real import
+            validator.dates('expiry_date', MEDICINE_DATE_FORMATS, warning=True)
+            validator.unique_in_file('name', warning=True)  # Quantities get merged (identical rows count once)
+            validator.not_in('name', existing_names, warning=True)  # Stock gets topped up
+            
+            return jsonify(validator.report()), 200
+        
+        # Re-uploading the exact same file is a no-op (a batch is only stored when every row applied)
+        file_hash = file_content_hash(file_content)
+        ledger = ImportLedger(user.hospital_id, 'medicines')
+        previous_batch = ledger.find_batch(file_hash)
+        if previous_batch:
+            return jsonify({
+                'success': True,
+                'already_imported': True,
+                'imported_count': 0,
+                'errors_count': 0,
+                'skipped_count': 0,
+                'unchanged_count': previous_batch.row_count,
+                'total_rows': previous_batch.row_count,
+                'previous_import': previous_batch.to_dict()
+            }), 200
+        
+        # Process each row, one chunk at a time
         imported_medicines = []
         errors = []
         skipped = []
+        unchanged_count = 0
+        total_rows = 0
+        existing_by_name = {}
         
-        for index, row in df.iterrows():
-            try:
-                # Extract data
-                name = str(row['name']).strip()
-                quantity = row['quantity']
-                
-                # Validate name
-                if not name or name == '' or name.lower() == 'nan':
-                    errors.append({
+        for chunk in itertools.chain([df], chunks):
+            total_rows += len(chunk)
+            
+            # Fetch the chunk's already-stocked medicines in one query
+            chunk_names = chunk['name'].dropna().astype(str).str.strip().unique().tolist()
+            for medicine in Medicine.query.filter(
+                Medicine.hospital_id == user.hospital_id,
+                Medicine.is_active == True,
+                Medicine.name.in_(chunk_names)
+            ).all():
+                existing_by_name.setdefault(medicine.name, medicine)
+            
+            rows = []  # Parsed rows of this chunk still to be written
+            chunk_hashes = {}
+            for index, row in chunk.iterrows():
+                try:
+                    # Extract data
+                    name = str(row['name']).strip()
+                    quantity = row['quantity']
+                    
+                    # Validate name
+                    if not name or name == '' or name.lower() == 'nan':
+                        errors.append({
+                            'row': index + 2,  # +2 because index is 0-based and we have header
+                            'error': 'Medicine name is required'
+                        })
+                        continue
+                    
+                    # Validate quantity
+                    try:
+                        quantity = int(float(quantity))  # Convert to int, handling float strings
+                        if quantity < 0:
+                            raise ValueError('Quantity cannot be negative')
+                    except (ValueError, TypeError):
+                        errors.append({
+                            'row': index + 2,
+                            'error': f'Invalid quantity: {quantity}. Must be a positive number'
+                        })
+                        continue
+                    
+                    # Extract optional fields
+                    mrp = None
+                    cost_price = None
+                    selling_price = None
+                    expiry_date = None
+                    
+                    # Parse MRP
+                    if 'mrp' in df.columns and pd.notna(row.get('mrp')):
+                        try:
+                            mrp = float(row['mrp'])
+                            if mrp < 0:
+                                mrp = None
+                        except (ValueError, TypeError):
+                            pass
+                    
+                    # Parse cost_price
+                    if 'cost_price' in df.columns and pd.notna(row.get('cost_price')):
+                        try:
+                            cost_price = float(row['cost_price'])
+                            if cost_price < 0:
+                                cost_price = None
+                        except (ValueError, TypeError):
+                            pass
+                    
+                    # Auto-calculate cost_price from MRP if not provided (assume 60% of MRP as typical wholesale cost)
+                    if cost_price is None and mrp is not None and mrp > 0:
+                        cost_price = round(mrp * 0.6, 2)  # 60% of MRP as default cost
+                    
+                    # Parse selling_price
+                    if 'selling_price' in df.columns and pd.notna(row.get('selling_price')):
+                        try:
+                            selling_price = float(row['selling_price'])
+                            if selling_price < 0:
+                                selling_price = None
+                        except (ValueError, TypeError):
+                            pass
+                    
+                    # Parse expiry_date (accepts formats: YYYY-MM-DD, DD-MM-YYYY, DD/MM/YYYY)
+                    if 'expiry_date' in df.columns and pd.notna(row.get('expiry_date')):
+                        try:
+                            expiry_str = str(row['expiry_date']).strip()
+                            if expiry_str and expiry_str.lower() != 'nan':
+                                # Try parsing different date formats
+                                date_formats = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%y', '%d/%m/%y']
+                                parsed = False
+                                for fmt in date_formats:
+                                    try:
+                                        expiry_date = datetime.strptime(expiry_str, fmt).date()
+                                        parsed = True
+                                        break
+                                    except ValueError:
+                                        continue
+                                if not parsed:
+                                    # Try pandas date parsing as fallback
+                                    try:
+                                        expiry_date = pd.to_datetime(expiry_str).date()
+                                    except:
+                                        expiry_date = None
+                        except (ValueError, TypeError, AttributeError):
+                            expiry_date = None
+                    
+                    # Skip rows that an earlier import (or an identical row above) already applied
+                    key_hash = row_hash(name.lower())
+                    content_hash = row_hash(name, quantity, mrp, cost_price, selling_price, expiry_date)
+                    if chunk_hashes.get(key_hash) == content_hash or ledger.is_unchanged(
+                            key_hash, content_hash, live=name in existing_by_name):
+                        unchanged_count += 1
+                        continue
+                    chunk_hashes[key_hash] = content_hash
+                    
+                    rows.append({
                         'row': index + 2,  # +2 because index is 0-based and we have header
-                        'error': 'Medicine name is required'
+                        'name': name,
+                        'quantity': quantity,
+                        'mrp': mrp,
+                        'cost_price': cost_price,
+                        'selling_price': selling_price,
+                        'expiry_date': expiry_date,
+                        'key_hash': key_hash,
+                        'content_hash': content_hash
                     })
-                    continue
-                
-                # Validate quantity
-                try:
-                    quantity = int(float(quantity))  # Convert to int, handling float strings
-                    if quantity < 0:
-                        raise ValueError('Quantity cannot be negative')
-                except (ValueError, TypeError):
+                    
+                except Exception as e:
                     errors.append({
                         'row': index + 2,
-                        'error': f'Invalid quantity: {quantity}. Must be a positive number'
+                        'error': f'Error processing row: {str(e)}'
                     })
                     continue
-                
-                # Extract optional fields
-                mrp = None
-                cost_price = None
-                selling_price = None
-                expiry_date = None
-                
-                # Parse MRP
-                if 'mrp' in df.columns and pd.notna(row.get('mrp')):
-                    try:
-                        mrp = float(row['mrp'])
-                        if mrp < 0:
-                            mrp = None
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Parse cost_price
-                if 'cost_price' in df.columns and pd.notna(row.get('cost_price')):
-                    try:
-                        cost_price = float(row['cost_price'])
-                        if cost_price < 0:
-                            cost_price = None
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Auto-calculate cost_price from MRP if not provided (assume 60% of MRP as typical wholesale cost)
-                if cost_price is None and mrp is not None and mrp > 0:
-                    cost_price = round(mrp * 0.6, 2)  # 60% of MRP as default cost
-                
-                # Parse selling_price
-                if 'selling_price' in df.columns and pd.notna(row.get('selling_price')):
-                    try:
-                        selling_price = float(row['selling_price'])
-                        if selling_price < 0:
-                            selling_price = None
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Parse expiry_date (accepts formats: YYYY-MM-DD, DD-MM-YYYY, DD/MM/YYYY)
-                if 'expiry_date' in df.columns and pd.notna(row.get('expiry_date')):
+            
+            # Write the chunk in one savepoint; if it fails, redo it a row at a time to find the bad rows
+            try:
+                with db.session.begin_nested():
+                    applied = list(zip(rows, _stock_rows(rows, existing_by_name, user)))
+            except Exception:
+                applied = []
+                for item in rows:
                     try:
-                        expiry_str = str(row['expiry_date']).strip()
-                        if expiry_str and expiry_str.lower() != 'nan':
-                            # Try parsing different date formats
-                            date_formats = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%y', '%d/%m/%y']
-                            parsed = False
-                            for fmt in date_formats:
-                                try:
-                                    expiry_date = datetime.strptime(expiry_str, fmt).date()
-                                    parsed = True
-                                    break
-                                except ValueError:
-                                    continue
-                            if not parsed:
-                                # Try pandas date parsing as fallback
-                                try:
-                                    expiry_date = pd.to_datetime(expiry_str).date()
-                                except:
-                                    expiry_date = None
-                    except (ValueError, TypeError, AttributeError):
-                        expiry_date = None
-                
-                # Check if medicine with same name already exists for this hospital
-                existing_medicine = Medicine.query.filter_by(
-                    hospital_id=user.hospital_id,
-                    name=name,
-                    is_active=True
-                ).first()
-                
-                if existing_medicine:
-                    # Update existing medicine quantity
-                    existing_medicine.quantity_in_stock += quantity
+                        with db.session.begin_nested():
+                            result = _stock_rows([item], existing_by_name, user)[0]
+                    except Exception as e:
+                        errors.append({
+                            'row': item['row'],
+                            'error': f'Error processing row: {str(e)}'
+                        })
+                        continue
+                    applied.append((item, result))
+                    existing_by_name[item['name']] = result[0]
+            
+            # Only rows whose savepoint succeeded reach the ledger
+            for item, (medicine, created) in applied:
+                existing_by_name[item['name']] = medicine
+                ledger.record(item['key_hash'], item['content_hash'])
+                if created:
+                    imported_medicines.append({
+                        'id': medicine.id,
+                        'name': medicine.name,
+                        'quantity': item['quantity']
+                    })
+                else:
                     skipped.append({
-                        'row': index + 2,
-                        'name': name,
-                        'message': f'Medicine already exists. Quantity will be updated to: {existing_medicine.quantity_in_stock + quantity}'
+                        'row': item['row'],
+                        'name': item['name'],
+                        'message': f"Medicine already exists. Added {item['quantity']} to stock"
                     })
-                    continue
-                
-                # Create new medicine
-                medicine = Medicine(
-                    hospital_id=user.hospital_id,
-                    name=name,
-                    quantity_in_stock=quantity,
-                    unit_of_measurement='pieces',
-                    is_active=True,
-                    prescription_required=True,
-                    mrp=mrp,
-                    cost_price=cost_price,
-                    selling_price=selling_price,
-                    expiry_date=expiry_date
-                )
-                
-                db.session.add(medicine)
-                
-                imported_medicines.append({
-                    'id': medicine.id,
-                    'name': medicine.name,
-                    'quantity': medicine.quantity_in_stock
-                })
-                
-            except Exception as e:
-                db.session.rollback()
-                errors.append({
-                    'row': index + 2,
-                    'error': f'Error processing row: {str(e)}'
-                })
-                continue
         
-        # Commit all changes at once
+        # Commit all changes at once, together with the import ledger
         try:
+            ledger.finish(file_hash, file.filename, total_rows, user.id, failed_count=len(errors))
             db.session.commit()
         except Exception as e:
             db.session.rollback()
@@ -215,8 +340,9 @@ def import_medicines():
             'imported_count': len(imported_medicines),
             'errors_count': len(errors),
             'skipped_count': len(skipped),
+            'unchanged_count': unchanged_count,
             'imported_medicines': imported_medicines[:10],  # Return first 10 for preview
-            'total_rows': len(df)
+            'total_rows': total_rows
         }
         
         if errors:
@@ -236,8 +362,7 @@ def import_medicines():
 def get_import_template():
     """Get CSV template for medicine import"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -252,7 +377,7 @@ def get_import_template():
             'template': csv_content,
             'required_columns': ['name', 'quantity'],
             'optional_columns': ['mrp', 'cost_price', 'selling_price', 'expiry_date'],
-            'description': 'CSV file must have: name (medicine name) and quantity (number of units). Optional: mrp, cost_price, selling_price, expiry_date (format: YYYY-MM-DD or DD-MM-YYYY)'
+            'description': 'CSV file must have: name (medicine name) and quantity (number of units). Optional: mrp, cost_price, selling_price, expiry_date (format: YYYY-MM-DD or DD-MM-YYYY). Quantities of medicines already in stock are added to their stock; re-uploading the same file, or rows already imported unchanged, changes nothing.'
         }), 200
         
     except Exception as e:
@@ -1,22 +1,40 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from hospital import db
-from hospital.models.user import User
 from hospital.models.patient import Patient
+from hospital.models.user import User
+from hospital.utils.current_user import get_current_user
+from hospital.utils.allocators import allocate_unique_ids
+from hospital.utils.import_validation import ImportValidator, is_dry_run, PATIENT_DATE_FORMATS
+from hospital.utils.import_ledger import ImportLedger, file_content_hash, row_hash
 import csv
 import io
-import uuid
+import pandas as pd
 from datetime import datetime, date
 
 patient_import_bp = Blueprint('patient_import', __name__)
 
+def _existing_contacts(hospital_id, phones, emails):
+    """Look up the file's phones and emails, which live on the User: ({phone: user id} for this hospital's patients, {lowercased email: user id})"""
+    patient_users = dict(
+        db.session.query(User.phone, User.id).join(Patient, Patient.user_id == User.id).filter(
+            Patient.hospital_id == hospital_id,
+            User.phone.in_(phones)
+        ).all()
+    )
+    email_owners = dict(
+        db.session.query(db.func.lower(User.email), User.id).filter(
+            db.func.lower(User.email).in_(emails)
+        ).all()
+    )
+    return patient_users, email_owners
+
 @patient_import_bp.route('/patients/import', methods=['POST'])
 @jwt_required()
 def import_patients():
     """Import patients from CSV file"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
@@ -86,6 +104,81 @@ def import_patients():
         
         rows = list(csv_input)
         
+        # Validate the whole file without writing anything
+        if is_dry_run():
+            df = pd.DataFrame(rows, columns=fieldnames).rename(
+                columns={actual: standard for standard, actual in actual_fields.items()}
+            )
+            
+            validator = ImportValidator(df)
+            validator.require('first_name', 'last_name', 'phone')
+            validator.min_digits('phone', 10)
+            validator.dates('date_of_birth', PATIENT_DATE_FORMATS, warning=True)  # Defaulted on import
+            
+            # Same normalization as the real import: last 10 digits
+            phones = validator.text('phone').str.replace(r'\D', '', regex=True).str[-10:]
+            validator.unique_in_file('phone', values=phones)
+            
+            if 'email' in df.columns:
+                emails = validator.text('email').where(validator.text('email').str.contains('@'), '').str.lower()
+            else:
+                emails = pd.Series('', index=df.index)
+            patient_users, email_owners = _existing_contacts(
+                user.hospital_id,
+                phones[phones != ''].unique().tolist(),
+                emails[emails != ''].unique().tolist()
+            )
+            
+            # Same outcome as the real import: patients from an earlier import get updated, others are duplicates
+            ledger = ImportLedger(user.hospital_id, 'patients')
+            imported_phones = {phone for phone in patient_users if ledger.was_imported(row_hash(phone))}
+            validator.not_in('phone', set(patient_users) - imported_phones, values=phones)
+            validator.not_in('phone', imported_phones, values=phones, code='will_update', warning=True)
+            
+            if 'email' in df.columns:
+                validator.unique_in_file('email', values=emails)
+                # An email may only stay with the patient who already has it
+                owners = emails.map(email_owners)
+                taken = owners.notna() & (owners != phones.map(patient_users))
+                validator.not_in('email', set(emails[taken]), values=emails.where(taken, ''))
+            
+            return jsonify(validator.report()), 200
+        
+        # Re-uploading the exact same file is a no-op (a batch is only stored when every row applied)
+        file_hash = file_content_hash(content.encode('utf-8'))
+        ledger = ImportLedger(user.hospital_id, 'patients')
+        previous_batch = ledger.find_batch(file_hash)
+        if previous_batch:
+            return jsonify({
+                'message': 'This file was already imported, nothing to do',
+                'already_imported': True,
+                'success': 0,
+                'updated': 0,
+                'unchanged': previous_batch.row_count,
+                'failed': 0,
+                'previous_import': previous_batch.to_dict(),
+                'errors': []
+            }), 200
+        
+        # Reserve patient IDs for every row in one pass
+        patient_ids = allocate_unique_ids(Patient.patient_id, 'PAT', len(rows))
+        
+        # Existing phones and emails (both on the patient's User) are fetched once instead of per row
+        file_phones = {
+            ''.join(filter(str.isdigit, row.get(actual_fields['phone']) or ''))[-10:] for row in rows
+        }
+        file_emails = {
+            (row.get(actual_fields.get('email', 'email')) or '').strip().lower() for row in rows
+        }
+        patient_users, email_owners = _existing_contacts(
+            user.hospital_id,
+            [phone for phone in file_phones if phone],
+            [email for email in file_emails if email]
+        )
+        
+        updates = {}  # phone -> new values for patients created by an earlier import
+        unchanged_count = 0
+        
         for row_num, row in enumerate(rows, start=2):  # Start from 2 (header is row 1)
             try:
                 # Get basic required fields using mapped field names
@@ -158,27 +251,42 @@ def import_patients():
                 if blood_group not in valid_blood_groups:
                     blood_group = None
                 
-                # Check for duplicate phone numbers in the same hospital
-                existing_patient = Patient.query.filter_by(
-                    phone=phone_clean, 
-                    hospital_id=user.hospital_id
-                ).first()
-                
-                if existing_patient:
-                    raise ValueError(f'Patient with phone {phone_clean} already exists')
+                # Skip rows that an earlier import already applied unchanged
+                key_hash = row_hash(phone_clean)
+                content_hash = row_hash(
+                    first_name, last_name, email, phone_clean, date_of_birth, gender, blood_group, address
+                )
+                if ledger.is_unchanged(key_hash, content_hash, live=phone_clean in patient_users):
+                    unchanged_count += 1
+                    continue
                 
-                # Check for duplicate email if provided
-                if email:
-                    existing_email = Patient.query.filter_by(email=email).first()
-                    if existing_email:
-                        raise ValueError(f'Patient with email {email} already exists')
+                # Check for duplicate email if provided (users' emails are unique, other rows of this file included)
+                email_key = email.lower()
+                if email and email_owners.get(email_key) not in (None, patient_users.get(phone_clean)):
+                    raise ValueError(f'User with email {email} already exists')
                 
-                # Generate unique patient ID
-                patient_id = f"PAT{str(uuid.uuid4())[:8].upper()}"
+                # Check for duplicate phone numbers in the same hospital
+                if phone_clean in patient_users:
+                    if not ledger.was_imported(key_hash):
+                        raise ValueError(f'Patient with phone {phone_clean} already exists')
+                    
+                    # Upsert: this patient came from an earlier import, apply the new values
+                    updates[phone_clean] = {
+                        'first_name': first_name,
+                        'last_name': last_name,
+                        'email': email if email else None,
+                        'date_of_birth': date_of_birth,
+                        'gender': gender,
+                        'blood_group': blood_group,
+                        'address': address
+                    }
+                    if email:
+                        email_owners[email_key] = patient_users[phone_clean]
+                    ledger.record(key_hash, content_hash)
+                    continue
                 
-                # Ensure patient ID is unique
-                while Patient.query.filter_by(patient_id=patient_id).first():
-                    patient_id = f"PAT{str(uuid.uuid4())[:8].upper()}"
+                # Take a pre-allocated unique patient ID
+                patient_id = patient_ids.pop()
                 
                 # Create patient
                 patient = Patient(
@@ -195,6 +303,10 @@ def import_patients():
                 )
                 
                 db.session.add(patient)
+                patient_users[phone_clean] = None
+                if email:
+                    email_owners[email_key] = phone_clean  # Claimed by this new row
+                ledger.record(key_hash, content_hash)
                 success_count += 1
                 
             except Exception as e:
@@ -203,15 +315,33 @@ def import_patients():
                 errors.append(error_msg)
                 continue
         
-        # Commit all successful imports
-        if success_count > 0:
+        # Apply updates to previously imported patients in one query
+        if updates:
+            for patient, patient_user in db.session.query(Patient, User).join(User, Patient.user_id == User.id).filter(
+                Patient.hospital_id == user.hospital_id,
+                User.phone.in_(list(updates))
+            ).all():
+                values = updates[patient_user.phone]
+                patient_user.first_name = values.pop('first_name')
+                patient_user.last_name = values.pop('last_name')
+                email = values.pop('email')
+                if email:
+                    patient_user.email = email
+                for field, value in values.items():
+                    setattr(patient, field, value)
+        
+        # Commit all successful imports together with the import ledger
+        if success_count > 0 or updates:
+            ledger.finish(file_hash, file.filename, len(rows), user.id, failed_count=failed_count)
             db.session.commit()
         else:
             db.session.rollback()
         
         return jsonify({
-            'message': f'Import completed: {success_count} successful, {failed_count} failed',
+            'message': f'Import completed: {success_count} successful, {len(updates)} updated, {unchanged_count} unchanged, {failed_count} failed',
             'success': success_count,
+            'updated': len(updates),
+            'unchanged': unchanged_count,
             'failed': failed_count,
             'errors': errors[:10]  # Limit to first 10 errors
         }), 200
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from hospital import db
 from hospital.models.patient import Patient
+from hospital.utils.serialization import InvalidFields, patient_rows, requested_fields
 from hospital.utils.validators import validate_required_fields, validate_email, validate_phone, validate_date
 import uuid
 
@@ -94,18 +95,23 @@ def get_patients():
                 )
             )
         
-        patients = query.paginate(
+        # Only the requested columns (?fields=); address/history/allergies only on request
+        fields, _ = requested_fields(patient_rows)
+        plan = patient_rows.plan(fields)
+        patients = query.with_entities(*plan.columns).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         return jsonify({
-            'patients': [patient.to_dict() for patient in patients.items],
+            'patients': plan.dump_all(patients.items),
             'total': patients.total,
             'pages': patients.pages,
             'current_page': page,
             'per_page': per_page
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,12 +1,22 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from hospital.models import db, Medicine, StockMovement, Hospital, User
+from hospital.models import db, Medicine, StockMovement, Hospital
+from hospital.utils.current_user import get_current_user
+from hospital.utils.serialization import InvalidFields, medicine_rows, requested_fields, stock_movement_rows
 from datetime import datetime, date, timedelta
 from sqlalchemy import or_, and_, func
 import traceback
+from hospital.services.drug_interactions import DrugInteractionChecker
 
 pharmacy_bp = Blueprint('pharmacy', __name__)
 
+def _medication_names(medications):
+    """Drug names from a list of plain names or prescription entries ({'name': ..., 'dosage': ...}); None if not a list"""
+    if not isinstance(medications, list):
+        return None
+    names = [med.get('name') if isinstance(med, dict) else med for med in medications]
+    return [name for name in names if isinstance(name, str) and name]
+
 @pharmacy_bp.route('/test', methods=['GET'])
 def test_pharmacy():
     """Test endpoint to check if pharmacy routes are working"""
@@ -19,8 +29,7 @@ def get_medicines():
     try:
         current_user = get_jwt_identity()
         print(f"Current user ID: {current_user}")
-        user = User.query.get(current_user)
-        print(f"User found: {user.full_name if user else 'None'}")
+        user = get_current_user()
         print(f"User hospital ID: {user.hospital_id if user else 'None'}")
         
         if not user or not user.hospital_id:
@@ -74,8 +83,10 @@ def get_medicines():
             else:
                 query = query.order_by(getattr(Medicine, sort_by))
         
-        # Paginate
-        medicines = query.paginate(
+        # Paginate, selecting only the requested columns (?fields=, heavy text columns only on request)
+        fields, _ = requested_fields(medicine_rows)
+        plan = medicine_rows.plan(fields)
+        medicines = query.with_entities(*plan.columns).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -99,7 +110,7 @@ def get_medicines():
         ).count()
         
         return jsonify({
-            'medicines': [medicine.to_dict() for medicine in medicines.items],
+            'medicines': plan.dump_all(medicines.items),
             'pagination': {
                 'page': medicines.page,
                 'pages': medicines.pages,
@@ -116,6 +127,8 @@ def get_medicines():
             }
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error getting medicines: {str(e)}")
         return jsonify({'error': 'Failed to fetch medicines'}), 500
@@ -126,7 +139,7 @@ def add_medicine():
     """Add a new medicine to inventory"""
     try:
         current_user = get_jwt_identity()
-        user = User.query.get(current_user)
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -210,8 +223,7 @@ def add_medicine():
 def get_medicine(medicine_id):
     """Get a specific medicine by ID"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user)
+        user = get_current_user()
         
         medicine = Medicine.query.filter_by(
             id=medicine_id, 
@@ -241,8 +253,7 @@ def get_medicine(medicine_id):
 def update_medicine(medicine_id):
     """Update a medicine"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user)
+        user = get_current_user()
         
         medicine = Medicine.query.filter_by(
             id=medicine_id, 
@@ -294,7 +305,7 @@ def update_stock(medicine_id):
     """Update medicine stock (add or remove)"""
     try:
         current_user = get_jwt_identity()
-        user = User.query.get(current_user)
+        user = get_current_user()
         
         medicine = Medicine.query.filter_by(
             id=medicine_id, 
@@ -317,6 +328,25 @@ def update_stock(medicine_id):
         if quantity <= 0:
             return jsonify({'error': 'Quantity must be positive'}), 400
         
+        current_medications = _medication_names(data.get('current_medications') or [])
+        if current_medications is None:
+            return jsonify({'error': 'current_medications must be a list'}), 400
+        
+        # Dispensing: check against the patient's other medications when given
+        interaction_warnings = []
+        if movement_type == 'OUT' and (data.get('patient_id') or current_medications):
+            checker = DrugInteractionChecker(user.hospital_id)
+            interaction_warnings = checker.check_for_patient(
+                [medicine.name],
+                patient_id=data.get('patient_id'),
+                current=current_medications
+            )
+            if interaction_warnings and data.get('enforce_interactions'):
+                return jsonify({
+                    'error': 'Drug interaction detected',
+                    'interaction_warnings': interaction_warnings
+                }), 409
+        
         # Update stock based on movement type
         if movement_type == 'IN':
             medicine.quantity_in_stock += quantity
@@ -353,7 +383,8 @@ def update_stock(medicine_id):
         return jsonify({
             'message': 'Stock updated successfully',
             'medicine': medicine.to_dict(),
-            'movement': stock_movement.to_dict()
+            'movement': stock_movement.to_dict(),
+            'interaction_warnings': interaction_warnings
         }), 200
         
     except Exception as e:
@@ -361,13 +392,47 @@ def update_stock(medicine_id):
         current_app.logger.error(f"Error updating stock: {str(e)}")
         return jsonify({'error': 'Failed to update stock'}), 500
 
+@pharmacy_bp.route('/drug-interactions/check', methods=['POST'])
+@jwt_required()
+def check_drug_interactions():
+    """Check a prescription against itself and the patient's active medications"""
+    try:
+        user = get_current_user()
+        
+        data = request.get_json() or {}
+        names = _medication_names(data.get('medications') or [])
+        if names is None:
+            return jsonify({'error': 'medications must be a list'}), 400
+        if not names:
+            return jsonify({'error': 'medications is required'}), 400
+        
+        current_medications = _medication_names(data.get('current_medications') or [])
+        if current_medications is None:
+            return jsonify({'error': 'current_medications must be a list'}), 400
+        
+        checker = DrugInteractionChecker(user.hospital_id)
+        interactions = checker.check_for_patient(
+            names,
+            patient_id=data.get('patient_id'),
+            current=current_medications
+        )
+        
+        return jsonify({
+            'interactions': interactions,
+            'has_interactions': bool(interactions),
+            'checked_medications': len(names)
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error checking drug interactions: {str(e)}")
+        return jsonify({'error': 'Failed to check drug interactions'}), 500
+
 @pharmacy_bp.route('/medicines/<int:medicine_id>', methods=['DELETE'])
 @jwt_required()
 def delete_medicine(medicine_id):
     """Soft delete a medicine"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user)
+        user = get_current_user()
         
         medicine = Medicine.query.filter_by(
             id=medicine_id, 
@@ -394,8 +459,7 @@ def delete_medicine(medicine_id):
 def delete_all_medicines():
     """Delete all medicines for a hospital (soft delete)"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user)
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -439,8 +503,7 @@ def delete_all_medicines():
 def get_stock_movements():
     """Get stock movements with filtering"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user)
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -471,13 +534,21 @@ def get_stock_movements():
         # Order by most recent first
         query = query.order_by(StockMovement.created_at.desc())
         
-        # Paginate
-        movements = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        # Paginate, fetching each movement's medicine in the same query
+        movement_plan = stock_movement_rows.plan()
+        medicine_plan = medicine_rows.plan(offset=len(movement_plan.columns))
+        movements = query.join(Medicine, StockMovement.medicine_id == Medicine.id).with_entities(
+            *movement_plan.columns, *medicine_plan.columns
+        ).paginate(page=page, per_page=per_page, error_out=False)
+        
+        movements_data = []
+        for row in movements.items:
+            movement = movement_plan.dump(row)
+            movement['medicine'] = medicine_plan.dump(row)
+            movements_data.append(movement)
         
         return jsonify({
-            'movements': [movement.to_dict() for movement in movements.items],
+            'movements': movements_data,
             'pagination': {
                 'page': movements.page,
                 'pages': movements.pages,
@@ -499,8 +570,7 @@ def get_dashboard_stats():
     try:
         current_user = get_jwt_identity()
         print(f"Dashboard stats - Current user ID: {current_user}")
-        user = User.query.get(current_user)
-        print(f"Dashboard stats - User found: {user.full_name if user else 'None'}")
+        user = get_current_user()
         print(f"Dashboard stats - User hospital ID: {user.hospital_id if user else 'None'}")
         
         if not user or not user.hospital_id:
@@ -1,9 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from hospital import db
 from hospital.models.user import User
 from hospital.models.doctor import Doctor
 from hospital.models.hospital import Hospital
+from hospital.utils.current_user import get_current_user
 import uuid
 
 simple_doctor_bp = Blueprint('simple_doctor', __name__)
@@ -13,8 +14,7 @@ simple_doctor_bp = Blueprint('simple_doctor', __name__)
 def simple_add_doctor():
     """Simple doctor addition with minimal validation"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'User not associated with any hospital'}), 404
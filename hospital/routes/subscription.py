@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
 from hospital import db
 from hospital.models.hospital_subscription import HospitalSubscription
-from hospital.models import Hospital, User, Patient, Doctor
+from hospital.models import Hospital, Patient, Doctor
+from hospital.services.tenant_context import invalidate_tenant_context
+from hospital.utils.current_user import get_current_user
 
 subscription_bp = Blueprint('subscription', __name__)
 
@@ -12,8 +14,7 @@ subscription_bp = Blueprint('subscription', __name__)
 def get_subscription():
     """Get current hospital subscription details"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -39,6 +40,7 @@ def get_subscription():
             )
             db.session.add(subscription)
             db.session.commit()
+            invalidate_tenant_context(user.hospital_id)
         
         # Get usage statistics
         usage_stats = subscription.get_usage_stats()
@@ -56,8 +58,7 @@ def get_subscription():
 def upgrade_subscription():
     """Upgrade hospital subscription plan"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -137,6 +138,7 @@ def upgrade_subscription():
         
         db.session.add(new_subscription)
         db.session.commit()
+        invalidate_tenant_context(user.hospital_id)
         
         return jsonify({
             'message': f'Successfully upgraded to {new_plan} plan',
@@ -152,8 +154,7 @@ def upgrade_subscription():
 def get_usage_stats():
     """Get detailed usage statistics"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -204,8 +205,7 @@ def get_usage_stats():
 def get_billing_history():
     """Get billing history for the hospital"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -240,8 +240,7 @@ def get_billing_history():
 def check_limits():
     """Check if action is allowed based on subscription limits"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -296,8 +295,7 @@ def check_limits():
 def get_enabled_features():
     """Get list of enabled features for current subscription"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
+        user = get_current_user()
         
         if not user or not user.hospital_id:
             return jsonify({'error': 'Hospital not found'}), 404
@@ -1,92 +1,22 @@
 from datetime import datetime, timedelta
 from hospital.models.medical_record import MedicalRecord
 from hospital.models.appointment import Appointment
+from hospital.services.knowledge_base import get_knowledge_base
+from hospital.services.drug_interactions import DrugInteractionChecker, active_medications
 
 class AIDiagnosisService:
     def __init__(self):
+        self.knowledge_base = get_knowledge_base()
         self.treatment_database = self._load_treatment_database()
         self.drug_interaction_database = self._load_drug_interactions()
     
     def _load_treatment_database(self):
         """Load treatment protocols for different conditions"""
-        return {
-            'flu': {
-                'medications': [
-                    {'name': 'Paracetamol', 'dosage': '500mg every 6 hours', 'duration': '5-7 days'},
-                    {'name': 'Rest and fluids', 'dosage': 'As needed', 'duration': 'Until recovery'}
-                ],
-                'lifestyle': [
-                    'Complete bed rest for 2-3 days',
-                    'Increase fluid intake',
-                    'Avoid contact with others',
-                    'Return to work only after fever-free for 24 hours'
-                ],
-                'follow_up': 'If symptoms worsen or persist beyond 7 days'
-            },
-            'covid-19': {
-                'medications': [
-                    {'name': 'Paracetamol', 'dosage': '500mg every 6 hours', 'duration': '7-10 days'},
-                    {'name': 'Vitamin C', 'dosage': '1000mg daily', 'duration': '14 days'},
-                    {'name': 'Zinc', 'dosage': '15mg daily', 'duration': '14 days'}
-                ],
-                'lifestyle': [
-                    'Complete isolation for 10 days',
-                    'Monitor oxygen saturation',
-                    'Prone positioning if breathing difficulty',
-                    'Steam inhalation 2-3 times daily'
-                ],
-                'follow_up': 'Immediate if oxygen saturation drops below 94%'
-            },
-            'pneumonia': {
-                'medications': [
-                    {'name': 'Antibiotics', 'dosage': 'As prescribed', 'duration': '7-14 days'},
-                    {'name': 'Bronchodilators', 'dosage': 'As needed', 'duration': 'Until recovery'}
-                ],
-                'lifestyle': [
-                    'Complete rest',
-                    'Chest physiotherapy',
-                    'Adequate hydration',
-                    'Avoid smoking and pollutants'
-                ],
-                'follow_up': 'Follow-up chest X-ray in 2-4 weeks'
-            },
-            'heart attack': {
-                'medications': [
-                    {'name': 'Aspirin', 'dosage': '75mg daily', 'duration': 'Long-term'},
-                    {'name': 'Beta-blockers', 'dosage': 'As prescribed', 'duration': 'Long-term'},
-                    {'name': 'Statins', 'dosage': 'As prescribed', 'duration': 'Long-term'}
-                ],
-                'lifestyle': [
-                    'Cardiac rehabilitation program',
-                    'Low-sodium, heart-healthy diet',
-                    'Regular moderate exercise (as approved)',
-                    'Stress management techniques'
-                ],
-                'follow_up': 'Cardiology follow-up in 1-2 weeks'
-            },
-            'migraine': {
-                'medications': [
-                    {'name': 'Sumatriptan', 'dosage': '50mg at onset', 'duration': 'As needed'},
-                    {'name': 'Ibuprofen', 'dosage': '400mg every 6 hours', 'duration': 'During episode'}
-                ],
-                'lifestyle': [
-                    'Identify and avoid triggers',
-                    'Regular sleep schedule',
-                    'Stress reduction techniques',
-                    'Stay hydrated'
-                ],
-                'follow_up': 'If frequency increases or severity worsens'
-            }
-        }
+        return self.knowledge_base.treatments
     
     def _load_drug_interactions(self):
-        """Load drug interaction database"""
-        return {
-            'aspirin': ['warfarin', 'methotrexate', 'lithium'],
-            'ibuprofen': ['warfarin', 'ace_inhibitors', 'lithium'],
-            'paracetamol': ['warfarin', 'phenytoin'],
-            'antibiotics': ['warfarin', 'oral_contraceptives']
-        }
+        """Load drug interaction database (symmetric adjacency sets)"""
+        return self.knowledge_base.interactions
     
     def get_treatment_recommendations(self, ai_diagnosis):
         """Generate treatment recommendations based on AI diagnosis"""
@@ -103,7 +33,7 @@ class AIDiagnosisService:
             # Get patient's medical history for personalization
             patient = ai_diagnosis.patient
             medical_history = self._get_patient_medical_history(patient.id)
-            current_medications = self._get_current_medications(patient.id)
+            current_medications = self._get_current_medications(patient.id, patient.hospital_id)
             
             # Process each predicted condition
             for condition_data in ai_diagnosis.predicted_conditions:
@@ -142,7 +72,8 @@ class AIDiagnosisService:
             # Check for drug interactions
             recommendations['drug_interactions'] = self._check_drug_interactions(
                 recommendations['primary_treatments'], 
-                current_medications
+                current_medications,
+                patient.hospital_id
             )
             
             # Add personalized precautions
@@ -185,36 +116,20 @@ class AIDiagnosisService:
         except:
             return {'chronic_conditions': [], 'allergies': [], 'previous_treatments': [], 'hospitalizations': []}
     
-    def _get_current_medications(self, patient_id):
+    def _get_current_medications(self, patient_id, hospital_id=None):
         """Get patient's current medications"""
         try:
-            # In a real implementation, this would query a medications table
-            # For now, return empty list
-            return []
+            return active_medications(patient_id, hospital_id)
         except:
             return []
     
-    def _check_drug_interactions(self, recommended_medications, current_medications):
+    def _check_drug_interactions(self, recommended_medications, current_medications, hospital_id=None):
         """Check for potential drug interactions"""
-        interactions = []
-        
-        for rec_med in recommended_medications:
-            rec_med_name = rec_med['medication'].lower()
-            
-            for current_med in current_medications:
-                current_med_name = current_med.lower()
-                
-                # Check if there's a known interaction
-                if rec_med_name in self.drug_interaction_database:
-                    if current_med_name in self.drug_interaction_database[rec_med_name]:
-                        interactions.append({
-                            'medication1': rec_med['medication'],
-                            'medication2': current_med,
-                            'severity': 'moderate',  # In real implementation, this would be more sophisticated
-                            'description': f'Potential interaction between {rec_med["medication"]} and {current_med}'
-                        })
-        
-        return interactions
+        checker = DrugInteractionChecker(hospital_id)
+        return checker.check(
+            [rec_med['medication'] for rec_med in recommended_medications],
+            current_medications
+        )
     
     def _get_personalized_precautions(self, patient, predicted_conditions):
         """Generate personalized precautions based on patient profile"""
@@ -271,14 +186,6 @@ class AIDiagnosisService:
     
     def _estimate_follow_up_timeline(self, condition):
         """Estimate appropriate follow-up timeline for condition"""
-        timeline_mapping = {
-            'flu': '7-10 days',
-            'covid-19': '14 days',
-            'pneumonia': '2-4 weeks',
-            'heart attack': '1-2 weeks',
-            'migraine': '2-4 weeks',
-            'hypertension': '2-4 weeks',
-            'diabetes': '3 months'
-        }
+        timeline_mapping = self.knowledge_base.follow_up_timelines
         
         return timeline_mapping.get(condition, '2-4 weeks')
\ No newline at end of file
@@ -0,0 +1,288 @@
+"""
+Async provider layer for the health chatbot
+Per-call deadlines, a circuit breaker per provider and optional hedged requests
+Streaming replies go through the same breakers, with a deadline per chunk
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class AllProvidersFailed(Exception):
+    """No provider produced a reply before its deadline."""
+
+
+class CircuitBreaker:
+    """Stop calling a provider after repeated failures.
+
+    closed -> open after failure_threshold consecutive failures; once
+    reset_timeout seconds pass a single trial call is let through (half-open),
+    and its result closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+# Blocking SDK calls run here. Nothing ever waits for this pool to drain, so a
+# call that timed out or lost a hedge finishes in the background without
+# holding up the request that started it.
+_sdk_executor = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix='ai-provider')
+
+
+class ThreadedProvider:
+    """Run a blocking provider call (GROQ/Gemini SDK) in a worker thread.
+
+    On timeout the awaiting side gives up immediately; the SDK call itself
+    cannot be interrupted and finishes in the background. stream, if given,
+    returns an iterator of reply text chunks for ProviderRouter.stream_sync().
+    """
+
+    def __init__(self, name: str, call: Callable[[str, List[Dict]], Dict],
+                 stream: Callable[[str, List[Dict]], Iterator[str]] = None, executor=None):
+        self.name = name
+        self.call = call
+        self.stream = stream
+        self.executor = executor or _sdk_executor
+
+    async def complete(self, message: str, context: List[Dict]) -> Dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.call, message, context)
+
+
+class _BackgroundLoop:
+    """One event loop per process on a daemon thread, shared by all routers.
+
+    Synchronous callers submit coroutines with run_coroutine_threadsafe and
+    wait only for their result; the loop itself is never shut down per call.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='ai-provider-loop', daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+
+_background_loop = _BackgroundLoop()
+
+
+class StubProvider:
+    """Local provider with a fixed delay and reply, for exercising the router without API keys."""
+
+    def __init__(self, name: str, reply: str = 'stub reply', delay: float = 0.0, error: Exception = None):
+        self.name = name
+        self.reply = reply
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def complete(self, message: str, context: List[Dict]) -> Dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {'reply': self.reply, 'type': 'ai_response', 'provider': self.name}
+
+
+class ProviderRouter:
+    """Call providers in priority order and return whichever answers first.
+
+    Each call has a deadline of timeout seconds. If a provider fails, the next
+    one is started at once; with hedging enabled the next one is also started
+    when the current one has not answered by its observed p95 latency (or
+    hedge_delay until enough samples exist). Providers whose circuit is open
+    are skipped.
+    """
+
+    def __init__(self, providers: List, timeout: float = 15.0, hedge: bool = False,
+                 hedge_delay: float = 2.0, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 latency_samples: int = 100):
+        self.providers = providers
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.breakers = {
+            provider.name: CircuitBreaker(failure_threshold, reset_timeout) for provider in providers
+        }
+        self.latencies = {provider.name: deque(maxlen=latency_samples) for provider in providers}
+
+    def p95(self, name: str) -> Optional[float]:
+        samples = sorted(self.latencies[name])
+        if len(samples) < 20:
+            return None
+        return samples[int(len(samples) * 0.95) - 1]
+
+    def status(self) -> Dict:
+        return {
+            name: {
+                'circuit': breaker.state,
+                'consecutive_failures': breaker.failures,
+                'p95_seconds': self.p95(name)
+            }
+            for name, breaker in self.breakers.items()
+        }
+
+    async def _call(self, provider, message: str, context: List[Dict]) -> Dict:
+        started = time.monotonic()
+        breaker = self.breakers[provider.name]
+        try:
+            result = await asyncio.wait_for(provider.complete(message, context), self.timeout)
+        except asyncio.CancelledError:
+            # Lost a hedge race; neither a success nor a failure
+            breaker.trial_in_flight = False
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        self.latencies[provider.name].append(time.monotonic() - started)
+        return result
+
+    async def complete(self, message: str, context: List[Dict] = None, names: List[str] = None) -> Tuple[str, Dict]:
+        """Return (provider name, result) from the first provider to succeed"""
+        context = context or []
+        queue = [provider for provider in self.providers if names is None or provider.name in names]
+        pending = {}
+        errors = {}
+
+        def start_next():
+            while queue:
+                provider = queue.pop(0)
+                if self.breakers[provider.name].allow():
+                    task = asyncio.ensure_future(self._call(provider, message, context))
+                    pending[task] = provider
+                    return provider
+                errors[provider.name] = 'circuit open'
+            return None
+
+        try:
+            current = start_next()
+            while pending:
+                hedge_after = None
+                if self.hedge and queue:
+                    hedge_after = self.p95(current.name) or self.hedge_delay
+
+                done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Current provider is slower than its p95: hedge with the next one
+                    current = start_next() or current
+                    continue
+
+                failed = False
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return provider.name, task.result()
+                    errors[provider.name] = repr(task.exception())
+                    failed = True
+
+                if failed:
+                    # Fail over right away instead of waiting for the hedge delay
+                    current = start_next() or current
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise AllProvidersFailed(errors or {'router': 'no providers configured'})
+
+    def complete_sync(self, message: str, context: List[Dict] = None, names: List[str] = None) -> Tuple[str, Dict]:
+        """Run complete() from synchronous Flask views on the shared background loop"""
+        future = asyncio.run_coroutine_threadsafe(self.complete(message, context, names), _background_loop.get())
+        # Each provider is bounded by self.timeout; this only guards against a stuck loop
+        try:
+            return future.result(self.timeout * max(len(self.providers), 1) + 1.0)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise AllProvidersFailed({'router': f'no reply within {self.timeout}s per provider'})
+
+    def stream_sync(self, message: str, context: List[Dict] = None, names: List[str] = None) -> Iterator[Tuple[str, str]]:
+        """Yield (provider name, text chunk) from the first provider that starts streaming.
+
+        Providers are tried in priority order, skipping open circuits and
+        those without a stream. Every chunk, the first included, must arrive
+        within timeout seconds. A provider that fails before its first chunk
+        counts as a failure and the next one is tried; once chunks were
+        yielded a failure is recorded and raised, as part of the reply is out.
+        """
+        context = context or []
+        errors = {}
+        for provider in self.providers:
+            if names is not None and provider.name not in names:
+                continue
+            if getattr(provider, 'stream', None) is None:
+                errors[provider.name] = 'no streaming'
+                continue
+            breaker = self.breakers[provider.name]
+            if not breaker.allow():
+                errors[provider.name] = 'circuit open'
+                continue
+
+            chunks = provider.stream(message, context)
+            try:
+                chunk = provider.executor.submit(next, chunks, None).result(self.timeout)
+                if chunk is None:
+                    raise ValueError('empty reply')
+            except Exception as e:
+                breaker.record_failure()
+                errors[provider.name] = repr(e) if str(e) else f'no reply within {self.timeout}s'
+                continue
+
+            try:
+                while chunk is not None:
+                    yield provider.name, chunk
+                    chunk = provider.executor.submit(next, chunks, None).result(self.timeout)
+            except GeneratorExit:
+                # Client went away; neither a success nor a failure
+                breaker.trial_in_flight = False
+                raise
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            return
+
+        raise AllProvidersFailed(errors or {'router': 'no providers configured'})
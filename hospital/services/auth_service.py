@@ -0,0 +1,121 @@
+"""
+Authentication service
+bcrypt checks run on a dedicated thread pool with a cap on how many may be
+running or queued; past that cap a login gets an immediate 503 instead of
+joining the queue and holding another request worker; hashes with an outdated
+work factor are upgraded on the next successful login
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from hospital import db
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+AUTH_HASH_WORKERS = int(os.environ.get('AUTH_HASH_WORKERS', os.cpu_count() or 4))
+AUTH_MAX_PENDING = int(os.environ.get('AUTH_MAX_PENDING', AUTH_HASH_WORKERS * 8))
+
+
+class AuthBusy(Exception):
+    """Too many password checks are already queued; the caller should retry shortly."""
+
+
+def hash_password(password, rounds=None):
+    """bcrypt hash with the configured work factor"""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def hash_rounds(password_hash):
+    """Work factor stored in a bcrypt hash ('$2b$12$...' -> 12); None if not bcrypt"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """bcrypt on a bounded thread pool.
+
+    bcrypt releases the GIL, so `workers` checks really run in parallel.
+    At most `max_pending` checks may be running or queued. Once that many are
+    in flight, verify() raises AuthBusy at once rather than waiting for a
+    slot. An admitted caller still blocks its own request thread until its
+    check is done, so the cap also bounds how many request workers wait here.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=AUTH_HASH_WORKERS, max_pending=AUTH_MAX_PENDING):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self.slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise AuthBusy('Too many concurrent logins, please retry')
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future.result()
+
+    def verify(self, password, password_hash):
+        if not password or not password_hash:
+            return False
+        return self._run(self._checkpw, password, password_hash)
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.rounds)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds
+
+    @staticmethod
+    def _checkpw(password, password_hash):
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        except ValueError:
+            # Not a bcrypt hash (e.g. legacy werkzeug hash)
+            return False
+
+
+class AuthService:
+    """Password checks for login routes"""
+
+    def __init__(self, hasher=None):
+        self.hasher = hasher or get_password_hasher()
+
+    def authenticate(self, user, password):
+        """True if password matches; upgrades the stored hash when the work factor changed.
+
+        Raises AuthBusy when the hashing pool is saturated.
+        """
+        if not user or not self.hasher.verify(password, user.password_hash):
+            return False
+
+        if self.hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = self.hasher.hash(password)
+                db.session.commit()
+            except Exception:
+                # The login itself succeeded; retry the upgrade next time
+                db.session.rollback()
+        return True
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """Process-wide PasswordHasher shared by every request thread"""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
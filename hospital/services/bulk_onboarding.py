@@ -0,0 +1,241 @@
+"""
+Bulk onboarding of hospital chains
+Loads hospitals with their admin, subscription, staff, doctors, patients and
+medicines from one bundle using batched inserts and one transaction per hospital
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from hospital import db
+from hospital.models import Hospital, User, Doctor, Patient, Medicine
+from hospital.models.hospital_subscription import HospitalSubscription
+from hospital.services.auth_service import hash_password
+from hospital.services.usage_counters import reconcile
+from hospital.utils.allocators import EmailAllocator, allocate_unique_ids, hospital_email_domain
+
+DEFAULT_PASSWORD = '123'
+
+# Same defaults as the trial created by hospital registration
+DEFAULT_SUBSCRIPTION = {
+    'plan_name': 'trial',
+    'max_patients': 50,
+    'max_doctors': 3,
+    'max_staff': 5,
+    'features': ['basic_management', 'appointments', 'medical_records'],
+    'monthly_fee': 0.0,
+    'days': 30
+}
+
+MEDICINE_FIELDS = [
+    'name', 'generic_name', 'brand_name', 'manufacturer', 'category', 'therapeutic_class',
+    'composition', 'strength', 'dosage_form', 'batch_number', 'quantity_in_stock',
+    'unit_of_measurement', 'reorder_level', 'max_stock_level', 'cost_price', 'selling_price',
+    'mrp', 'discount_percentage', 'storage_location', 'storage_temperature',
+    'drug_license_number', 'schedule', 'prescription_required'
+]
+
+
+def _parse_date(value):
+    if not value or isinstance(value, date):
+        return value or None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class BulkOnboardingService:
+    """Load a bundle of hospitals in one pass.
+
+    Bundle format::
+
+        {"hospitals": [{"name": ..., "address": ..., "phone": ..., "email": ...,
+                        "admin": {"first_name", "last_name", "email", "password"},
+                        "subscription": {...}, "staff": [...], "doctors": [...],
+                        "patients": [...], "medicines": [...]}]}
+
+    Password hashing runs in a thread pool (bcrypt releases the GIL), rows are
+    written with bulk_insert_mappings, and each hospital is committed on its
+    own so one bad site does not roll back the whole chain.
+    """
+
+    def __init__(self, hash_workers=8):
+        self.hash_workers = hash_workers
+
+    def hash_passwords(self, passwords):
+        """bcrypt-hash a list of passwords in parallel, preserving order"""
+        if not passwords:
+            return []
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+            return list(executor.map(hash_password, passwords))
+
+    def load(self, bundle):
+        """Onboard every hospital in the bundle and return a throughput report"""
+        started = time.perf_counter()
+        results = []
+        totals = {'hospitals': 0, 'users': 0, 'doctors': 0, 'patients': 0, 'medicines': 0}
+
+        for hospital_data in bundle.get('hospitals', []):
+            hospital_started = time.perf_counter()
+            try:
+                counts = self._load_hospital(hospital_data)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                results.append({
+                    'name': hospital_data.get('name'),
+                    'success': False,
+                    'error': str(e)
+                })
+                continue
+
+            for key, value in counts.items():
+                if key in totals:
+                    totals[key] += value
+            totals['hospitals'] += 1
+            results.append({
+                'name': hospital_data.get('name'),
+                'success': True,
+                'counts': counts,
+                'seconds': round(time.perf_counter() - hospital_started, 3)
+            })
+
+        elapsed = time.perf_counter() - started
+        total_rows = sum(totals.values())
+        return {
+            'hospitals': results,
+            'totals': totals,
+            'failed_hospitals': sum(1 for result in results if not result['success']),
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(total_rows / elapsed, 1) if elapsed > 0 else None
+        }
+
+    def _load_hospital(self, data):
+        for field in ['name', 'admin']:
+            if not data.get(field):
+                raise ValueError(f'{field} is required for every hospital')
+
+        hospital = Hospital(
+            name=data['name'],
+            address=data.get('address'),
+            phone=data.get('phone'),
+            email=data.get('email', data['admin'].get('email')),
+            license_number=data.get('license_number')
+        )
+        db.session.add(hospital)
+        db.session.flush()  # Get hospital ID
+
+        subscription_data = {**DEFAULT_SUBSCRIPTION, **data.get('subscription', {})}
+        db.session.add(HospitalSubscription(
+            hospital_id=hospital.id,
+            plan_name=subscription_data['plan_name'],
+            max_patients=subscription_data['max_patients'],
+            max_doctors=subscription_data['max_doctors'],
+            max_staff=subscription_data['max_staff'],
+            features=subscription_data['features'],
+            subscription_start=date.today(),
+            subscription_end=date.today() + timedelta(days=subscription_data['days']),
+            monthly_fee=subscription_data['monthly_fee']
+        ))
+
+        staff_allocator = EmailAllocator(hospital_email_domain(hospital))
+        patient_allocator = EmailAllocator('patient')
+
+        # Everyone with a login: admin, staff, doctors, patients
+        people = [dict(data['admin'], role='admin')]
+        people += [dict(member, role=member.get('role', 'nurse')) for member in data.get('staff', [])]
+        people += [dict(doctor, role='doctor') for doctor in data.get('doctors', [])]
+        people += [dict(patient, role='patient') for patient in data.get('patients', [])]
+
+        for person in people:
+            if not person.get('first_name') or not person.get('last_name'):
+                raise ValueError(f'first_name and last_name are required ({person.get("role")})')
+            # Explicit addresses are reserved before any are generated, wherever they appear in the bundle
+            if person.get('email'):
+                staff_allocator.reserve(person['email'])
+                patient_allocator.reserve(person['email'])
+
+        for person in people:
+            if not person.get('email'):
+                local_part = f"{person['first_name'].lower()}.{person['last_name'].lower()}".replace(' ', '')
+                allocator = patient_allocator if person['role'] == 'patient' else staff_allocator
+                person['email'] = allocator.allocate(local_part)
+
+        password_hashes = self.hash_passwords([person.get('password') or DEFAULT_PASSWORD for person in people])
+
+        db.session.bulk_insert_mappings(User, [
+            {
+                'email': person['email'],
+                'password_hash': password_hash,
+                'first_name': person['first_name'],
+                'last_name': person['last_name'],
+                'phone': person.get('phone'),
+                'role': person['role'],
+                'is_active': True,
+                'hospital_id': hospital.id
+            }
+            for person, password_hash in zip(people, password_hashes)
+        ])
+
+        # Resolve the new user IDs in one query
+        user_ids = dict(db.session.query(User.email, User.id).filter(
+            User.hospital_id == hospital.id
+        ).all())
+
+        doctors = [person for person in people if person['role'] == 'doctor']
+        doctor_ids = allocate_unique_ids(Doctor.doctor_id, 'DOC', len(doctors))
+        license_numbers = allocate_unique_ids(Doctor.license_number, 'LIC', len(doctors))
+        db.session.bulk_insert_mappings(Doctor, [
+            {
+                'doctor_id': doctor_id,
+                'user_id': user_ids[doctor['email']],
+                'specialization': doctor.get('specialization', 'General Medicine'),
+                'qualification': doctor.get('qualification', ''),
+                'experience_years': doctor.get('experience_years', 0),
+                'license_number': doctor.get('license_number') or license_number,
+                'consultation_fee': doctor.get('consultation_fee', 0.0),
+                'is_available': True,
+                'hospital_id': hospital.id
+            }
+            for doctor, doctor_id, license_number in zip(doctors, doctor_ids, license_numbers)
+        ])
+
+        patients = [person for person in people if person['role'] == 'patient']
+        patient_ids = allocate_unique_ids(Patient.patient_id, 'PAT', len(patients))
+        db.session.bulk_insert_mappings(Patient, [
+            {
+                'user_id': user_ids[patient['email']],
+                'patient_id': patient_id,
+                'date_of_birth': _parse_date(patient.get('date_of_birth')),
+                'gender': patient.get('gender'),
+                'blood_group': patient.get('blood_group'),
+                'address': patient.get('address'),
+                'emergency_contact_name': patient.get('emergency_contact_name'),
+                'emergency_contact_phone': patient.get('emergency_contact_phone'),
+                'medical_history': patient.get('medical_history'),
+                'allergies': patient.get('allergies'),
+                'hospital_id': hospital.id
+            }
+            for patient, patient_id in zip(patients, patient_ids)
+        ])
+
+        medicines = data.get('medicines', [])
+        db.session.bulk_insert_mappings(Medicine, [
+            dict(
+                {field: medicine[field] for field in MEDICINE_FIELDS if field in medicine},
+                hospital_id=hospital.id,
+                is_active=True,
+                manufacturing_date=_parse_date(medicine.get('manufacturing_date')),
+                expiry_date=_parse_date(medicine.get('expiry_date'))
+            )
+            for medicine in medicines
+        ])
+
+        # bulk_insert_mappings skips the flush hooks, so count the new hospital once
+        reconcile(hospital.id)
+
+        return {
+            'hospital_id': hospital.id,
+            'users': len(people),
+            'doctors': len(doctors),
+            'patients': len(patients),
+            'medicines': len(medicines)
+        }
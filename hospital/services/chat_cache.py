@@ -0,0 +1,159 @@
+"""
+Response cache for the health chatbot
+Exact matches on the normalized message, optional TF-IDF near-duplicate matches
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return ' '.join(TOKEN_PATTERN.findall(message.lower()))
+
+
+def context_hash(context: List[Dict], turns: int = 6) -> str:
+    """Short hash of the conversation turns the provider would see"""
+    recent = [
+        [turn.get('role'), normalize_message(turn.get('message', ''))]
+        for turn in (context or [])[-turns:]
+    ]
+    return hashlib.blake2b(json.dumps(recent).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ChatResponseCache:
+    """LRU + TTL cache of chatbot replies keyed by (context hash, normalized message).
+
+    With similarity_threshold > 0 a miss on the exact key falls back to a
+    TF-IDF cosine search over cached messages with the same context, using an
+    inverted index so only entries sharing a word are scored.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 3600, similarity_threshold: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # key -> (response, expires_at, token counts)
+        self._postings = defaultdict(set)  # token -> keys containing it
+        self._document_frequency = Counter()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, message: str, context: List[Dict] = None) -> Optional[Dict]:
+        """Return a cached response for the message, or None"""
+        normalized = normalize_message(message)
+        key = (context_hash(context), normalized)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] <= now:
+                self._remove(key)
+                self.stats['expired'] += 1
+                entry = None
+
+            if entry:
+                self._entries.move_to_end(key)
+                self.stats['exact_hits'] += 1
+                return entry[0]
+
+            if self.similarity_threshold > 0:
+                similar_key = self._find_similar(key[0], normalized, now)
+                if similar_key:
+                    self._entries.move_to_end(similar_key)
+                    self.stats['similar_hits'] += 1
+                    return self._entries[similar_key][0]
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, message: str, context: List[Dict], response: Dict):
+        """Cache a response, evicting the least recently used entries past max_entries"""
+        normalized = normalize_message(message)
+        if not normalized:
+            return
+        key = (context_hash(context), normalized)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            tokens = Counter(normalized.split())
+            self._entries[key] = (response, time.time() + self.ttl_seconds, tokens)
+            for token in tokens:
+                self._postings[token].add(key)
+                self._document_frequency[token] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._document_frequency.clear()
+
+    def metrics(self) -> Dict:
+        """Hit/miss counters and hit rate since startup"""
+        hits = self.stats['exact_hits'] + self.stats['similar_hits']
+        lookups = hits + self.stats['misses']
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'similarity_threshold': self.similarity_threshold,
+            'exact_hits': self.stats['exact_hits'],
+            'similar_hits': self.stats['similar_hits'],
+            'misses': self.stats['misses'],
+            'evictions': self.stats['evictions'],
+            'expired': self.stats['expired'],
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _remove(self, key):
+        _, _, tokens = self._entries.pop(key)
+        for token in tokens:
+            self._postings[token].discard(key)
+            if not self._postings[token]:
+                del self._postings[token]
+            self._document_frequency[token] -= 1
+            if self._document_frequency[token] <= 0:
+                del self._document_frequency[token]
+
+    def _weights(self, tokens: Counter) -> Dict[str, float]:
+        total = len(self._entries)
+        weights = {
+            token: count * (math.log((1 + total) / (1 + self._document_frequency.get(token, 0))) + 1)
+            for token, count in tokens.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {token: weight / norm for token, weight in weights.items()}
+
+    def _find_similar(self, context_key: str, normalized: str, now: float):
+        tokens = Counter(normalized.split())
+        if not tokens:
+            return None
+
+        candidates = set()
+        for token in tokens:
+            candidates.update(self._postings.get(token, ()))
+
+        query = self._weights(tokens)
+        best_key, best_score = None, self.similarity_threshold
+        for key in candidates:
+            response, expires_at, candidate_tokens = self._entries[key]
+            if key[0] != context_key or expires_at <= now:
+                continue
+            candidate = self._weights(candidate_tokens)
+            score = sum(weight * candidate.get(token, 0.0) for token, weight in query.items())
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
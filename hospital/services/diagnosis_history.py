@@ -0,0 +1,182 @@
+"""
+AI diagnosis history
+Stores symptom-checker results compactly, pages through them with keyset
+cursors and keeps per-day predicted-condition counts up to date as results
+are saved, so "most common conditions this week" never scans the history
+"""
+
+import base64
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only
+from hospital import db
+from hospital.models.ai_diagnosis import AIDiagnosis, AIDiagnosisConditionCount
+from hospital.models.doctor import Doctor
+from hospital.models.patient import Patient
+from hospital.models.user import User
+
+MODEL_VERSION = 'v1.0'
+MAX_STORED_CONDITIONS = 5
+
+
+class InvalidCursor(ValueError):
+    """Cursor string that was not produced by encode_cursor()"""
+
+
+def _load_options(fields):
+    """Loader options for a page returning `fields` (all when None)"""
+    if fields is None:
+        return [
+            joinedload(AIDiagnosis.patient).joinedload(Patient.user),
+            joinedload(AIDiagnosis.doctor).joinedload(Doctor.user)
+        ]
+
+    columns = {'id', 'created_at'}  # The keyset cursor needs both
+    columns.update(field for field in fields if field in AIDiagnosis.__table__.columns)
+    options = []
+    for field, relationship in AIDiagnosis.PROFILE_FIELDS.items():
+        if field in fields:
+            profile = getattr(AIDiagnosis, relationship)
+            profile_model = profile.property.mapper.class_
+            columns.add(f'{relationship}_id')
+            options.append(
+                joinedload(profile).load_only(profile_model.user_id)
+                .joinedload(profile_model.user).load_only(User.first_name, User.last_name)
+            )
+    options.append(load_only(*(getattr(AIDiagnosis, column) for column in sorted(columns))))
+    return options
+
+
+def encode_cursor(diagnosis):
+    raw = f"{diagnosis.created_at.isoformat()}|{diagnosis.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, diagnosis_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(diagnosis_id)
+    except Exception:
+        raise InvalidCursor('Invalid cursor')
+
+
+def compact_analysis(analysis):
+    """Keep only what cannot be re-derived: condition names with confidences, deduped lists"""
+    conditions = [
+        {'condition': item['condition'], 'confidence': round(float(item.get('confidence', 0)), 2)}
+        for item in (analysis.get('predicted_conditions') or [])[:MAX_STORED_CONDITIONS]
+    ]
+    return {
+        'predicted_conditions': conditions,
+        'recommended_tests': list(dict.fromkeys(analysis.get('recommended_tests') or [])),
+        'recommended_specialists': list(dict.fromkeys(analysis.get('recommended_specialists') or []))
+    }
+
+
+class DiagnosisHistory:
+    """Diagnosis history of one hospital"""
+
+    def __init__(self, hospital_id):
+        self.hospital_id = hospital_id
+
+    def record(self, symptoms, analysis, patient_id=None, doctor_id=None, input_data=None):
+        """Save one symptom-checker result and bump today's condition counts (one commit)"""
+        compact = compact_analysis(analysis)
+        input_data = {key: value for key, value in (input_data or {}).items() if value not in (None, '', [], {})}
+        if analysis.get('matched_symptoms'):
+            input_data['matched_symptoms'] = analysis['matched_symptoms']
+
+        diagnosis = AIDiagnosis(
+            hospital_id=self.hospital_id,
+            patient_id=patient_id,
+            doctor_id=doctor_id,
+            symptoms=symptoms,
+            predicted_conditions=compact['predicted_conditions'],
+            risk_assessment=analysis.get('risk_level'),
+            recommended_tests=compact['recommended_tests'],
+            recommended_specialists=compact['recommended_specialists'],
+            ai_confidence_score=analysis.get('confidence_score'),
+            model_version=MODEL_VERSION,
+            input_data=input_data or None
+        )
+        db.session.add(diagnosis)
+
+        conditions = {item['condition'] for item in compact['predicted_conditions']}
+        self._increment_counts(date.today(), conditions)
+        db.session.commit()
+        return diagnosis
+
+    def _increment_counts(self, day, conditions, amount=1):
+        for condition in conditions:
+            bumped = AIDiagnosisConditionCount.query.filter_by(
+                hospital_id=self.hospital_id, day=day, condition=condition
+            ).update({'count': AIDiagnosisConditionCount.count + amount}, synchronize_session=False)
+            if bumped:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(AIDiagnosisConditionCount(
+                        hospital_id=self.hospital_id, day=day, condition=condition, count=amount
+                    ))
+            except IntegrityError:
+                # Another request created today's row first
+                AIDiagnosisConditionCount.query.filter_by(
+                    hospital_id=self.hospital_id, day=day, condition=condition
+                ).update({'count': AIDiagnosisConditionCount.count + amount}, synchronize_session=False)
+
+    def page(self, patient_id=None, cursor=None, limit=50, fields=None):
+        """Newest diagnoses first; returns (diagnoses, next_cursor or None).
+
+        fields: the to_dict() fields the caller returns; only their columns and joins are loaded.
+        """
+        query = AIDiagnosis.query.filter(AIDiagnosis.hospital_id == self.hospital_id).options(
+            *_load_options(fields)
+        )
+        if patient_id is not None:
+            query = query.filter(AIDiagnosis.patient_id == patient_id)
+        if cursor:
+            created_at, diagnosis_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                AIDiagnosis.created_at < created_at,
+                and_(AIDiagnosis.created_at == created_at, AIDiagnosis.id < diagnosis_id)
+            ))
+
+        rows = query.order_by(AIDiagnosis.created_at.desc(), AIDiagnosis.id.desc()).limit(limit + 1).all()
+        next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def top_conditions(self, days=7, limit=10):
+        """Most common predicted conditions over the last `days` days, from the daily counters"""
+        since = date.today() - timedelta(days=days - 1)
+        total = func.sum(AIDiagnosisConditionCount.count)
+        rows = db.session.query(AIDiagnosisConditionCount.condition, total).filter(
+            AIDiagnosisConditionCount.hospital_id == self.hospital_id,
+            AIDiagnosisConditionCount.day >= since
+        ).group_by(AIDiagnosisConditionCount.condition).order_by(total.desc()).limit(limit).all()
+        return [{'condition': condition, 'count': int(count)} for condition, count in rows]
+
+    def rebuild_counts(self, days=7):
+        """Recount the daily counters from the stored diagnoses (backfill / repair)"""
+        since = date.today() - timedelta(days=days - 1)
+        AIDiagnosisConditionCount.query.filter(
+            AIDiagnosisConditionCount.hospital_id == self.hospital_id,
+            AIDiagnosisConditionCount.day >= since
+        ).delete(synchronize_session=False)
+
+        counts = {}
+        rows = db.session.query(AIDiagnosis.created_at, AIDiagnosis.predicted_conditions).filter(
+            AIDiagnosis.hospital_id == self.hospital_id,
+            AIDiagnosis.created_at >= datetime.combine(since, datetime.min.time())
+        ).yield_per(1000)
+        for created_at, predicted_conditions in rows:
+            for condition in {item['condition'] for item in predicted_conditions or []}:
+                key = (created_at.date(), condition)
+                counts[key] = counts.get(key, 0) + 1
+
+        db.session.bulk_insert_mappings(AIDiagnosisConditionCount, [
+            {'hospital_id': self.hospital_id, 'day': day, 'condition': condition, 'count': count}
+            for (day, condition), count in counts.items()
+        ])
+        db.session.commit()
+        return len(counts)
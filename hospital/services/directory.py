@@ -0,0 +1,197 @@
+"""
+Public hospital directory
+Active hospitals (with doctor counts) and available doctors (with
+specialization, fee and hospital) for the patient portal, built with three
+queries into an in-memory snapshot. Commits that touch hospitals, doctors or
+doctor users drop the snapshot and the next request rebuilds it; other
+workers pick changes up within DIRECTORY_CACHE_TTL seconds.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from hospital import db
+from hospital.models.hospital import Hospital
+from hospital.models.user import User
+from hospital.models.doctor import Doctor
+
+DIRECTORY_CACHE_TTL = float(os.environ.get('DIRECTORY_CACHE_TTL', 300))
+
+# Placeholder values the patient portal displays until these are real data
+HOSPITAL_RATING = 4.5
+HOSPITAL_SPECIALIZATIONS = ['General Medicine', 'Cardiology', 'Neurology']
+AVAILABLE_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+AVAILABLE_TIMES = ['09:00', '10:00', '11:00', '14:00', '15:00', '16:00']
+
+DOCTOR_USER_FIELDS = {'first_name', 'last_name', 'email', 'phone', 'is_active', 'hospital_id', 'role'}
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+class DirectorySnapshot:
+    """Immutable lists of plain dicts plus lookup indexes and a content version"""
+
+    def __init__(self, hospitals, doctors):
+        self.hospitals = hospitals
+        self.hospitals_by_id = {hospital['id']: hospital for hospital in hospitals}
+        self.doctors = doctors
+        self.doctors_by_hospital = {}
+        for doctor in doctors:
+            self.doctors_by_hospital.setdefault(doctor['hospital_id'], []).append(doctor)
+        self.version = hashlib.sha1(
+            json.dumps([hospitals, doctors], sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        self.built_at = datetime.utcnow()
+
+    @classmethod
+    def build(cls):
+        visible = (Hospital.is_active == True, ~Hospital.name.like('%[DELETED]%'))
+
+        doctor_counts = dict(db.session.query(User.hospital_id, func.count(User.id)).filter(
+            User.role == 'doctor',
+            User.is_active == True
+        ).group_by(User.hospital_id).all())
+
+        hospitals = []
+        for row in db.session.query(
+            Hospital.id, Hospital.name, Hospital.address, Hospital.phone, Hospital.email,
+            Hospital.license_number, Hospital.is_active, Hospital.created_at
+        ).filter(*visible).order_by(Hospital.id).all():
+            hospitals.append({
+                'id': row.id,
+                'name': row.name,
+                'address': row.address,
+                'phone': row.phone,
+                'email': row.email,
+                'license_number': row.license_number,
+                'is_active': row.is_active,
+                'created_at': _iso(row.created_at),
+                'total_doctors': doctor_counts.get(row.id, 0),
+                'rating': HOSPITAL_RATING,
+                'specializations': HOSPITAL_SPECIALIZATIONS
+            })
+
+        doctors = []
+        for row in db.session.query(
+            Doctor.id, Doctor.doctor_id, Doctor.user_id, Doctor.specialization, Doctor.qualification,
+            Doctor.experience_years, Doctor.license_number, Doctor.available_hours, Doctor.is_available,
+            Doctor.total_patients, Doctor.created_at, Doctor.hospital_id,
+            User.first_name, User.last_name, User.email, User.phone, Hospital.name.label('hospital_name')
+        ).join(User, Doctor.user_id == User.id).join(Hospital, Doctor.hospital_id == Hospital.id).filter(
+            User.is_active == True,
+            Doctor.is_available == True,
+            *visible
+        ).order_by(Doctor.id).all():
+            experience = row.experience_years or 0
+            name = f"{row.first_name} {row.last_name}"
+            doctors.append({
+                'id': row.id,
+                'doctor_id': row.doctor_id,
+                'user_id': row.user_id,
+                'full_name': name,
+                'name': name,
+                'email': row.email,
+                'phone': row.phone,
+                'specialization': row.specialization,
+                'qualification': row.qualification,
+                'experience_years': row.experience_years,
+                'license_number': row.license_number,
+                'consultation_fee': 150 + (experience * 10),  # Fee based on experience
+                'available_days': AVAILABLE_DAYS,
+                'available_times': AVAILABLE_TIMES,
+                'available_hours': row.available_hours,
+                'is_available': row.is_available,
+                'rating': min(5.0, 4.0 + (experience * 0.05)),  # Rating based on experience
+                'total_patients': row.total_patients,
+                'created_at': _iso(row.created_at),
+                'hospital_id': row.hospital_id,
+                'hospital_name': row.hospital_name
+            })
+
+        return cls(hospitals, doctors)
+
+
+class DirectoryCache:
+    """Holds the current snapshot; rebuilt by one request at a time after invalidation or expiry"""
+
+    def __init__(self, ttl=DIRECTORY_CACHE_TTL):
+        self.ttl = ttl
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is not None and self._expires_at > time.monotonic():
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._expires_at <= time.monotonic():
+                self._snapshot = DirectorySnapshot.build()
+                self._expires_at = time.monotonic() + self.ttl
+                self.rebuilds += 1
+            return self._snapshot
+
+    def invalidate(self):
+        self._expires_at = 0.0
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot else None,
+            'built_at': _iso(snapshot.built_at) if snapshot else None,
+            'hospitals': len(snapshot.hospitals) if snapshot else 0,
+            'doctors': len(snapshot.doctors) if snapshot else 0,
+            'rebuilds': self.rebuilds,
+            'ttl_seconds': self.ttl
+        }
+
+
+directory_cache = DirectoryCache()
+
+
+def get_directory():
+    return directory_cache.get()
+
+
+def _affects_directory(obj, deleted=False):
+    if isinstance(obj, (Hospital, Doctor)):
+        return True
+    if isinstance(obj, User):
+        state = inspect(obj)
+        was_doctor = obj.role == 'doctor' or 'doctor' in state.attrs.role.history.deleted
+        if not was_doctor:
+            return False
+        if deleted or state.pending:
+            return True
+        return any(state.attrs[name].history.has_changes() for name in DOCTOR_USER_FIELDS)
+    return False
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_directory_changes(session, flush_context, instances):
+    if session.info.get('directory_changed'):
+        return
+    if any(_affects_directory(obj) for obj in session.new) \
+            or any(_affects_directory(obj) for obj in session.dirty if session.is_modified(obj)) \
+            or any(_affects_directory(obj, deleted=True) for obj in session.deleted):
+        session.info['directory_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_directory(session):
+    if session.info.pop('directory_changed', False):
+        directory_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_directory_changes(session):
+    session.info.pop('directory_changed', None)
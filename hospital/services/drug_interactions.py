@@ -0,0 +1,170 @@
+"""
+Drug interaction checker
+Resolves prescribed names (brand, generic or catalog names) to active
+ingredients through a per-hospital alias index built from the Medicine catalog,
+then checks them against the knowledge base's symmetric interaction graph
+"""
+
+import re
+import threading
+from sqlalchemy import func
+from hospital import db
+from hospital.models.medicine import Medicine
+from hospital.models.prescription import Prescription
+from hospital.services.knowledge_base import get_knowledge_base
+
+STRENGTH_PATTERN = re.compile(r'\b\d+(\.\d+)?\s*(mg|mcg|g|ml|iu|%)\b|\b\d+(\.\d+)?\b')
+SEPARATOR_PATTERN = re.compile(r'[^a-z]+')
+INGREDIENT_SPLIT_PATTERN = re.compile(r'\+|,|/|\band\b')
+
+
+def normalize_drug_name(name):
+    """'Crocin 500mg Tablet' -> 'crocin tablet'; 'ACE_Inhibitors' -> 'ace inhibitors'"""
+    text = STRENGTH_PATTERN.sub(' ', (name or '').lower())
+    return ' '.join(SEPARATOR_PATTERN.sub(' ', text).split())
+
+
+def _ingredients(composition):
+    """'Paracetamol 500mg + Caffeine 30mg' -> {'paracetamol', 'caffeine'}"""
+    parts = INGREDIENT_SPLIT_PATTERN.split((composition or '').lower())
+    return {normalize_drug_name(part) for part in parts if normalize_drug_name(part)}
+
+
+class _InteractionIndex:
+    """Immutable alias index and interaction graph for one hospital catalog snapshot"""
+
+    def __init__(self, knowledge_base, catalog_rows):
+        # Interaction graph with normalized names, e.g. 'ace_inhibitors' -> 'ace inhibitors'
+        graph = {}
+        for drug, others in knowledge_base.interactions.items():
+            graph.setdefault(normalize_drug_name(drug), set()).update(normalize_drug_name(other) for other in others)
+        self.graph = {drug: frozenset(others) for drug, others in graph.items()}
+
+        # Every known ingredient resolves to itself
+        aliases = {drug: {drug} for drug in self.graph}
+        for name, generic_name, brand_name, composition in catalog_rows:
+            ingredients = _ingredients(composition) or _ingredients(generic_name) or {normalize_drug_name(name)}
+            ingredients.discard('')
+            if not ingredients:
+                continue
+            for alias in (name, generic_name, brand_name):
+                key = normalize_drug_name(alias)
+                if key:
+                    aliases.setdefault(key, set()).update(ingredients)
+        self.aliases = {alias: frozenset(ingredients) for alias, ingredients in aliases.items()}
+
+    def resolve(self, name):
+        """Active ingredients for a drug name; unknown names resolve to themselves"""
+        key = normalize_drug_name(name)
+        if key in self.aliases:
+            return self.aliases[key]
+        # 'Crocin 500 Tablet' -> try the leading word(s) that name the product
+        words = key.split()
+        for length in range(len(words) - 1, 0, -1):
+            prefix = ' '.join(words[:length])
+            if prefix in self.aliases:
+                return self.aliases[prefix]
+        return frozenset([key]) if key else frozenset()
+
+
+class DrugInteractionChecker:
+    """Check prescriptions against each other and a patient's active medications.
+
+    Indexes are cached per hospital and rebuilt only when the Medicine catalog
+    (row count / last update) or the knowledge base snapshot changes.
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, hospital_id=None):
+        self.hospital_id = hospital_id
+        self.index = self._load_index()
+
+    def _load_index(self):
+        knowledge_base = get_knowledge_base()
+        if self.hospital_id is None:
+            fingerprint = (knowledge_base.checksum, 0, None)
+        else:
+            count, last_update = db.session.query(func.count(Medicine.id), func.max(Medicine.updated_at)).filter(
+                Medicine.hospital_id == self.hospital_id
+            ).one()
+            fingerprint = (knowledge_base.checksum, count, last_update)
+
+        cached = self._cache.get(self.hospital_id)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        catalog_rows = []
+        if self.hospital_id is not None:
+            catalog_rows = db.session.query(
+                Medicine.name, Medicine.generic_name, Medicine.brand_name, Medicine.composition
+            ).filter(Medicine.hospital_id == self.hospital_id, Medicine.is_active == True).all()
+
+        index = _InteractionIndex(knowledge_base, catalog_rows)
+        with self._lock:
+            self._cache[self.hospital_id] = (fingerprint, index)
+        return index
+
+    def check(self, prescribed, current=()):
+        """Interactions among prescribed drugs and between prescribed and current drugs.
+
+        prescribed/current: drug names (brand, generic or catalog names)
+        """
+        resolved_prescribed = {name: self.index.resolve(name) for name in prescribed if name}
+        resolved_current = {name: self.index.resolve(name) for name in current if name}
+
+        # ingredient -> names it came from, for both sides together
+        owners = {}
+        for name, ingredients in list(resolved_prescribed.items()) + list(resolved_current.items()):
+            for ingredient in ingredients:
+                owners.setdefault(ingredient, set()).add(name)
+        all_ingredients = frozenset(owners)
+
+        interactions = []
+        seen = set()
+        for name, ingredients in resolved_prescribed.items():
+            for ingredient in ingredients:
+                for other_ingredient in self.index.graph.get(ingredient, frozenset()) & all_ingredients:
+                    for other_name in owners[other_ingredient]:
+                        pair = frozenset([(name, ingredient), (other_name, other_ingredient)])
+                        if other_name == name or pair in seen:
+                            continue
+                        seen.add(pair)
+                        interactions.append({
+                            'medication1': name,
+                            'medication2': other_name,
+                            'ingredient1': ingredient,
+                            'ingredient2': other_ingredient,
+                            'with_current_medication': other_name in resolved_current,
+                            'severity': 'moderate',
+                            'description': f'Potential interaction between {name} ({ingredient}) and {other_name} ({other_ingredient})'
+                        })
+
+        return interactions
+
+    def check_for_patient(self, prescribed, patient_id=None, current=()):
+        """check() against the given current drugs plus the patient's active prescriptions"""
+        return self.check(prescribed, list(current) + active_medications(patient_id, self.hospital_id))
+
+
+def active_medications(patient_id, hospital_id=None):
+    """Drug names on a patient's active prescriptions"""
+    if not patient_id or not hasattr(Prescription, 'patient_id'):
+        # Prescription.patient_id is disabled in this schema
+        return []
+
+    query = db.session.query(Prescription.medications).filter(
+        Prescription.patient_id == patient_id,
+        Prescription.status == 'active'
+    )
+    if hospital_id is not None:
+        query = query.filter(Prescription.hospital_id == hospital_id)
+
+    names = []
+    for (medications,) in query.all():
+        for medication in medications or []:
+            name = medication.get('name') if isinstance(medication, dict) else medication
+            if name:
+                names.append(name)
+    return names
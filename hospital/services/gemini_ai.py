@@ -4,7 +4,10 @@ Supports both Gemini and GROQ with automatic fallback
 """
 
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional
 
 # Try to import both AI libraries
 try:
@@ -21,6 +24,23 @@ except ImportError:
     GROQ_AVAILABLE = False
     Groq = None
 
+from hospital.services.ai_providers import AllProvidersFailed, ProviderRouter, ThreadedProvider
+from hospital.services.chat_cache import ChatResponseCache
+from hospital.utils.keyword_matcher import keyword_matcher
+
+EMERGENCY_KEYWORDS = [
+    'chest pain', 'heart attack', 'can\'t breathe', 'cannot breathe',
+    'difficulty breathing', 'severe bleeding', 'unconscious',
+    'stroke', 'seizure', 'overdose', 'suicide', 'kill myself'
+]
+
+keyword_matcher.register('emergency', EMERGENCY_KEYWORDS)
+keyword_matcher.register('topic_pain', ['pain', 'ache', 'hurt'])
+keyword_matcher.register('topic_fever', ['fever', 'temperature', 'hot'])
+keyword_matcher.register('topic_appointment', ['appointment', 'doctor', 'visit'])
+
+DEFAULT_PROBE_INTERVAL = int(os.environ.get('AI_HEALTH_CHECK_INTERVAL', 300))
+
 
 class MultiAIHealthChatbot:
     """AI-powered health chatbot supporting multiple AI providers."""
@@ -43,6 +63,12 @@ IMPORTANT RULES:
 
 Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patients communicate better with their healthcare providers."""
 
+    PROVIDER_ORDER = ['groq', 'gemini']  # GROQ first (more reliable)
+    MODELS = {
+        'groq': 'llama-3.3-70b-versatile',
+        'gemini': 'gemini-2.0-flash-exp'
+    }
+    
     def __init__(self):
         self.gemini_key = os.environ.get('GEMINI_API_KEY')
         self.groq_key = os.environ.get('GROQ_API_KEY')
@@ -52,41 +78,122 @@ Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patient
         self.active_provider = None
         self.init_error = None
         
+        # Provider health: None = not probed yet, True/False = last probe result
+        self.provider_health = {}
+        self.last_probe_at = None
+        self._probe_thread = None
+        self._probe_lock = threading.Lock()
+        
+        # Replies to repeated questions are served from cache; AI_CACHE_SIMILARITY > 0 enables near-duplicate matching
+        self.cache = ChatResponseCache(
+            max_entries=int(os.environ.get('AI_CACHE_MAX_ENTRIES', 1000)),
+            ttl_seconds=int(os.environ.get('AI_CACHE_TTL', 3600)),
+            similarity_threshold=float(os.environ.get('AI_CACHE_SIMILARITY', 0))
+        )
+        
         print(f"[AI] GEMINI_AVAILABLE: {GEMINI_AVAILABLE}")
         print(f"[AI] GROQ_AVAILABLE: {GROQ_AVAILABLE}")
         print(f"[AI] Gemini Key present: {bool(self.gemini_key)}")
         print(f"[AI] GROQ Key present: {bool(self.groq_key)}")
         
-        # Try to initialize GROQ first (more reliable)
+        # Creating clients is local and cheap; reachability is checked by probe_providers()
         if GROQ_AVAILABLE and self.groq_key:
             try:
                 self.groq_client = Groq(api_key=self.groq_key)
-                # Test with a simple request
-                test_response = self.groq_client.chat.completions.create(
-                    messages=[{"role": "user", "content": "Hi"}],
-                    model="llama-3.3-70b-versatile",
-                    max_tokens=10
-                )
-                self.active_provider = "groq"
-                print("[AI] ✅ Successfully initialized GROQ!")
+                self.provider_health['groq'] = None
             except Exception as e:
                 print(f"[AI] ⚠️  GROQ initialization failed: {e}")
                 self.groq_client = None
         
-        # Fallback to Gemini if GROQ not available
-        if not self.active_provider and GEMINI_AVAILABLE and self.gemini_key:
+        if GEMINI_AVAILABLE and self.gemini_key:
             try:
                 genai.configure(api_key=self.gemini_key)
-                self.gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                self.active_provider = "gemini"
-                print("[AI] ✅ Successfully initialized Gemini AI!")
+                self.gemini_model = genai.GenerativeModel(self.MODELS['gemini'])
+                self.provider_health['gemini'] = None
             except Exception as e:
                 print(f"[AI] ⚠️  Gemini initialization failed: {e}")
                 self.gemini_model = None
         
-        if not self.active_provider:
+        self._select_provider()
+        
+        providers = []
+        if self.groq_client:
+            providers.append(ThreadedProvider('groq', self._groq_respond, stream=self._groq_stream))
+        if self.gemini_model:
+            providers.append(ThreadedProvider('gemini', self._gemini_respond, stream=self._gemini_stream))
+        self.router = ProviderRouter(
+            providers,
+            timeout=float(os.environ.get('AI_PROVIDER_TIMEOUT', 15)),
+            hedge=os.environ.get('AI_HEDGE_REQUESTS', '').lower() in ['1', 'true', 'yes'],
+            hedge_delay=float(os.environ.get('AI_HEDGE_DELAY', 2))
+        )
+    
+    def _select_provider(self):
+        """Pick the first configured provider not known to be down."""
+        self.active_provider = None
+        for provider in self.PROVIDER_ORDER:
+            if provider in self.provider_health and self.provider_health[provider] is not False:
+                self.active_provider = provider
+                break
+        
+        if self.active_provider:
+            self.init_error = None
+        elif self.provider_health:
+            self.init_error = "All configured AI providers failed their health check"
+        else:
             self.init_error = "No AI provider available. Please configure GROQ_API_KEY or GEMINI_API_KEY"
-            print(f"[AI] ❌ {self.init_error}")
+        return self.active_provider
+    
+    def _probe(self, provider: str) -> bool:
+        """Check a provider is reachable without paying for a completion."""
+        try:
+            if provider == 'groq':
+                self.groq_client.models.list()
+            elif provider == 'gemini':
+                self.gemini_model.count_tokens('Hi')
+            return True
+        except Exception as e:
+            print(f"[AI] ⚠️  {provider} health check failed: {e}")
+            return False
+    
+    def probe_providers(self) -> Dict:
+        """Re-check every configured provider and re-select the active one."""
+        with self._probe_lock:
+            for provider in list(self.provider_health):
+                self.provider_health[provider] = self._probe(provider)
+            self.last_probe_at = datetime.utcnow()
+            self._select_provider()
+        print(f"[AI] Provider health: {self.provider_health}, active: {self.active_provider}")
+        return dict(self.provider_health)
+    
+    def start_health_checks(self, interval_seconds: int = DEFAULT_PROBE_INTERVAL):
+        """Probe providers in a daemon thread now and every interval_seconds."""
+        if self._probe_thread is not None or not self.provider_health:
+            return
+        
+        def run():
+            while True:
+                self.probe_providers()
+                time.sleep(interval_seconds)
+        
+        self._probe_thread = threading.Thread(target=run, name='ai-provider-health', daemon=True)
+        self._probe_thread.start()
+    
+    def status(self) -> Dict:
+        """Provider configuration and health for diagnostics."""
+        return {
+            'available': self.is_available(),
+            'active_provider': self.active_provider,
+            'provider_health': dict(self.provider_health),
+            'last_probe_at': self.last_probe_at.isoformat() if self.last_probe_at else None,
+            'init_error': self.init_error,
+            'providers': self.router.status(),
+            'cache': self.cache.metrics()
+        }
+    
+    def _healthy_providers(self) -> List[str]:
+        """Configured providers not marked down by the last probe, in priority order."""
+        return [provider for provider in self.PROVIDER_ORDER if self.provider_health.get(provider, False) is not False]
     
     def is_available(self) -> bool:
         """Check if any AI provider is available."""
@@ -94,33 +201,25 @@ Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patient
     
     def _check_emergency(self, message: str) -> Optional[Dict]:
         """Check for emergency keywords and return immediate response if found."""
-        emergency_keywords = [
-            'chest pain', 'heart attack', 'can\'t breathe', 'cannot breathe',
-            'difficulty breathing', 'severe bleeding', 'unconscious', 
-            'stroke', 'seizure', 'overdose', 'suicide', 'kill myself'
-        ]
-        
-        message_lower = message.lower()
-        for keyword in emergency_keywords:
-            if keyword in message_lower:
-                return {
-                    'reply': (
-                        "⚠️ **This sounds like a medical emergency!**\n\n"
-                        "Please take immediate action:\n"
-                        "1. **Call emergency services** (911 or your local emergency number)\n"
-                        "2. If you're with someone, ask them to help\n"
-                        "3. Stay calm and follow emergency operator instructions\n\n"
-                        "Do not wait - get help now. Your safety is the priority."
-                    ),
-                    'type': 'emergency',
-                    'provider': 'rule-based',
-                    'suggestions': [
-                        'Call emergency services immediately',
-                        'Go to the nearest emergency room',
-                        'Ask someone nearby for help'
-                    ],
-                    'disclaimer': 'This is an automated emergency response. Please seek immediate medical attention.'
-                }
+        if keyword_matcher.match(message).has('emergency'):
+            return {
+                'reply': (
+                    "⚠️ **This sounds like a medical emergency!**\n\n"
+                    "Please take immediate action:\n"
+                    "1. **Call emergency services** (911 or your local emergency number)\n"
+                    "2. If you're with someone, ask them to help\n"
+                    "3. Stay calm and follow emergency operator instructions\n\n"
+                    "Do not wait - get help now. Your safety is the priority."
+                ),
+                'type': 'emergency',
+                'provider': 'rule-based',
+                'suggestions': [
+                    'Call emergency services immediately',
+                    'Go to the nearest emergency room',
+                    'Ask someone nearby for help'
+                ],
+                'disclaimer': 'This is an automated emergency response. Please seek immediate medical attention.'
+            }
         return None
     
     def respond(self, message: str, context: List[Dict] = None) -> Dict:
@@ -137,19 +236,90 @@ Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patient
             print("[AI] No provider available, using fallback")
             return self._fallback_response(message)
         
-        # Try active provider
+        cached_response = self._cached_response(message, context)
+        if cached_response:
+            return cached_response
+        
+        # Healthy providers in priority order, with deadline, circuit breaker and failover
         try:
-            if self.active_provider == "groq":
-                return self._groq_respond(message, context)
-            elif self.active_provider == "gemini":
-                return self._gemini_respond(message, context)
-        except Exception as e:
-            print(f"[AI] ❌ {self.active_provider} error: {e}")
+            provider, result = self.router.complete_sync(message, context, names=self._healthy_providers())
+            self.cache.put(message, context, result)
+            return result
+        except AllProvidersFailed as e:
+            print(f"[AI] ❌ All providers failed: {e}")
             return self._fallback_response(message)
     
-    def _groq_respond(self, message: str, context: List[Dict]) -> Dict:
-        """Generate response using GROQ."""
-        # Build conversation history
+    def respond_stream(self, message: str, context: List[Dict] = None) -> Iterator[Dict]:
+        """Yield the response as events: 'start', one 'token' per chunk, then 'done'.
+        
+        The 'done' event carries the same payload respond() would return, so
+        suggestions and the disclaimer still arrive at the end. Emergency and
+        fallback replies are sent as a single 'done' event.
+        """
+        context = context or []
+        
+        emergency_response = self._check_emergency(message)
+        if emergency_response:
+            yield {'event': 'done', 'response': emergency_response}
+            return
+        
+        if not self.is_available():
+            yield {'event': 'done', 'response': self._fallback_response(message)}
+            return
+        
+        cached_response = self._cached_response(message, context)
+        if cached_response:
+            yield {'event': 'done', 'response': cached_response}
+            return
+        
+        # Same failover as respond(): 'start' is sent once a provider produced its first chunk
+        provider = None
+        chunks = []
+        try:
+            for provider_name, text in self.router.stream_sync(message, context, names=self._healthy_providers()):
+                if provider is None:
+                    provider = provider_name
+                    yield {'event': 'start', 'provider': provider, 'model': self.MODELS[provider]}
+                chunks.append(text)
+                yield {'event': 'token', 'text': text}
+        except AllProvidersFailed as e:
+            print(f"[AI] ❌ All providers failed: {e}")
+            yield {'event': 'done', 'response': self._fallback_response(message)}
+            return
+        except Exception as e:
+            print(f"[AI] ❌ {provider} streaming error: {e}")
+            yield {'event': 'done', 'response': self._fallback_response(message)}
+            return
+        
+        print(f"[AI] ✅ Streamed response from {provider}")
+        result = self._build_response(provider, message, ''.join(chunks))
+        self.cache.put(message, context, result)
+        yield {'event': 'done', 'response': result}
+    
+    def _cached_response(self, message: str, context: List[Dict]) -> Optional[Dict]:
+        """Return a cached reply with suggestions regenerated for this exact message."""
+        cached = self.cache.get(message, context)
+        if not cached:
+            return None
+        return {
+            **cached,
+            'suggestions': self._generate_suggestions(message, cached['reply']),
+            'cached': True
+        }
+    
+    def _build_response(self, provider: str, message: str, reply_text: str) -> Dict:
+        """Wrap a provider reply with suggestions and the disclaimer."""
+        return {
+            'reply': reply_text,
+            'type': 'ai_response',
+            'provider': provider,
+            'model': self.MODELS[provider],
+            'suggestions': self._generate_suggestions(message, reply_text),
+            'disclaimer': 'I am an AI assistant, not a medical professional. For medical advice, please consult a healthcare provider.'
+        }
+    
+    def _groq_messages(self, message: str, context: List[Dict]) -> List[Dict]:
+        """Build the GROQ conversation: system prompt, recent context, current message."""
         messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
         
         # Add recent context
@@ -159,13 +329,16 @@ Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patient
         
         # Add current message
         messages.append({"role": "user", "content": message})
-        
+        return messages
+    
+    def _groq_respond(self, message: str, context: List[Dict]) -> Dict:
+        """Generate response using GROQ."""
         print(f"[AI] Sending message to GROQ...")
         
         # Get response from GROQ
         response = self.groq_client.chat.completions.create(
-            messages=messages,
-            model="llama-3.3-70b-versatile",  # Fast and high quality
+            messages=self._groq_messages(message, context),
+            model=self.MODELS['groq'],  # Fast and high quality
             max_tokens=500,
             temperature=0.7
         )
@@ -173,21 +346,26 @@ Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patient
         reply_text = response.choices[0].message.content
         print(f"[AI] ✅ Received response from GROQ")
         
-        # Generate suggestions
-        suggestions = self._generate_suggestions(message, reply_text)
+        return self._build_response('groq', message, reply_text)
+    
+    def _groq_stream(self, message: str, context: List[Dict]) -> Iterator[str]:
+        """Yield GROQ reply text as it is generated."""
+        print(f"[AI] Streaming message to GROQ...")
         
-        return {
-            'reply': reply_text,
-            'type': 'ai_response',
-            'provider': 'groq',
-            'model': 'llama-3.3-70b-versatile',
-            'suggestions': suggestions,
-            'disclaimer': 'I am an AI assistant, not a medical professional. For medical advice, please consult a healthcare provider.'
-        }
+        stream = self.groq_client.chat.completions.create(
+            messages=self._groq_messages(message, context),
+            model=self.MODELS['groq'],
+            max_tokens=500,
+            temperature=0.7,
+            stream=True
+        )
+        for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
     
-    def _gemini_respond(self, message: str, context: List[Dict]) -> Dict:
-        """Generate response using Gemini."""
-        # Build conversation history
+    def _gemini_chat(self, context: List[Dict]):
+        """Start a Gemini chat seeded with the system prompt and recent context."""
         chat_history = []
         
         if not context:
@@ -207,43 +385,46 @@ Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patient
                 'parts': [turn.get('message', '')]
             })
         
-        # Start chat
-        chat = self.gemini_model.start_chat(history=chat_history)
+        return self.gemini_model.start_chat(history=chat_history)
+    
+    def _gemini_respond(self, message: str, context: List[Dict]) -> Dict:
+        """Generate response using Gemini."""
+        chat = self._gemini_chat(context)
         
         print(f"[AI] Sending message to Gemini...")
         response = chat.send_message(message)
         reply_text = response.text
         print(f"[AI] ✅ Received response from Gemini")
         
-        suggestions = self._generate_suggestions(message, reply_text)
+        return self._build_response('gemini', message, reply_text)
+    
+    def _gemini_stream(self, message: str, context: List[Dict]) -> Iterator[str]:
+        """Yield Gemini reply text as it is generated."""
+        chat = self._gemini_chat(context)
         
-        return {
-            'reply': reply_text,
-            'type': 'ai_response',
-            'provider': 'gemini',
-            'model': 'gemini-2.0-flash-exp',
-            'suggestions': suggestions,
-            'disclaimer': 'I am an AI assistant, not a medical professional. For medical advice, please consult a healthcare provider.'
-        }
+        print(f"[AI] Streaming message to Gemini...")
+        for chunk in chat.send_message(message, stream=True):
+            if chunk.text:
+                yield chunk.text
     
     def _generate_suggestions(self, user_message: str, ai_response: str) -> List[str]:
         """Generate helpful follow-up suggestions."""
         suggestions = []
-        message_lower = user_message.lower()
+        matches = keyword_matcher.match(user_message)
         
-        if any(word in message_lower for word in ['pain', 'ache', 'hurt']):
+        if matches.has('topic_pain'):
             suggestions.extend([
                 'How long have you had this pain?',
                 'On a scale of 1-10, how severe is it?',
                 'Does anything make it better or worse?'
             ])
-        elif any(word in message_lower for word in ['fever', 'temperature', 'hot']):
+        elif matches.has('topic_fever'):
             suggestions.extend([
                 'What is your current temperature?',
                 'How long have you had the fever?',
                 'Are you experiencing any other symptoms?'
             ])
-        elif any(word in message_lower for word in ['appointment', 'doctor', 'visit']):
+        elif matches.has('topic_appointment'):
             suggestions.extend([
                 'What symptoms should I mention to my doctor?',
                 'How should I prepare for my appointment?',
@@ -281,3 +462,18 @@ Remember: You are a health ASSISTANT, not a doctor. Your goal is to help patient
 
 # Backward compatibility - use the multi-AI chatbot
 GeminiHealthChatbot = MultiAIHealthChatbot
+
+_chatbot = None
+_chatbot_lock = threading.Lock()
+
+
+def get_chatbot() -> MultiAIHealthChatbot:
+    """Return this worker's shared chatbot, creating it and starting health checks on first use."""
+    global _chatbot
+    if _chatbot is None:
+        with _chatbot_lock:
+            if _chatbot is None:
+                chatbot = MultiAIHealthChatbot()
+                chatbot.start_health_checks()
+                _chatbot = chatbot
+    return _chatbot
@@ -0,0 +1,166 @@
+"""
+Medical knowledge base
+Versioned rule data (symptoms, conditions, treatments, drug interactions, risk
+weights) loaded from hospital/data/knowledge into read-only indexed structures,
+shared by every AI service and reloaded when the files change
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from hospital.utils.keyword_matcher import keyword_matcher
+
+DEFAULT_KNOWLEDGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'knowledge')
+RELOAD_CHECK_SECONDS = float(os.environ.get('KNOWLEDGE_BASE_RELOAD_SECONDS', 5))
+
+
+def _freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _symmetric_adjacency(pairs):
+    """drug -> frozenset of drugs it interacts with, in both directions"""
+    adjacency = {}
+    for drug, others in pairs.items():
+        for other in others:
+            adjacency.setdefault(drug.lower(), set()).add(other.lower())
+            adjacency.setdefault(other.lower(), set()).add(drug.lower())
+    return MappingProxyType({drug: frozenset(others) for drug, others in adjacency.items()})
+
+
+class KnowledgeBase:
+    """One immutable snapshot of the knowledge files.
+
+    Indexes built at load time:
+    - symptom_conditions / simple_symptoms: symptom -> conditions (inverted symptom index)
+    - condition_symptoms: condition -> symptoms that point to it
+    - conditions: condition table (severity, description, tests, specialists)
+    - interactions: symmetric drug adjacency sets
+    """
+
+    def __init__(self, data, version, checksum, mtimes):
+        self.version = version
+        self.checksum = checksum
+        self.mtimes = mtimes
+        self.loaded_at = datetime.utcnow()
+
+        symptoms = data['symptoms']
+        conditions = data['conditions']
+        treatments = data['treatments']
+        risk = data['risk']
+
+        self.symptom_conditions = _freeze(symptoms['symptom_conditions'])
+        self.simple_symptoms = _freeze(symptoms['simple_symptoms'])
+        self.emergency_indicators = _freeze(symptoms['emergency_indicators'])
+        self.synonyms = _freeze(symptoms.get('synonyms', {}))
+
+        condition_symptoms = {}
+        for symptom, symptom_conditions in symptoms['symptom_conditions'].items():
+            for condition in symptom_conditions:
+                condition_symptoms.setdefault(condition, []).append(symptom)
+        self.condition_symptoms = _freeze(condition_symptoms)
+
+        self.conditions = _freeze(conditions['conditions'])
+        self.specialists = _freeze(conditions['specialists'])
+        self.follow_up_timelines = _freeze(conditions['follow_up_timelines'])
+
+        self.treatments = _freeze(treatments['treatments'])
+        self.simple_treatments = _freeze(treatments['simple_treatments'])
+
+        self.interactions = _symmetric_adjacency(data['interactions']['interactions'])
+
+        self.risk_factors = _freeze(risk['risk_factors'])
+        self.chronic_conditions = _freeze(risk['chronic_conditions'])
+        self.emergency_history_conditions = _freeze(risk['emergency_history_conditions'])
+        self.history_risk_conditions = _freeze(risk['history_risk_conditions'])
+
+    def register_vocabularies(self):
+        """Point the shared keyword matcher at this snapshot's symptom vocabularies"""
+        keyword_matcher.register('symptom', list(self.symptom_conditions), self.synonyms)
+        keyword_matcher.register('simple_symptom', list(self.simple_symptoms), self.synonyms)
+        keyword_matcher.register('emergency_indicator', list(self.emergency_indicators))
+
+    def info(self):
+        return {
+            'version': self.version,
+            'checksum': self.checksum,
+            'loaded_at': self.loaded_at.isoformat(),
+            'symptoms': len(self.symptom_conditions),
+            'conditions': len(self.conditions),
+            'treatments': len(self.treatments),
+            'interacting_drugs': len(self.interactions)
+        }
+
+
+class _KnowledgeBaseLoader:
+    """Holds the current snapshot for the process and swaps it when files change"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.current = None
+        self.last_checked = 0.0
+        self.lock = threading.Lock()
+
+    def _paths(self):
+        with open(os.path.join(self.directory, 'manifest.json'), encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        paths = [os.path.join(self.directory, 'manifest.json')]
+        paths += [os.path.join(self.directory, name) for name in manifest['files']]
+        return manifest, paths
+
+    def _mtimes(self, paths):
+        return {path: os.path.getmtime(path) for path in paths}
+
+    def load(self):
+        manifest, paths = self._paths()
+        data = {}
+        digest = hashlib.sha256()
+        for path in paths[1:]:
+            with open(path, 'rb') as data_file:
+                raw = data_file.read()
+            digest.update(raw)
+            data[os.path.splitext(os.path.basename(path))[0]] = json.loads(raw)
+
+        knowledge_base = KnowledgeBase(data, manifest['version'], digest.hexdigest()[:12], self._mtimes(paths))
+        knowledge_base.register_vocabularies()
+        self.current = knowledge_base
+        print(f"[KB] Loaded knowledge base v{knowledge_base.version} ({knowledge_base.checksum})")
+        return knowledge_base
+
+    def get(self):
+        now = time.monotonic()
+        if self.current is not None and now - self.last_checked < RELOAD_CHECK_SECONDS:
+            return self.current
+
+        with self.lock:
+            if self.current is None:
+                self.last_checked = now
+                return self.load()
+
+            if now - self.last_checked >= RELOAD_CHECK_SECONDS:
+                self.last_checked = now
+                try:
+                    _, paths = self._paths()
+                    if self._mtimes(paths) != self.current.mtimes:
+                        self.load()
+                except Exception as e:
+                    # Keep serving the last good snapshot
+                    print(f"[KB] ⚠️  Reload failed, keeping v{self.current.version}: {e}")
+            return self.current
+
+
+_loader = _KnowledgeBaseLoader(os.environ.get('KNOWLEDGE_BASE_DIR', DEFAULT_KNOWLEDGE_DIR))
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Current knowledge base snapshot; loaded once, reloaded when a data file changes"""
+    return _loader.get()
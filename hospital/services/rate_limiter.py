@@ -0,0 +1,243 @@
+"""
+Request rate limiting
+Token buckets keyed by (endpoint class, hospital_id, user) so one hospital's
+users cannot starve the others on shared workers. Expensive endpoint classes
+(AI calls, imports, exports, analytics) get smaller budgets than the default.
+Anonymous requests are keyed by client address (set TRUSTED_PROXY_COUNT
+when the app runs behind a proxy, or every anonymous client shares the
+proxy's bucket). Over-budget requests get a 429 with a Retry-After header.
+The public directory endpoints are served from an in-memory snapshot and
+are not limited.
+
+Budgets are "burst,per_minute" and can be overridden per class with
+RATE_LIMIT_<CLASS> environment variables, e.g. RATE_LIMIT_AI=10,30.
+"""
+
+import math
+import os
+import threading
+import time
+from flask import g, jsonify, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# class -> (burst capacity, tokens refilled per minute)
+DEFAULT_BUDGETS = {
+    'default': (120, 600),
+    'analytics': (20, 60),
+    'ai': (5, 20),
+    'import': (2, 5),
+    'export': (3, 10),
+}
+
+# Served from the in-memory directory snapshot (hospital/services/directory.py)
+EXEMPT_ENDPOINTS = {
+    'hospital_auth.get_all_hospitals',
+    'hospital_auth.get_hospital_details',
+    'hospital_auth.get_hospital_doctors',
+    'hospital_auth.get_all_doctors',
+}
+
+PURGE_INTERVAL_SECONDS = 60
+REDIS_RETRY_SECONDS = 5
+
+
+def _load_budgets():
+    budgets = {}
+    for name, default in DEFAULT_BUDGETS.items():
+        value = os.environ.get(f'RATE_LIMIT_{name.upper()}')
+        if value:
+            burst, per_minute = (float(part) for part in value.split(','))
+            budgets[name] = (burst, per_minute)
+        else:
+            budgets[name] = default
+    return budgets
+
+
+def endpoint_class(req):
+    """Budget class of a request, from its blueprint, path and method"""
+    path = req.path
+    if 'export' in path:
+        return 'export'
+    if req.method == 'POST' and 'import' in path:
+        return 'import'
+    if req.blueprint == 'ai' and req.method != 'GET':
+        return 'ai'
+    if req.blueprint == 'analytics':
+        return 'analytics'
+    return 'default'
+
+
+class MemoryRateLimitStore:
+    """Per-process buckets; with N workers a client effectively gets N budgets"""
+
+    backend = 'memory'
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+
+    def consume(self, key, capacity, rate):
+        """Take one token; returns (allowed, remaining tokens, seconds until a token is available)"""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_purge:
+                self._purge(now)
+
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, tokens - 1, 0.0
+            self._buckets[key] = (tokens, now)
+            return False, tokens, (1 - tokens) / rate
+
+    def _purge(self, now):
+        # A bucket untouched for PURGE_INTERVAL_SECONDS has refilled (every budget refills faster)
+        self._next_purge = now + PURGE_INTERVAL_SECONDS
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket[1] < PURGE_INTERVAL_SECONDS
+        }
+
+    def stats(self):
+        return {'backend': self.backend, 'buckets': len(self._buckets)}
+
+
+# KEYS[1] bucket key; ARGV capacity, rate per second, now (seconds)
+_CONSUME_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitStore:
+    """Buckets shared by all workers; one script call per request.
+
+    Falls back to a local MemoryRateLimitStore while Redis is unreachable.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url, prefix='ratelimit'):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefix = prefix
+        self.local = MemoryRateLimitStore()
+        self._consume = self.client.register_script(_CONSUME_SCRIPT)
+        self._retry_at = 0.0
+
+    def consume(self, key, capacity, rate):
+        # After a failure, skip Redis for a few seconds instead of waiting out its timeout on every request
+        if time.monotonic() < self._retry_at:
+            return self.local.consume(key, capacity, rate)
+        try:
+            allowed, tokens = self._consume(keys=[f"{self.prefix}:{key}"], args=[capacity, rate, time.time()])
+        except redis.RedisError:
+            self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            return self.local.consume(key, capacity, rate)
+        tokens = float(tokens)
+        if allowed:
+            return True, tokens, 0.0
+        return False, tokens, (1 - tokens) / rate
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'local_buckets': self.local.stats()['buckets'],
+            'redis_skipped': time.monotonic() < self._retry_at
+        }
+
+
+class RateLimiter:
+    """Admission check run before every request"""
+
+    def __init__(self, store, budgets):
+        self.store = store
+        self.budgets = budgets
+        self.rejected = 0
+
+    def client_key(self):
+        """hospital:user for authenticated requests, the client address otherwise"""
+        try:
+            verify_jwt_in_request(optional=True)
+            claims = get_jwt()
+        except Exception:
+            claims = None
+        if claims and claims.get('sub') is not None:
+            return f"{claims.get('hospital_id') or '-'}:{claims['sub']}"
+        return f"ip:{request.remote_addr}"
+
+    def check(self):
+        """None if the request may proceed, otherwise the 429 response"""
+        name = endpoint_class(request)
+        burst, per_minute = self.budgets[name]
+        rate = per_minute / 60.0
+        allowed, remaining, retry_after = self.store.consume(f"{name}:{self.client_key()}", burst, rate)
+        g.rate_limit = (name, int(burst), int(remaining))
+        if allowed:
+            return None
+
+        self.rejected += 1
+        retry_after = max(1, math.ceil(retry_after))
+        response = jsonify({
+            'error': f'Too many {name} requests. Please retry in {retry_after} seconds.',
+            'retry_after': retry_after
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    def stats(self):
+        return {**self.store.stats(), 'rejected': self.rejected, 'budgets': self.budgets}
+
+
+_limiter = None
+
+
+def init_rate_limiting(app):
+    """Pick the store (Redis when REDIS_URL is set and redis is installed) and register the request hooks"""
+    global _limiter
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url and REDIS_AVAILABLE:
+        store = RedisRateLimitStore(redis_url)
+    else:
+        store = MemoryRateLimitStore()
+    _limiter = RateLimiter(store, _load_budgets())
+
+    @app.before_request
+    def enforce_rate_limit():
+        if request.method == 'OPTIONS' or request.endpoint in EXEMPT_ENDPOINTS:  # CORS preflight, directory
+            return None
+        return _limiter.check()
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        if 'rate_limit' in g:
+            name, limit, remaining = g.rate_limit
+            response.headers['X-RateLimit-Class'] = name
+            response.headers['X-RateLimit-Limit'] = str(limit)
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+        return response
+
+
+def get_rate_limiter():
+    return _limiter
@@ -1,62 +1,21 @@
 from datetime import datetime, timedelta
 from hospital.models.medical_record import MedicalRecord
 from hospital.models.appointment import Appointment
+from hospital.services.knowledge_base import get_knowledge_base
 
 class RiskAssessmentService:
     def __init__(self):
+        self.knowledge_base = get_knowledge_base()
         self.risk_factors = self._load_risk_factors()
         self.chronic_conditions = self._load_chronic_conditions()
     
     def _load_risk_factors(self):
         """Load risk factor weights and mappings"""
-        return {
-            'age': {
-                'ranges': [
-                    {'min': 0, 'max': 18, 'weight': 0.1},
-                    {'min': 18, 'max': 45, 'weight': 0.2},
-                    {'min': 45, 'max': 65, 'weight': 0.4},
-                    {'min': 65, 'max': 80, 'weight': 0.7},
-                    {'min': 80, 'max': 120, 'weight': 1.0}
-                ]
-            },
-            'chronic_conditions': {
-                'diabetes': 0.6,
-                'hypertension': 0.5,
-                'heart disease': 0.8,
-                'kidney disease': 0.7,
-                'cancer': 0.9,
-                'copd': 0.6,
-                'asthma': 0.3
-            },
-            'lifestyle': {
-                'smoking': 0.4,
-                'alcohol': 0.2,
-                'obesity': 0.3,
-                'sedentary': 0.2
-            },
-            'recent_hospitalizations': 0.5,
-            'medication_compliance': -0.3  # Good compliance reduces risk
-        }
+        return self.knowledge_base.risk_factors
     
     def _load_chronic_conditions(self):
         """Load chronic condition definitions and monitoring requirements"""
-        return {
-            'diabetes': {
-                'monitoring_frequency': 'monthly',
-                'key_indicators': ['blood_glucose', 'hba1c', 'blood_pressure'],
-                'complications': ['diabetic_retinopathy', 'nephropathy', 'neuropathy']
-            },
-            'hypertension': {
-                'monitoring_frequency': 'monthly',
-                'key_indicators': ['blood_pressure', 'cholesterol'],
-                'complications': ['stroke', 'heart_attack', 'kidney_disease']
-            },
-            'heart_disease': {
-                'monitoring_frequency': 'bi-weekly',
-                'key_indicators': ['ecg', 'echocardiogram', 'stress_test'],
-                'complications': ['heart_failure', 'arrhythmia', 'sudden_death']
-            }
-        }
+        return self.knowledge_base.chronic_conditions
     
     def assess_patient_risk(self, patient):
         """Comprehensive risk assessment for a patient"""
@@ -317,7 +276,7 @@ class RiskAssessmentService:
         # Medical history emergency indicators
         if patient.medical_history:
             history = patient.medical_history.lower()
-            high_risk_conditions = ['heart attack', 'stroke', 'cancer', 'kidney failure']
+            high_risk_conditions = self.knowledge_base.emergency_history_conditions
             
             for condition in high_risk_conditions:
                 if condition in history:
@@ -0,0 +1,233 @@
+"""
+Batch risk engine
+Scores every patient of a hospital with the RiskAssessmentService rules using
+one grouped appointment query and column-wise pandas operations, and stores
+the scores so later runs only recompute patients whose inputs changed
+"""
+
+import time
+from datetime import date, datetime, timedelta
+import pandas as pd
+from sqlalchemy import case, func
+from hospital import db
+from hospital.models.patient import Patient
+from hospital.models.appointment import Appointment
+from hospital.models.risk_score import PatientRiskScore
+from hospital.services.knowledge_base import get_knowledge_base
+from hospital.utils.import_ledger import row_hash
+
+RISK_CATEGORIES = ['minimal', 'low', 'medium', 'high', 'critical']
+RISK_THRESHOLDS = [0.2, 0.4, 0.6, 0.8]
+
+
+class BatchRiskEngine:
+    """Compute and persist risk scores for all patients of one hospital.
+
+    Incremental runs (the default) only score patients with no stored score,
+    patients edited or seen (new appointment) since their score was computed,
+    scores from another knowledge base snapshot, and scores older than
+    max_score_age_hours (the 30-day activity window keeps moving). Of those,
+    only rows whose inputs actually changed are rewritten.
+    """
+
+    def __init__(self, hospital_id, activity_window_days=30, max_score_age_hours=24):
+        self.hospital_id = hospital_id
+        self.activity_window_days = activity_window_days
+        self.max_score_age_hours = max_score_age_hours
+        self.knowledge_base = get_knowledge_base()
+
+    def run(self, full=False):
+        started = time.perf_counter()
+        now = datetime.utcnow()
+
+        patients = pd.DataFrame(
+            db.session.query(
+                Patient.id, Patient.date_of_birth, Patient.gender,
+                Patient.medical_history, Patient.allergies, Patient.updated_at
+            ).filter(Patient.hospital_id == self.hospital_id).all(),
+            columns=['id', 'date_of_birth', 'gender', 'medical_history', 'allergies', 'updated_at']
+        )
+        summary = {
+            'hospital_id': self.hospital_id,
+            'patients': len(patients),
+            'candidates': 0,
+            'recomputed': 0,
+            'unchanged': 0,
+            'activity_counts_available': hasattr(Appointment, 'patient_id'),
+            'knowledge_checksum': self.knowledge_base.checksum
+        }
+        if patients.empty:
+            summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+            return summary
+
+        patients = patients.set_index('id')
+        patients = patients.join(self._activity(now), how='left')
+        patients[['recent_appointments', 'emergency_appointments']] = (
+            patients[['recent_appointments', 'emergency_appointments']].fillna(0).astype(int)
+        )
+        patients = patients.join(self._stored_scores(), how='left')
+
+        if not full:
+            patients = patients[self._needs_recompute(patients, now)]
+        summary['candidates'] = len(patients)
+        if patients.empty:
+            summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+            return summary
+
+        scored = self.score(patients)
+
+        inserts, updates = [], []
+        for patient_id, row in scored.iterrows():
+            stored_id = patients.at[patient_id, 'score_id']
+            if pd.notna(stored_id) and patients.at[patient_id, 'input_hash'] == row['input_hash']:
+                # Same inputs: only move the timestamp so it is not picked up again
+                updates.append({'id': int(stored_id), 'computed_at': now})
+                summary['unchanged'] += 1
+                continue
+
+            values = {
+                'patient_id': int(patient_id),
+                'hospital_id': self.hospital_id,
+                'risk_score': float(row['risk_score']),
+                'risk_category': row['risk_category'],
+                'risk_factors': row['risk_factors'],
+                'input_hash': row['input_hash'],
+                'knowledge_checksum': self.knowledge_base.checksum,
+                'computed_at': now
+            }
+            if pd.notna(stored_id):
+                updates.append(dict(values, id=int(stored_id)))
+            else:
+                inserts.append(values)
+            summary['recomputed'] += 1
+
+        if inserts:
+            db.session.bulk_insert_mappings(PatientRiskScore, inserts)
+        if updates:
+            db.session.bulk_update_mappings(PatientRiskScore, updates)
+        db.session.commit()
+
+        summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return summary
+
+    def _activity(self, now):
+        """Recent and emergency appointment counts per patient in one grouped query"""
+        columns = ['recent_appointments', 'emergency_appointments', 'last_appointment_at']
+        if not hasattr(Appointment, 'patient_id'):
+            # Appointment.patient_id is disabled in this schema; score without activity
+            return pd.DataFrame(columns=columns)
+
+        since = now - timedelta(days=self.activity_window_days)
+        rows = db.session.query(
+            Appointment.patient_id,
+            func.count(Appointment.id),
+            func.sum(case((Appointment.priority == 'emergency', 1), else_=0)),
+            func.max(Appointment.created_at)
+        ).filter(
+            Appointment.hospital_id == self.hospital_id,
+            Appointment.created_at >= since
+        ).group_by(Appointment.patient_id).all()
+
+        return pd.DataFrame(
+            [row[1:] for row in rows],
+            index=[row[0] for row in rows],
+            columns=columns
+        )
+
+    def _stored_scores(self):
+        rows = db.session.query(
+            PatientRiskScore.patient_id, PatientRiskScore.id, PatientRiskScore.input_hash,
+            PatientRiskScore.knowledge_checksum, PatientRiskScore.computed_at
+        ).filter(PatientRiskScore.hospital_id == self.hospital_id).all()
+
+        return pd.DataFrame(
+            [row[1:] for row in rows],
+            index=[row[0] for row in rows],
+            columns=['score_id', 'input_hash', 'score_checksum', 'computed_at']
+        )
+
+    def _needs_recompute(self, patients, now):
+        computed_at = pd.to_datetime(patients['computed_at'])
+        stale_before = now - timedelta(hours=self.max_score_age_hours)
+
+        needs = patients['score_id'].isna()
+        needs |= patients['score_checksum'] != self.knowledge_base.checksum
+        needs |= computed_at < stale_before
+        needs |= pd.to_datetime(patients['updated_at']) > computed_at
+        needs |= pd.to_datetime(patients['last_appointment_at']) > computed_at
+        return needs
+
+    def score(self, patients):
+        """Vectorized version of RiskAssessmentService.assess_patient_risk's scoring"""
+        risk_factors = self.knowledge_base.risk_factors
+        today = pd.Timestamp(date.today())
+
+        birth = pd.to_datetime(patients['date_of_birth'])
+        ages = today.year - birth.dt.year - (
+            (birth.dt.month > today.month) | ((birth.dt.month == today.month) & (birth.dt.day > today.day))
+        ).astype(int)
+
+        # Age bands -> weight
+        ranges = risk_factors['age']['ranges']
+        bins = [age_range['min'] for age_range in ranges] + [ranges[-1]['max']]
+        band = pd.cut(ages, bins=bins, right=False, labels=False)
+        weights = {position: age_range['weight'] for position, age_range in enumerate(ranges)}
+        age_scores = band.map(weights).fillna(0.0)
+        score = age_scores.copy()
+
+        factors = pd.Series([[] for _ in range(len(patients))], index=patients.index)
+        self._add_factor(factors, age_scores > 0.3, ages.map(lambda age: f'Age-related risk (Age: {age:.0f})' if pd.notna(age) else ''))
+
+        history = patients['medical_history'].fillna('').str.lower()
+        for condition, weight in risk_factors['chronic_conditions'].items():
+            has_condition = history.str.contains(condition, regex=False)
+            score += has_condition * weight
+            self._add_factor(factors, has_condition, f'Chronic condition: {condition}')
+
+        has_allergies = patients['allergies'].fillna('').str.strip().ne('')
+        score += has_allergies * 0.1
+        self._add_factor(factors, has_allergies, 'Known allergies - medication caution required')
+
+        busy = patients['recent_appointments'] > 3
+        score += busy * 0.3
+        self._add_factor(factors, busy, patients['recent_appointments'].map(
+            lambda count: f'High medical activity: {count} appointments in last {self.activity_window_days} days'
+        ))
+
+        emergency = patients['emergency_appointments'] > 0
+        score += emergency * 0.4
+        self._add_factor(factors, emergency, patients['emergency_appointments'].map(
+            lambda count: f'Recent emergency visits: {count}'
+        ))
+
+        # Lifestyle data is not collected yet; same flat term as the single-patient assessment
+        score += 0.1
+        self._add_factor(factors, pd.Series(True, index=patients.index), 'Lifestyle assessment needed')
+
+        # Categorize on the exact score (rounding could push it over a threshold); store it rounded
+        clipped = score.clip(upper=1.0)
+        category = pd.cut(clipped, bins=[float('-inf')] + RISK_THRESHOLDS + [float('inf')],
+                          right=False, labels=RISK_CATEGORIES).astype(str)
+        normalized = clipped.round(2)
+
+        checksum = self.knowledge_base.checksum
+        input_hash = [
+            row_hash(age, gender, history_text, allergies, recent, emergencies, checksum)
+            for age, gender, history_text, allergies, recent, emergencies in zip(
+                ages, patients['gender'], history, patients['allergies'],
+                patients['recent_appointments'], patients['emergency_appointments']
+            )
+        ]
+
+        return pd.DataFrame({
+            'risk_score': normalized,
+            'risk_category': category,
+            'risk_factors': factors,
+            'input_hash': input_hash
+        }, index=patients.index)
+
+    @staticmethod
+    def _add_factor(factors, mask, text):
+        """Append a factor (fixed text or per-row Series) to every row where mask is set"""
+        for patient_id in mask[mask].index:
+            factors.at[patient_id].append(text if isinstance(text, str) else text.at[patient_id])
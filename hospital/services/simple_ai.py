@@ -6,60 +6,63 @@ This provides basic rule-based AI functionality for the hospital system
 import json
 import re
 from datetime import datetime, timedelta
+from hospital.services.knowledge_base import get_knowledge_base
+from hospital.utils.keyword_matcher import keyword_matcher
+
+# NumPy comes with pandas; batch scoring falls back to per-text analysis without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+SEVERITY_LEVELS = ['low', 'medium', 'high']
+
+CHAT_URGENT_KEYWORDS = [
+    'chest pain', 'shortness of breath', 'difficulty breathing',
+    'loss of consciousness', 'severe headache', 'slurred speech',
+    'numbness', 'bleeding', 'vision loss'
+]
+
+CHAT_SYMPTOM_KEYWORDS = [
+    'fever', 'cough', 'cold', 'headache', 'nausea', 'vomit',
+    'diarrhea', 'pain', 'dizzy', 'fatigue', 'rash'
+]
+
+keyword_matcher.register('chat_urgent', CHAT_URGENT_KEYWORDS)
+keyword_matcher.register('chat_symptom', CHAT_SYMPTOM_KEYWORDS)
+keyword_matcher.register('chat_logistics', ['appointment', 'book', 'schedule'])
+
+_BATCH_MATRICES = None  # (knowledge base checksum, matrices) for analyze_batch
 
 class SimpleSymptomChecker:
     """Simple rule-based symptom checker"""
     
     def __init__(self):
-        self.symptom_conditions = {
-            'fever': {
-                'conditions': ['flu', 'covid-19', 'pneumonia', 'infection'],
-                'severity': 'medium',
-                'tests': ['Temperature check', 'Blood test', 'COVID test']
-            },
-            'cough': {
-                'conditions': ['flu', 'covid-19', 'bronchitis', 'pneumonia'],
-                'severity': 'medium',
-                'tests': ['Chest X-ray', 'Sputum test']
-            },
-            'chest pain': {
-                'conditions': ['heart attack', 'angina', 'pneumonia'],
-                'severity': 'high',
-                'tests': ['ECG', 'Chest X-ray', 'Cardiac enzymes']
-            },
-            'headache': {
-                'conditions': ['migraine', 'tension headache', 'hypertension'],
-                'severity': 'low',
-                'tests': ['Blood pressure check', 'Neurological exam']
-            },
-            'shortness of breath': {
-                'conditions': ['asthma', 'pneumonia', 'heart failure'],
-                'severity': 'high',
-                'tests': ['Chest X-ray', 'Pulmonary function test', 'ECG']
-            }
-        }
+        self.knowledge_base = get_knowledge_base()
+        self.symptom_conditions = self.knowledge_base.simple_symptoms
     
     def analyze_symptoms(self, symptoms_text, patient_age=None, patient_gender=None):
         """Analyze symptoms and return preliminary diagnosis"""
-        symptoms_lower = symptoms_text.lower()
-        
-        # Find matching symptoms
-        matched_symptoms = []
+        # Find matching symptoms (one pass, synonyms mapped to their symptom)
+        matched_symptoms = keyword_matcher.match(symptoms_text).get('simple_symptom')
         all_conditions = set()
         all_tests = set()
         max_severity = 'low'
         
-        for symptom, data in self.symptom_conditions.items():
-            if symptom in symptoms_lower:
-                matched_symptoms.append(symptom)
-                all_conditions.update(data['conditions'])
-                all_tests.update(data['tests'])
-                
-                # Update severity
-                if data['severity'] == 'high':
-                    max_severity = 'high'
-                elif data['severity'] == 'medium' and max_severity != 'high':
-                    max_severity = 'medium'
+        for symptom in matched_symptoms:
+            data = self.symptom_conditions.get(symptom)
+            if not data:
+                continue  # vocabulary from a newer knowledge base reload
+            all_conditions.update(data['conditions'])
+            all_tests.update(data['tests'])
+            
+            # Update severity
+            if data['severity'] == 'high':
+                max_severity = 'high'
+            elif data['severity'] == 'medium' and max_severity != 'high':
+                max_severity = 'medium'
         
         # Calculate confidence based on number of matched symptoms
         confidence = min(len(matched_symptoms) * 0.3, 0.9)
@@ -90,20 +93,130 @@ class SimpleSymptomChecker:
             'matched_symptoms': matched_symptoms
         }
     
+    def analyze_batch(self, items):
+        """Score many symptom texts at once and return them ranked by risk (highest first).
+        
+        items: [{'symptoms': str, 'age': int, 'gender': str, 'id': any}, ...]
+        Patients x symptoms is a sparse 0/1 matrix multiplied by the
+        symptoms x conditions matrix, so condition scores, severities and
+        confidences for the whole queue come out of a few array operations.
+        """
+        if not items:
+            return []
+        if not NUMPY_AVAILABLE:
+            return self._analyze_batch_unvectorized(items)
+        
+        symptoms, conditions, symptom_condition, symptom_severity = self._batch_matrices()
+        symptom_position = {symptom: position for position, symptom in enumerate(symptoms)}
+        
+        # Patients x symptoms: store only the matched (row, column) pairs
+        matched_per_item = []
+        rows, columns = [], []
+        for row, item in enumerate(items):
+            matched = [
+                symptom for symptom in keyword_matcher.match(item.get('symptoms', '')).get('simple_symptom')
+                if symptom in symptom_position
+            ]
+            matched_per_item.append(matched)
+            rows.extend([row] * len(matched))
+            columns.extend(symptom_position[symptom] for symptom in matched)
+        
+        patient_symptom = np.zeros((len(items), len(symptoms)), dtype=np.int32)
+        patient_symptom[rows, columns] = 1
+        
+        condition_scores = patient_symptom @ symptom_condition  # patients x conditions
+        matched_counts = patient_symptom.sum(axis=1)
+        confidences = np.minimum(matched_counts * 0.3, 0.9)
+        severities = (patient_symptom * symptom_severity).max(axis=1, initial=0)
+        
+        # Same age adjustment as analyze_symptoms: over 65 moves up one level
+        ages = np.array([item.get('age') or 0 for item in items], dtype=float)
+        severities = np.where(ages > 65, np.minimum(severities + 1, len(SEVERITY_LEVELS) - 1), severities)
+        
+        top_conditions = np.argsort(-condition_scores, axis=1, kind='stable')[:, :5]
+        top_scores = np.take_along_axis(condition_scores, top_conditions, axis=1)
+        
+        # Rank by severity, then number of matched symptoms, then strongest condition (none in an empty knowledge base)
+        strongest = top_scores[:, 0] if top_scores.shape[1] else np.zeros(len(items), dtype=np.int32)
+        order = np.lexsort((-strongest, -matched_counts, -severities))
+        
+        results = []
+        for rank, row in enumerate(order, start=1):
+            item = items[row]
+            matched = matched_per_item[row]
+            predicted = [
+                conditions[column] for column, score in zip(top_conditions[row], top_scores[row]) if score > 0
+            ]
+            tests = set()
+            for symptom in matched:
+                tests.update(self.symptom_conditions[symptom]['tests'])
+            confidence = float(confidences[row])
+            
+            results.append({
+                'rank': rank,
+                'index': int(row),
+                'id': item.get('id'),
+                'predicted_conditions': [
+                    {
+                        'condition': condition,
+                        'confidence': round(confidence, 2),
+                        'match_count': int(score),
+                        'description': f'Possible {condition} based on symptoms'
+                    }
+                    for condition, score in zip(predicted, top_scores[row])
+                ],
+                'risk_level': SEVERITY_LEVELS[int(severities[row])],
+                'confidence_score': confidence,
+                'recommended_tests': list(tests),
+                'recommended_specialists': self._get_specialists(predicted),
+                'matched_symptoms': matched
+            })
+        
+        return results
+    
+    def _batch_matrices(self):
+        """Symptom x condition matrix and per-symptom severity for the current knowledge base"""
+        global _BATCH_MATRICES
+        if _BATCH_MATRICES is not None and _BATCH_MATRICES[0] == self.knowledge_base.checksum:
+            return _BATCH_MATRICES[1]
+        
+        symptoms = list(self.symptom_conditions)
+        conditions = sorted({
+            condition for data in self.symptom_conditions.values() for condition in data['conditions']
+        })
+        condition_position = {condition: position for position, condition in enumerate(conditions)}
+        
+        symptom_condition = np.zeros((len(symptoms), len(conditions)), dtype=np.int32)
+        for row, symptom in enumerate(symptoms):
+            for condition in self.symptom_conditions[symptom]['conditions']:
+                symptom_condition[row, condition_position[condition]] = 1
+        symptom_severity = np.array([
+            SEVERITY_LEVELS.index(self.symptom_conditions[symptom]['severity']) for symptom in symptoms
+        ])
+        
+        matrices = (symptoms, conditions, symptom_condition, symptom_severity)
+        _BATCH_MATRICES = (self.knowledge_base.checksum, matrices)  # One assignment: readers never see a half-updated pair
+        return matrices
+    
+    def _analyze_batch_unvectorized(self, items):
+        """analyze_batch without NumPy: one analyze_symptoms call per item"""
+        analyzed = []
+        for index, item in enumerate(items):
+            result = self.analyze_symptoms(item.get('symptoms', ''), item.get('age'), item.get('gender'))
+            analyzed.append((index, item, result))
+        
+        analyzed.sort(key=lambda entry: (
+            -SEVERITY_LEVELS.index(entry[2]['risk_level']),
+            -len(entry[2]['matched_symptoms'])
+        ))
+        return [
+            {'rank': rank, 'index': index, 'id': item.get('id'), **result}
+            for rank, (index, item, result) in enumerate(analyzed, start=1)
+        ]
+    
     def _get_specialists(self, conditions):
         """Get recommended specialists based on conditions"""
-        specialist_mapping = {
-            'heart attack': 'Cardiologist',
-            'angina': 'Cardiologist',
-            'heart failure': 'Cardiologist',
-            'pneumonia': 'Pulmonologist',
-            'asthma': 'Pulmonologist',
-            'bronchitis': 'Pulmonologist',
-            'migraine': 'Neurologist',
-            'flu': 'General Physician',
-            'covid-19': 'General Physician',
-            'infection': 'General Physician'
-        }
+        specialist_mapping = self.knowledge_base.specialists
         
         specialists = set()
         for condition in conditions:
@@ -134,7 +247,7 @@ class SimpleRiskAssessment:
         # Medical history risk
         if patient.medical_history:
             history = patient.medical_history.lower()
-            high_risk_conditions = ['diabetes', 'heart disease', 'cancer', 'kidney disease']
+            high_risk_conditions = get_knowledge_base().history_risk_conditions
             
             for condition in high_risk_conditions:
                 if condition in history:
@@ -189,23 +302,7 @@ class SimpleTreatmentRecommendations:
     """Simple treatment recommendation system"""
     
     def __init__(self):
-        self.treatments = {
-            'flu': {
-                'medications': ['Paracetamol 500mg every 6 hours', 'Rest and fluids'],
-                'lifestyle': ['Complete bed rest', 'Increase fluid intake', 'Avoid contact with others'],
-                'follow_up': 'If symptoms worsen or persist beyond 7 days'
-            },
-            'headache': {
-                'medications': ['Ibuprofen 400mg every 6 hours', 'Paracetamol 500mg every 6 hours'],
-                'lifestyle': ['Rest in dark room', 'Apply cold compress', 'Stay hydrated'],
-                'follow_up': 'If headaches become frequent or severe'
-            },
-            'cough': {
-                'medications': ['Cough syrup as needed', 'Throat lozenges'],
-                'lifestyle': ['Stay hydrated', 'Use humidifier', 'Avoid irritants'],
-                'follow_up': 'If cough persists beyond 2 weeks'
-            }
-        }
+        self.treatments = get_knowledge_base().simple_treatments
     
     def get_recommendations(self, conditions):
         """Get treatment recommendations for conditions"""
@@ -237,23 +334,17 @@ class SimpleHealthChatbot:
     def __init__(self):
         # Basic intent keywords
         self.greetings = {'hi', 'hello', 'hey', 'good morning', 'good evening'}
-        self.urgent_keywords = {
-            'chest pain', 'shortness of breath', 'difficulty breathing',
-            'loss of consciousness', 'severe headache', 'slurred speech',
-            'numbness', 'bleeding', 'vision loss'
-        }
-        self.symptom_keywords = {
-            'fever', 'cough', 'cold', 'headache', 'nausea', 'vomit',
-            'diarrhea', 'pain', 'dizzy', 'fatigue', 'rash'
-        }
+        self.urgent_keywords = set(CHAT_URGENT_KEYWORDS)
+        self.symptom_keywords = set(CHAT_SYMPTOM_KEYWORDS)
 
     def respond(self, user_message: str, context=None):
         """Return a safe, helpful response with minimal rules."""
         context = context or []
         message = user_message.lower().strip()
+        matches = keyword_matcher.match(message)
 
         # Check for urgent symptoms first
-        if any(k in message for k in self.urgent_keywords):
+        if matches.has('chat_urgent'):
             return {
                 'reply': (
                     "I detected possible urgent symptoms. Please seek immediate "
@@ -282,7 +373,7 @@ class SimpleHealthChatbot:
             }
 
         # Symptom guidance
-        if any(k in message for k in self.symptom_keywords):
+        if matches.has('chat_symptom'):
             return {
                 'reply': (
                     "I can offer general guidance. For a quick check, you can run the "
@@ -298,7 +389,7 @@ class SimpleHealthChatbot:
             }
 
         # Appointment / logistics cues
-        if 'appointment' in message or 'book' in message or 'schedule' in message:
+        if matches.has('chat_logistics'):
             return {
                 'reply': "To schedule, pick a date/time and preferred doctor; include reason for visit.",
                 'type': 'logistics',
@@ -1,69 +1,25 @@
 import json
 import re
 from collections import Counter
+from hospital.services.knowledge_base import get_knowledge_base
+from hospital.utils.keyword_matcher import keyword_matcher
 
 class SymptomChecker:
     def __init__(self):
         # In a real implementation, you'd load pre-trained models
         # For now, we'll use a rule-based approach with medical knowledge
+        self.knowledge_base = get_knowledge_base()
         self.symptom_database = self._load_symptom_database()
         self.condition_database = self._load_condition_database()
         # Simple text matching instead of TF-IDF for now
         
     def _load_symptom_database(self):
         """Load symptom-condition mappings"""
-        return {
-            'fever': ['flu', 'covid-19', 'pneumonia', 'malaria', 'typhoid'],
-            'cough': ['flu', 'covid-19', 'pneumonia', 'bronchitis', 'asthma'],
-            'headache': ['migraine', 'tension headache', 'flu', 'hypertension'],
-            'chest pain': ['heart attack', 'angina', 'pneumonia', 'acid reflux'],
-            'shortness of breath': ['asthma', 'pneumonia', 'heart failure', 'covid-19'],
-            'nausea': ['food poisoning', 'gastritis', 'pregnancy', 'migraine'],
-            'fatigue': ['anemia', 'depression', 'thyroid disorder', 'diabetes'],
-            'abdominal pain': ['appendicitis', 'gastritis', 'kidney stones', 'gallstones'],
-            'dizziness': ['vertigo', 'low blood pressure', 'anemia', 'dehydration'],
-            'joint pain': ['arthritis', 'lupus', 'fibromyalgia', 'gout']
-        }
+        return self.knowledge_base.symptom_conditions
     
     def _load_condition_database(self):
         """Load condition information with severity and recommendations"""
-        return {
-            'flu': {
-                'severity': 'mild',
-                'description': 'Viral infection affecting respiratory system',
-                'common_symptoms': ['fever', 'cough', 'fatigue', 'body aches'],
-                'recommended_tests': ['Complete Blood Count', 'Flu Test'],
-                'specialists': ['General Physician']
-            },
-            'covid-19': {
-                'severity': 'moderate',
-                'description': 'Viral infection caused by SARS-CoV-2',
-                'common_symptoms': ['fever', 'cough', 'shortness of breath', 'loss of taste'],
-                'recommended_tests': ['RT-PCR Test', 'Chest X-ray', 'Oxygen Saturation'],
-                'specialists': ['General Physician', 'Pulmonologist']
-            },
-            'pneumonia': {
-                'severity': 'high',
-                'description': 'Infection that inflames air sacs in lungs',
-                'common_symptoms': ['fever', 'cough', 'chest pain', 'shortness of breath'],
-                'recommended_tests': ['Chest X-ray', 'Blood Culture', 'Sputum Test'],
-                'specialists': ['Pulmonologist', 'Internal Medicine']
-            },
-            'heart attack': {
-                'severity': 'critical',
-                'description': 'Blockage of blood flow to heart muscle',
-                'common_symptoms': ['chest pain', 'shortness of breath', 'nausea', 'sweating'],
-                'recommended_tests': ['ECG', 'Cardiac Enzymes', 'Echocardiogram'],
-                'specialists': ['Cardiologist', 'Emergency Medicine']
-            },
-            'migraine': {
-                'severity': 'moderate',
-                'description': 'Severe recurring headache',
-                'common_symptoms': ['headache', 'nausea', 'sensitivity to light'],
-                'recommended_tests': ['Neurological Exam', 'MRI (if needed)'],
-                'specialists': ['Neurologist']
-            }
-        }
+        return self.knowledge_base.conditions
     
     def analyze_symptoms(self, symptoms, patient_age=None, patient_gender=None, medical_history=None):
         """Analyze symptoms and provide preliminary diagnosis"""
@@ -78,12 +34,11 @@ class SymptomChecker:
             possible_conditions = {}
             
             for symptom in symptom_list:
-                for key_symptom, conditions in self.symptom_database.items():
-                    if symptom in key_symptom or key_symptom in symptom:
-                        for condition in conditions:
-                            if condition not in possible_conditions:
-                                possible_conditions[condition] = 0
-                            possible_conditions[condition] += 1
+                for key_symptom in self._match_terms(symptom, 'symptom'):
+                    for condition in self.symptom_database.get(key_symptom, ()):
+                        if condition not in possible_conditions:
+                            possible_conditions[condition] = 0
+                        possible_conditions[condition] += 1
             
             # Calculate confidence scores
             total_symptoms = len(symptom_list)
@@ -176,20 +131,20 @@ class SymptomChecker:
     
     def _check_emergency_indicators(self, symptoms):
         """Check for emergency symptoms that require immediate attention"""
-        emergency_symptoms = [
-            'chest pain', 'difficulty breathing', 'severe headache',
-            'loss of consciousness', 'severe bleeding', 'stroke symptoms',
-            'severe abdominal pain', 'high fever with confusion'
-        ]
-        
         emergency_found = []
         for symptom in symptoms:
-            for emergency in emergency_symptoms:
-                if emergency in symptom or symptom in emergency:
-                    emergency_found.append(emergency)
+            emergency_found.extend(self._match_terms(symptom, 'emergency_indicator'))
         
         return emergency_found
     
+    def _match_terms(self, symptom, category):
+        """Vocabulary terms found in the symptom, or containing it ('ache' -> 'headache')"""
+        matched = keyword_matcher.match(symptom).get(category)
+        for term in keyword_matcher.lookup_partial(symptom, category):
+            if term not in matched:
+                matched.append(term)
+        return matched
+    
     def _get_lifestyle_recommendations(self, conditions):
         """Provide lifestyle recommendations based on conditions"""
         recommendations = []
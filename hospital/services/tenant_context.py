@@ -0,0 +1,113 @@
+"""
+Tenant context cache
+Hospital profile plus its active subscription (plan, limits, features) per
+hospital_id, loaded with one joined query and cached for TENANT_CACHE_TTL
+seconds. Anything that changes a hospital or its subscription calls
+invalidate_tenant_context(); other workers pick the change up when their
+entry expires.
+"""
+
+import os
+import threading
+import time
+from datetime import date
+from sqlalchemy import and_
+from hospital import db
+from hospital.models.hospital import Hospital
+from hospital.models.hospital_subscription import HospitalSubscription, usage_stats
+
+TENANT_CACHE_TTL = float(os.environ.get('TENANT_CACHE_TTL', 60))
+
+
+class TenantContext:
+    """Read-only snapshot of one hospital and its active subscription (plain values, no ORM state)"""
+
+    def __init__(self, hospital, subscription):
+        self.hospital_id = hospital.id
+        self.name = hospital.name
+        self.is_active = hospital.is_active
+        self.hospital = hospital.to_dict()
+        self.subscription = subscription.to_dict() if subscription else None
+
+        self.plan_name = subscription.plan_name if subscription else None
+        self.max_patients = subscription.max_patients if subscription else 0
+        self.max_doctors = subscription.max_doctors if subscription else 0
+        self.max_staff = subscription.max_staff if subscription else 0
+        self.features = frozenset(subscription.features or []) if subscription else frozenset()
+        self.subscription_end = subscription.subscription_end if subscription else None
+
+    @property
+    def has_subscription(self):
+        return self.subscription is not None
+
+    def is_expired(self):
+        return self.subscription_end is None or self.subscription_end < date.today()
+
+    def days_remaining(self):
+        return max(0, (self.subscription_end - date.today()).days) if self.subscription_end else 0
+
+    def is_feature_enabled(self, feature_name):
+        return feature_name in self.features
+
+    def usage_stats(self):
+        return usage_stats(self.hospital_id, self.max_patients, self.max_doctors, self.max_staff)
+
+
+class TenantContextCache:
+    """Per-process TTL cache of TenantContext keyed by hospital_id"""
+
+    def __init__(self, ttl=TENANT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}  # hospital_id -> (expires_at, context)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, hospital_id):
+        """TenantContext for the hospital, or None if it does not exist"""
+        entry = self._entries.get(hospital_id)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        context = self._load(hospital_id)
+        if context is not None:
+            with self._lock:
+                self._entries[hospital_id] = (time.monotonic() + self.ttl, context)
+        return context
+
+    def _load(self, hospital_id):
+        row = db.session.query(Hospital, HospitalSubscription).outerjoin(
+            HospitalSubscription,
+            and_(HospitalSubscription.hospital_id == Hospital.id, HospitalSubscription.is_active == True)
+        ).filter(Hospital.id == hospital_id).order_by(HospitalSubscription.subscription_end.desc()).first()
+        if row is None:
+            return None
+        return TenantContext(*row)
+
+    def invalidate(self, hospital_id):
+        with self._lock:
+            self._entries.pop(hospital_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'ttl_seconds': self.ttl}
+
+
+tenant_cache = TenantContextCache()
+
+
+def get_tenant_context(hospital_id):
+    """Hospital + active subscription for hospital_id (shared, cached lookup)"""
+    if not hospital_id:
+        return None
+    return tenant_cache.get(hospital_id)
+
+
+def invalidate_tenant_context(hospital_id):
+    """Call after changing a hospital or its subscription"""
+    tenant_cache.invalidate(hospital_id)
@@ -0,0 +1,190 @@
+"""
+JWT revocation
+Checked on every authenticated request through Flask-JWT-Extended's blocklist
+loader. Two kinds of entries, both dictionary lookups:
+- single tokens by jti (logout), kept until the token would expire anyway
+- all tokens of a user issued before a whole second (deactivation, password
+  reset), kept for the longest token lifetime. JWT iat is whole seconds, so
+  a token issued in the second of the revocation (e.g. the login right after
+  a password reset) stays valid
+User revocations are also written to users.tokens_valid_after. Without
+Redis, each worker reads that column (and whether the user still exists
+and is active) at most once per USER_STATE_TTL_SECONDS per user, so
+revocations made by other workers or before a restart still apply.
+"""
+
+import os
+import threading
+import time
+from hospital import db
+from hospital.models.user import User
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+PURGE_INTERVAL_SECONDS = 60
+USER_STATE_TTL_SECONDS = 30
+
+
+def load_tokens_valid_after(user_id):
+    """Earliest valid iat for a user from the users table; None when the user is gone or inactive"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    row = db.session.query(User.is_active, User.tokens_valid_after).filter(User.id == user_id).first()
+    if row is None or row.is_active is False:
+        return None
+    return row.tokens_valid_after or 0
+
+
+class MemoryRevocationStore:
+    """Per-process store; revocations from other workers are found through the users table"""
+
+    backend = 'memory'
+
+    def __init__(self, user_ttl_seconds):
+        self.user_ttl_seconds = user_ttl_seconds
+        self._tokens = {}  # jti -> expires_at
+        self._users = {}  # user id -> (revoked_at, expires_at)
+        self._user_states = {}  # user id -> (checked_until, tokens_valid_after or None)
+        self._lock = threading.Lock()
+        self._next_purge = time.time() + PURGE_INTERVAL_SECONDS
+
+    def revoke_token(self, jti, expires_at):
+        with self._lock:
+            self._tokens[jti] = expires_at
+
+    def revoke_user(self, user_id, revoked_at=None):
+        revoked_at = int(revoked_at or time.time())
+        with self._lock:
+            self._users[str(user_id)] = (revoked_at, revoked_at + self.user_ttl_seconds)
+            self._user_states.pop(str(user_id), None)
+
+    def is_revoked(self, payload):
+        now = time.time()
+        if now >= self._next_purge:
+            self._purge(now)
+
+        if payload.get('jti') in self._tokens:
+            return True
+        user_id = str(payload.get('sub'))
+        iat = payload.get('iat', 0)
+        entry = self._users.get(user_id)
+        if entry is not None and iat < entry[0]:
+            return True
+
+        state = self._user_states.get(user_id)
+        if state is None or state[0] <= now:
+            state = (now + USER_STATE_TTL_SECONDS, load_tokens_valid_after(user_id))
+            self._user_states[user_id] = state
+        return state[1] is None or iat < state[1]
+
+    def _purge(self, now):
+        with self._lock:
+            self._next_purge = now + PURGE_INTERVAL_SECONDS
+            self._tokens = {jti: expires_at for jti, expires_at in self._tokens.items() if expires_at > now}
+            self._users = {user_id: entry for user_id, entry in self._users.items() if entry[1] > now}
+            self._user_states = {user_id: state for user_id, state in self._user_states.items() if state[0] > now}
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'revoked_tokens': len(self._tokens),
+            'revoked_users': len(self._users),
+            'cached_user_states': len(self._user_states)
+        }
+
+
+class RedisRevocationStore:
+    """Shared across workers; one MGET per check. Keys expire with the entries.
+
+    Every revocation is mirrored into a local MemoryRevocationStore, which
+    answers checks (with the users table) if Redis is unreachable.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url, user_ttl_seconds, prefix='revoked'):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.user_ttl_seconds = user_ttl_seconds
+        self.prefix = prefix
+        self.local = MemoryRevocationStore(user_ttl_seconds)
+
+    def _token_key(self, jti):
+        return f"{self.prefix}:jti:{jti}"
+
+    def _user_key(self, user_id):
+        return f"{self.prefix}:user:{user_id}"
+
+    def revoke_token(self, jti, expires_at):
+        self.local.revoke_token(jti, expires_at)
+        ttl = max(int(expires_at - time.time()), 1)
+        self.client.set(self._token_key(jti), 1, ex=ttl)
+
+    def revoke_user(self, user_id, revoked_at=None):
+        revoked_at = int(revoked_at or time.time())
+        self.local.revoke_user(user_id, revoked_at)
+        self.client.set(self._user_key(user_id), revoked_at, ex=self.user_ttl_seconds)
+
+    def is_revoked(self, payload):
+        try:
+            token_entry, user_entry = self.client.mget(
+                self._token_key(payload.get('jti')), self._user_key(payload.get('sub'))
+            )
+        except redis.RedisError:
+            return self.local.is_revoked(payload)
+        if token_entry is not None:
+            return True
+        return user_entry is not None and payload.get('iat', 0) < int(user_entry)
+
+    def stats(self):
+        return {'backend': self.backend, **{key: value for key, value in self.local.stats().items() if key != 'backend'}}
+
+
+_store = None
+
+
+def init_token_revocation(app, jwt):
+    """Pick the store (Redis when REDIS_URL is set and redis is installed) and register the blocklist loader"""
+    global _store
+    user_ttl = int(max(
+        app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds(),
+        app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds()
+    ))
+
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url and REDIS_AVAILABLE:
+        _store = RedisRevocationStore(redis_url, user_ttl)
+    else:
+        _store = MemoryRevocationStore(user_ttl)
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return _store.is_revoked(jwt_payload)
+
+
+def get_revocation_store():
+    return _store
+
+
+def revoke_token(payload):
+    """Revoke one decoded token (logout)"""
+    if _store is not None:
+        _store.revoke_token(payload['jti'], payload.get('exp', time.time()))
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to a user so far (deactivation, password reset)
+
+    Written to the users table on its own connection, so it survives restarts
+    whether or not the caller's session is committed.
+    """
+    revoked_at = int(time.time())
+    with db.engine.begin() as connection:
+        connection.execute(db.update(User).where(User.id == int(user_id)).values(tokens_valid_after=revoked_at))
+    if _store is not None:
+        _store.revoke_user(user_id, revoked_at)
@@ -0,0 +1,182 @@
+"""
+Subscription usage counters
+Per-hospital patient, doctor, staff and monthly appointment counts kept in
+hospital_usage. ORM inserts and deletes adjust them in the same flush (and so
+the same transaction) as the rows themselves; bulk_insert_mappings callers
+use adjust_usage(). reconcile() recounts from the source tables and is the
+repair job for drift (raw SQL, manual edits). A hospital's first counter row
+is created by get_usage() in a session of its own, so reading usage never
+commits the caller's work.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import case, event, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from hospital import db
+from hospital.models.user import User
+from hospital.models.doctor import Doctor
+from hospital.models.patient import Patient
+from hospital.models.appointment import Appointment
+from hospital.models.hospital_usage import HospitalUsage
+
+COUNTERS = ['patients', 'doctors', 'staff', 'monthly_appointments']
+
+
+def current_month():
+    return datetime.utcnow().strftime('%Y-%m')
+
+
+def _counter_for(obj):
+    """Which counter a new or deleted row belongs to, if any"""
+    if isinstance(obj, Patient):
+        return 'patients'
+    if isinstance(obj, Doctor):
+        return 'doctors'
+    if isinstance(obj, User):
+        return 'staff' if obj.role != 'patient' else None
+    if isinstance(obj, Appointment):
+        created_at = obj.created_at or datetime.utcnow()
+        return 'monthly_appointments' if created_at.strftime('%Y-%m') == current_month() else None
+    return None
+
+
+def _apply(connection, hospital_id, deltas):
+    """Add deltas to a hospital's counters; returns False if it has no counter row yet"""
+    month = current_month()
+    values = {
+        name: getattr(HospitalUsage, name) + delta
+        for name, delta in deltas.items() if name != 'monthly_appointments'
+    }
+    if 'monthly_appointments' in deltas:
+        # A new month starts counting from zero
+        values['monthly_appointments'] = case(
+            (HospitalUsage.appointments_month == month, HospitalUsage.monthly_appointments + deltas['monthly_appointments']),
+            else_=max(deltas['monthly_appointments'], 0)
+        )
+        values['appointments_month'] = month
+    values['updated_at'] = datetime.utcnow()
+
+    result = connection.execute(
+        update(HospitalUsage).where(HospitalUsage.hospital_id == hospital_id).values(**values)
+    )
+    return result.rowcount > 0
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_usage_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault('usage_deltas', defaultdict(lambda: defaultdict(int)))
+    for objects, step in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            hospital_id = getattr(obj, 'hospital_id', None)
+            counter = _counter_for(obj) if hospital_id else None
+            if counter:
+                deltas[hospital_id][counter] += step
+
+
+@event.listens_for(Session, 'after_flush')
+def _write_usage_deltas(session, flush_context):
+    deltas = session.info.pop('usage_deltas', None)
+    if not deltas:
+        return
+    connection = session.connection()
+    for hospital_id, counters in deltas.items():
+        changed = {name: delta for name, delta in counters.items() if delta}
+        if changed:
+            # Hospitals without a counter row get one, fully counted, on first read
+            _apply(connection, hospital_id, changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_usage_deltas(session):
+    session.info.pop('usage_deltas', None)
+
+
+def adjust_usage(hospital_id, **deltas):
+    """Counter update for rows written with bulk_insert_mappings (not seen by flush events)"""
+    changed = {name: delta for name, delta in deltas.items() if delta}
+    if changed:
+        _apply(db.session.connection(), hospital_id, changed)
+
+
+def count_usage(hospital_id, session=None):
+    """Counts straight from the source tables"""
+    session = session or db.session
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'patients': session.query(Patient).filter_by(hospital_id=hospital_id).count(),
+        'doctors': session.query(Doctor).filter_by(hospital_id=hospital_id).count(),
+        'staff': session.query(User).filter(User.hospital_id == hospital_id, User.role != 'patient').count(),
+        'monthly_appointments': session.query(Appointment).filter(
+            Appointment.hospital_id == hospital_id,
+            Appointment.created_at >= month_start
+        ).count()
+    }
+
+
+def reconcile(hospital_id, session=None):
+    """Recount one hospital and overwrite its counters in session (default db.session, caller commits); returns the drift that was corrected"""
+    session = session or db.session
+    counts = count_usage(hospital_id, session)
+    usage = session.query(HospitalUsage).filter_by(hospital_id=hospital_id).with_for_update().first()
+    if usage is None:
+        usage = HospitalUsage(hospital_id=hospital_id)
+        session.add(usage)
+        drift = dict(counts)
+    else:
+        stored = usage.to_dict()
+        if usage.appointments_month != current_month():
+            stored['monthly_appointments'] = 0
+        drift = {name: counts[name] - (stored[name] or 0) for name in COUNTERS}
+
+    for name in COUNTERS:
+        setattr(usage, name, counts[name])
+    usage.appointments_month = current_month()
+    usage.reconciled_at = datetime.utcnow()
+    return usage, {name: delta for name, delta in drift.items() if delta}
+
+
+def _counters(usage):
+    counters = usage.to_dict()
+    if usage.appointments_month != current_month():
+        counters['monthly_appointments'] = 0
+    return counters
+
+
+def _create_usage_row(hospital_id):
+    """Count a hospital and store its first counter row on a session of its own; returns the counters"""
+    with Session(db.engine) as session:
+        try:
+            usage, _ = reconcile(hospital_id, session)
+            session.commit()
+        except IntegrityError:
+            # Another request created the row first
+            session.rollback()
+            usage = session.query(HospitalUsage).filter_by(hospital_id=hospital_id).first()
+        except OperationalError:
+            # Database locked by the caller's own writes (SQLite); count without storing, next read retries
+            session.rollback()
+            return dict(count_usage(hospital_id), hospital_id=hospital_id, appointments_month=current_month(), reconciled_at=None)
+        return _counters(usage)
+
+
+def get_usage(hospital_id):
+    """Current counters as a dict (one indexed read); created by a full recount the first time"""
+    usage = HospitalUsage.query.filter_by(hospital_id=hospital_id).first()
+    if usage is None:
+        return _create_usage_row(hospital_id)
+    return _counters(usage)
+
+
+def reconcile_all():
+    """Repair job: recount every hospital; returns {hospital_id: drift} for hospitals that drifted"""
+    from hospital.models.hospital import Hospital
+
+    report = {}
+    for (hospital_id,) in db.session.query(Hospital.id).all():
+        _, drift = reconcile(hospital_id)
+        db.session.commit()
+        if drift:
+            report[hospital_id] = drift
+    return report
@@ -0,0 +1,82 @@
+import uuid
+from sqlalchemy import func
+from hospital.models.user import User
+
+# Stays under SQLite's default bound-parameter limit (999)
+IN_CHUNK_SIZE = 500
+
+
+def hospital_email_domain(hospital):
+    """Build the email domain used for auto-generated staff addresses"""
+    if not hospital:
+        return 'hospital'
+    return hospital.name.lower().replace(' ', '').replace('-', '')
+
+
+class EmailAllocator:
+    """Hand out unique firstname.lastname@domain.com addresses for a batch of users.
+
+    All existing addresses under the hospital domain are fetched with a single
+    query on first use; every later allocation is resolved in memory, so a whole
+    import costs one round trip no matter how many staff share a name.
+    """
+
+    def __init__(self, hospital_domain):
+        self.hospital_domain = hospital_domain
+        self.suffix = f"@{hospital_domain}.com"
+        self._taken = None
+        self._next_counter = {}
+
+    def _load_taken(self):
+        # '_' and '%' in the domain are literal; addresses compare case-insensitively
+        suffix = self.suffix.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        rows = User.query.with_entities(User.email).filter(
+            func.lower(User.email).like(f'%{suffix}', escape='\\')
+        ).all()
+        self._taken = {email.lower() for (email,) in rows}
+
+    def reserve(self, email):
+        """Mark an address chosen elsewhere (e.g. given explicitly in the same batch) as taken"""
+        if self._taken is None:
+            self._load_taken()
+        self._taken.add(email.lower())
+
+    def allocate(self, local_part):
+        """Return an unused address for local_part and reserve it for this batch"""
+        if self._taken is None:
+            self._load_taken()
+
+        generated_email = f"{local_part}{self.suffix}"
+        if generated_email.lower() in self._taken:
+            counter = self._next_counter.get(local_part, 1)
+            generated_email = f"{local_part}{counter}{self.suffix}"
+            while generated_email.lower() in self._taken:
+                counter += 1
+                generated_email = f"{local_part}{counter}{self.suffix}"
+            self._next_counter[local_part] = counter + 1
+
+        self._taken.add(generated_email.lower())
+        return generated_email
+
+
+def allocate_unique_ids(column, prefix, count, length=8):
+    """Generate `count` unique prefixed IDs for `column` with one lookup per collision round"""
+    allocated = set()
+    while len(allocated) < count:
+        candidates = set()
+        while len(candidates) < count - len(allocated):
+            candidate = f"{prefix}{str(uuid.uuid4())[:length].upper()}"
+            if candidate not in allocated:
+                candidates.add(candidate)
+
+        candidates = list(candidates)
+        existing = set()
+        for start in range(0, len(candidates), IN_CHUNK_SIZE):
+            chunk = candidates[start:start + IN_CHUNK_SIZE]
+            existing.update(
+                value for (value,) in
+                column.class_.query.with_entities(column).filter(column.in_(chunk)).all()
+            )
+        allocated.update(set(candidates) - existing)
+
+    return list(allocated)
@@ -0,0 +1,80 @@
+from functools import wraps
+from flask import g, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from hospital.models.user import User
+
+
+def user_claims(user):
+    """Additional JWT claims issued at login so routes can skip the User lookup"""
+    return {'hospital_id': user.hospital_id, 'role': user.role}
+
+
+class CurrentUser:
+    """The authenticated user as seen by a request.
+
+    id, hospital_id and role come straight from the token claims. Any other
+    attribute (full_name, email, ...) loads the User row on first access,
+    once per request.
+    """
+
+    def __init__(self, user_id, hospital_id, role, user=None):
+        self.id = user_id
+        self.hospital_id = hospital_id
+        self.role = role
+        self._user = user
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = User.query.get(self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__
+        user = self.user
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
+
+def get_current_user():
+    """CurrentUser for the request's token.
+
+    Claims are trusted: tokens of deleted, deactivated or revoked users are
+    rejected by the revocation check (token_revocation) before the route
+    runs. Tokens without claims (refresh tokens, tokens issued before claims
+    were added) load the User, and give None if it no longer exists.
+    """
+    claims = get_jwt()
+    # Keyed by token, as one app context can span several requests (tests, scripts)
+    if g.get('current_user_jti') != claims.get('jti') or 'current_user' not in g:
+        g.current_user_jti = claims.get('jti')
+        identity = get_jwt_identity()
+        if identity is None:
+            g.current_user = None
+        elif 'hospital_id' in claims and 'role' in claims:
+            g.current_user = CurrentUser(int(identity), claims['hospital_id'], claims['role'])
+        else:
+            # Refresh token, or issued before claims were added: fall back to the database
+            user = User.query.get(int(identity))
+            g.current_user = CurrentUser(user.id, user.hospital_id, user.role, user) if user else None
+    return g.current_user
+
+
+def hospital_role_required(*roles):
+    """jwt_required() for hospital users, optionally limited to the given roles"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            user = get_current_user()
+
+            if not user or not user.hospital_id:
+                return jsonify({'error': 'User not associated with any hospital'}), 404
+
+            if roles and user.role not in roles:
+                return jsonify({'error': f"{' or '.join(roles).capitalize()} access required"}), 403
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
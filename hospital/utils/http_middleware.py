@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import threading
+from flask import request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'text/html', 'text/plain', 'text/csv', 'text/css'}
+
+
+class TransferStats:
+    """Bytes the app would have sent vs. bytes it did send, for this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.not_modified = 0
+        self.compressed = 0
+        self.original_bytes = 0
+        self.sent_bytes = 0
+
+    def record(self, original, sent, not_modified=False, compressed=False):
+        with self._lock:
+            self.responses += 1
+            self.not_modified += int(not_modified)
+            self.compressed += int(compressed)
+            self.original_bytes += original
+            self.sent_bytes += sent
+
+    def report(self):
+        saved = self.original_bytes - self.sent_bytes
+        return {
+            'responses': self.responses,
+            'not_modified_responses': self.not_modified,
+            'compressed_responses': self.compressed,
+            'original_bytes': self.original_bytes,
+            'sent_bytes': self.sent_bytes,
+            'saved_bytes': saved,
+            'saved_percentage': round(saved / self.original_bytes * 100, 1) if self.original_bytes else 0.0
+        }
+
+
+transfer_stats = TransferStats()
+
+
+def _accepted_encoding():
+    accepted = request.accept_encodings
+    if BROTLI_AVAILABLE and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding, gzip_level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=gzip_level)
+
+
+def install_http_middleware(app):
+    """Weak ETags with 304 answers for GET responses, and gzip/brotli for large bodies"""
+    use_etags = app.config.get('HTTP_ETAGS', True)
+    use_compression = app.config.get('HTTP_COMPRESSION', True)
+    min_size = app.config.get('HTTP_COMPRESSION_MIN_SIZE', 1024)
+    gzip_level = app.config.get('HTTP_GZIP_LEVEL', 6)
+
+    @app.after_request
+    def optimize_response(response):
+        # Streamed bodies (the chatbot's server-sent events) must not be buffered
+        if response.is_streamed or response.mimetype == 'text/event-stream':
+            return response
+        if response.direct_passthrough or response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+
+        data = response.get_data()
+        original_size = len(data)
+
+        if use_etags and request.method in ('GET', 'HEAD'):
+            if not response.get_etag()[0]:
+                response.set_etag(hashlib.blake2b(data, digest_size=16).hexdigest(), weak=True)
+            if 'Cache-Control' not in response.headers and 'Authorization' in request.headers:
+                # Per-user data: the browser may keep it but must revalidate, shared caches may not
+                response.headers['Cache-Control'] = 'private, no-cache'
+            response.make_conditional(request)
+            if response.status_code == 304:
+                transfer_stats.record(original_size, 0, not_modified=True)
+                return response
+
+        encoding = _accepted_encoding() if use_compression else None
+        if encoding and original_size >= min_size and response.mimetype in COMPRESSIBLE_TYPES:
+            compressed = _compress(data, encoding, gzip_level)
+            if len(compressed) < original_size:
+                response.set_data(compressed)
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                transfer_stats.record(original_size, len(compressed), compressed=True)
+                return response
+
+        transfer_stats.record(original_size, original_size)
+        return response
@@ -0,0 +1,118 @@
+import hashlib
+from hospital import db
+from hospital.models.import_record import ImportBatch, ImportedRow
+
+
+def file_content_hash(file_content):
+    """sha256 of the raw uploaded bytes"""
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def row_hash(*values):
+    """Short stable hash of a row's values (None/NaN and surrounding whitespace ignored)"""
+    normalized = []
+    for value in values:
+        if value is None or value != value:  # NaN never equals itself
+            normalized.append('')
+        else:
+            normalized.append(str(value).strip())
+    return hashlib.blake2b('\x1f'.join(normalized).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ImportLedger:
+    """Remembers which rows were already applied for a hospital and entity.
+
+    The per-row ledger is read with one query into a dict of
+    key_hash -> (row id, content_hash), so unchanged rows are skipped with a
+    dict lookup and new or changed rows are written back with bulk
+    insert/update at the end of the import. The ledger only says what an
+    import wrote; callers also check that the record still exists, so deleted
+    or deactivated records are recreated.
+    """
+
+    def __init__(self, hospital_id, entity, rows=None):
+        self.hospital_id = hospital_id
+        self.entity = entity
+        self._rows = rows  # Loaded on first use unless given
+        self._pending = {}
+
+    def find_batch(self, file_hash):
+        """Return the earlier batch for exactly this file, if any"""
+        return ImportBatch.query.filter_by(
+            hospital_id=self.hospital_id,
+            entity=self.entity,
+            file_hash=file_hash
+        ).first()
+
+    def _load(self):
+        rows = db.session.query(ImportedRow.key_hash, ImportedRow.id, ImportedRow.content_hash).filter_by(
+            hospital_id=self.hospital_id,
+            entity=self.entity
+        ).all()
+        self._rows = {key_hash: (row_id, content_hash) for key_hash, row_id, content_hash in rows}
+
+    def is_unchanged(self, key_hash, content_hash, live):
+        """True when this exact row was already applied and its record (live) still exists"""
+        if not live:
+            return False
+        if self._rows is None:
+            self._load()
+        current = self._pending.get(key_hash)
+        if current is None and key_hash in self._rows:
+            current = self._rows[key_hash][1]
+        return current == content_hash
+
+    def was_imported(self, key_hash):
+        """True when a row with this natural key came from an earlier import"""
+        if self._rows is None:
+            self._load()
+        return key_hash in self._rows
+
+    def record(self, key_hash, content_hash):
+        """Stage a row as applied; call only once the row's changes are in the session. Written by finish()"""
+        self._pending[key_hash] = content_hash
+
+    def pending_mappings(self, batch_id):
+        """Staged rows split into (inserts, updates) for the bulk writes"""
+        if self._rows is None:
+            self._load()
+
+        inserts = []
+        updates = []
+        for key_hash, content_hash in self._pending.items():
+            if key_hash in self._rows:
+                updates.append({'id': self._rows[key_hash][0], 'content_hash': content_hash, 'batch_id': batch_id})
+            else:
+                inserts.append({
+                    'hospital_id': self.hospital_id,
+                    'entity': self.entity,
+                    'key_hash': key_hash,
+                    'content_hash': content_hash,
+                    'batch_id': batch_id
+                })
+        return inserts, updates
+
+    def finish(self, file_hash, filename, row_count, user_id, failed_count=0):
+        """Write the staged rows, and the batch for this file when every row applied, to the session (the caller commits)"""
+        batch = None
+        if not failed_count:
+            # Lets find_batch() skip a re-upload of this file; a file with failed rows can be fixed and re-sent
+            batch = ImportBatch(
+                hospital_id=self.hospital_id,
+                entity=self.entity,
+                file_hash=file_hash,
+                filename=filename,
+                row_count=row_count,
+                applied_count=len(self._pending),
+                created_by=user_id
+            )
+            db.session.add(batch)
+            db.session.flush()
+
+        inserts, updates = self.pending_mappings(batch.id if batch else None)
+        if inserts:
+            db.session.bulk_insert_mappings(ImportedRow, inserts)
+        if updates:
+            db.session.bulk_update_mappings(ImportedRow, updates)
+
+        return batch
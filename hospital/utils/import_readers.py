@@ -0,0 +1,92 @@
+import io
+import pandas as pd
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    load_workbook = None
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _pick_sheet(workbook, entity=None, sheet_name=None):
+    """Pick the worksheet for an entity.
+
+    An explicit sheet_name wins; otherwise a sheet named after the entity
+    (e.g. "Medicines" for entity "medicines") is used, so one workbook can carry
+    a sheet per entity. Falls back to the active sheet.
+    """
+    if sheet_name:
+        if sheet_name not in workbook.sheetnames:
+            raise ValueError(f'Sheet "{sheet_name}" not found. Available sheets: {", ".join(workbook.sheetnames)}')
+        return workbook[sheet_name]
+
+    if entity:
+        wanted = {entity.lower(), entity.lower().rstrip('s')}
+        for name in workbook.sheetnames:
+            if name.strip().lower() in wanted:
+                return workbook[name]
+
+    return workbook.active
+
+
+def iter_excel_chunks(file_content, entity=None, sheet_name=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream an .xlsx sheet as DataFrames of at most chunk_size rows.
+
+    The workbook is opened with openpyxl read_only mode and walked with
+    iter_rows(values_only=True), so cells are never materialized as objects
+    and memory stays bounded by one chunk. Blank rows are dropped, but each
+    row keeps its sheet position as index, so `index + 2` is still the
+    spreadsheet row number.
+    """
+    workbook = load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
+    try:
+        sheet = _pick_sheet(workbook, entity, sheet_name)
+        rows = sheet.iter_rows(values_only=True)
+
+        header = next(rows, None)
+        if header is None:
+            yield pd.DataFrame()
+            return
+        columns = [str(value).strip() if value is not None else '' for value in header]
+        keep = [position for position, column in enumerate(columns) if column]
+        columns = [columns[position] for position in keep]
+
+        buffer = []
+        index = []
+        chunks = 0
+        for position_in_sheet, values in enumerate(rows):  # 0 is the row after the header
+            if values is None or all(value is None for value in values):
+                continue  # read-only sheets often report trailing blank rows
+            buffer.append([values[position] if position < len(values) else None for position in keep])
+            index.append(position_in_sheet)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns, index=index)
+                chunks += 1
+                buffer = []
+                index = []
+
+        if buffer or chunks == 0:
+            yield pd.DataFrame(buffer, columns=columns, index=pd.Index(index, dtype='int64'))
+    finally:
+        workbook.close()
+
+
+def iter_import_chunks(file_content, file_ext, entity=None, sheet_name=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield an uploaded CSV/Excel file as DataFrame chunks with continuous row indexes"""
+    if file_ext == '.csv':
+        yield from pd.read_csv(io.BytesIO(file_content), chunksize=chunk_size)
+    elif file_ext == '.xlsx' and OPENPYXL_AVAILABLE:
+        yield from iter_excel_chunks(file_content, entity, sheet_name, chunk_size)
+    else:
+        # Legacy .xls is not readable by openpyxl; fall back to pandas
+        yield pd.read_excel(io.BytesIO(file_content), sheet_name=sheet_name or 0)
+
+
+def read_import_file(file_content, file_ext, entity=None, sheet_name=None):
+    """Read an uploaded CSV/Excel file into a single DataFrame via the streaming readers"""
+    if file_ext == '.csv':
+        return pd.read_csv(io.BytesIO(file_content))
+    return pd.concat(list(iter_import_chunks(file_content, file_ext, entity, sheet_name)))
@@ -0,0 +1,104 @@
+from flask import request
+import pandas as pd
+
+MEDICINE_DATE_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%y', '%d/%m/%y']
+PATIENT_DATE_FORMATS = ['%d-%m-%Y', '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d']
+
+
+def is_dry_run():
+    """Check whether the current import request asked for validation only (?dry_run=1)"""
+    return request.args.get('dry_run', '').lower() in ['1', 'true', 'yes', 'on']
+
+
+class ImportValidator:
+    """Column-at-a-time validation of an import file without touching the database.
+
+    Every check runs over a whole pandas column and records failing rows under
+    report()['errors'][column][code] (or 'warnings' for rows the real import
+    would still accept), so a dry run costs a handful of vector operations and
+    at most one lookup per DB uniqueness check instead of per-row queries.
+    """
+
+    def __init__(self, df, max_rows_listed=20):
+        self.df = df
+        self.max_rows_listed = max_rows_listed
+        self.errors = {}
+        self.warnings = {}
+        self.invalid_mask = pd.Series(False, index=df.index)
+
+    def text(self, column):
+        """Column as stripped strings with missing values as ''"""
+        if column not in self.df.columns:
+            return pd.Series('', index=self.df.index)
+        values = self.df[column].astype(str).str.strip()
+        return values.mask(self.df[column].isna() | values.str.lower().eq('nan'), '')
+
+    def _record(self, column, code, mask, warning=False):
+        if not mask.any():
+            return
+        rows = (self.df.index[mask.values] + 2).tolist()  # +2 for 0-based index and header row
+        target = self.warnings if warning else self.errors
+        target.setdefault(column, {})[code] = {
+            'count': len(rows),
+            'rows': rows[:self.max_rows_listed]
+        }
+        if not warning:
+            self.invalid_mask |= mask
+
+    def blank(self, column):
+        """Mask of rows where column is missing or empty"""
+        return self.text(column).eq('')
+
+    def require(self, *columns):
+        for column in columns:
+            self._record(column, 'missing', self.blank(column))
+
+    def numeric(self, column, min_value=None, integer=False, warning=False):
+        if column not in self.df.columns:
+            return
+        present = ~self.blank(column)
+        values = pd.to_numeric(self.df[column], errors='coerce')
+        self._record(column, 'not_a_number', present & values.isna(), warning)
+        if integer:
+            self._record(column, 'not_an_integer', present & values.notna() & (values % 1 != 0), warning)
+        if min_value is not None:
+            self._record(column, 'below_minimum', present & (values < min_value), warning)
+
+    def dates(self, column, formats, warning=False):
+        if column not in self.df.columns:
+            return
+        text = self.text(column)
+        parsed = pd.Series(pd.NaT, index=self.df.index)
+        for fmt in formats:
+            parsed = parsed.fillna(pd.to_datetime(text, format=fmt, errors='coerce'))
+        self._record(column, 'invalid_date', text.ne('') & parsed.isna(), warning)
+
+    def choices(self, column, allowed, warning=False):
+        text = self.text(column)
+        self._record(column, 'invalid_choice', text.ne('') & ~text.isin(allowed), warning)
+
+    def min_digits(self, column, digits):
+        text = self.text(column)
+        counts = text.str.count(r'\d')
+        self._record(column, 'too_few_digits', text.ne('') & (counts < digits))
+
+    def unique_in_file(self, column, values=None, warning=False):
+        values = self.text(column).str.lower() if values is None else values
+        present = values.ne('')
+        self._record(column, 'duplicate_in_file', present & values.duplicated(keep='first'), warning)
+
+    def not_in(self, column, existing, values=None, code='exists_in_db', warning=False):
+        values = self.text(column) if values is None else values
+        self._record(column, code, values.ne('') & values.isin(list(existing)), warning)
+
+    def report(self):
+        total_rows = len(self.df)
+        invalid_rows = int(self.invalid_mask.sum())
+        return {
+            'dry_run': True,
+            'total_rows': total_rows,
+            'valid_rows': total_rows - invalid_rows,
+            'invalid_rows': invalid_rows,
+            'errors': self.errors,
+            'warnings': self.warnings
+        }
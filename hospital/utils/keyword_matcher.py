@@ -0,0 +1,118 @@
+import threading
+from collections import deque
+
+class KeywordMatches:
+    """Result of one scan: canonical terms found per category, in order of first occurrence"""
+
+    def __init__(self, found):
+        self._found = found  # category -> {canonical: matched text}
+
+    def has(self, category):
+        return bool(self._found.get(category))
+
+    def get(self, category):
+        return list(self._found.get(category, {}))
+
+    def synonyms(self, category):
+        """Matched lay terms that were mapped to a different canonical term"""
+        return {
+            term: canonical
+            for canonical, term in self._found.get(category, {}).items()
+            if term != canonical
+        }
+
+    def to_dict(self):
+        return {category: list(terms) for category, terms in self._found.items()}
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over every registered vocabulary.
+
+    Services register their keyword lists under a category at import time;
+    the automaton is compiled once on first use and each match() is a single
+    pass over the text that reports every (possibly overlapping) term of every
+    category, so cost grows with the text rather than the vocabulary size.
+    Terms are matched as substrings, like the `keyword in message` checks
+    this replaces.
+    """
+
+    def __init__(self):
+        self._vocabularies = {}
+        self._lock = threading.Lock()
+        # (goto, fail, output, terms), replaced as a whole so readers never see a mix
+        self._automaton = None
+
+    def register(self, category, terms, synonyms=None):
+        """Add (or replace) a vocabulary; synonyms map extra terms onto entries of terms"""
+        entries = {term.lower(): term for term in terms}
+        for synonym, canonical in (synonyms or {}).items():
+            if canonical in terms:
+                entries.setdefault(synonym.lower(), canonical)
+        with self._lock:
+            self._vocabularies[category] = entries
+            self._automaton = None
+
+    def _build(self):
+        goto = [{}]
+        output = [[]]
+        terms = {}
+
+        for category, entries in self._vocabularies.items():
+            for term, canonical in entries.items():
+                node = 0
+                for char in term:
+                    if char not in goto[node]:
+                        goto.append({})
+                        output.append([])
+                        goto[node][char] = len(goto) - 1
+                    node = goto[node][char]
+                output[node].append((category, canonical, term))
+            terms[category] = tuple(entries.items())  # For lookup_partial()
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] = output[child] + output[fail[child]]
+
+        return goto, fail, output, terms
+
+    def _get_automaton(self):
+        automaton = self._automaton
+        if automaton is None:
+            with self._lock:
+                if self._automaton is None:
+                    self._automaton = self._build()
+                automaton = self._automaton
+        return automaton
+
+    def match(self, text):
+        """Scan text once and return every registered term it contains"""
+        goto, fail, output, _ = self._get_automaton()
+        found = {}
+        node = 0
+        for char in (text or '').lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for category, canonical, term in output[node]:
+                found.setdefault(category, {}).setdefault(canonical, term)
+        return KeywordMatches(found)
+
+    def lookup_partial(self, fragment, category):
+        """Terms of a category that contain fragment as a substring (e.g. 'ache' -> 'headache')"""
+        key = ' '.join((fragment or '').lower().split())
+        if not key:
+            return []
+        terms = self._get_automaton()[3].get(category, ())
+        return list(dict.fromkeys(canonical for term, canonical in terms if key in term))
+
+
+# Shared by every service; vocabularies register themselves where they are defined
+keyword_matcher = KeywordMatcher()
@@ -0,0 +1,19 @@
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.db_query_count = g.get('db_query_count', 0) + 1
+
+
+def install_query_counter(app):
+    """Report the number of SQL statements each request ran in an X-DB-Query-Count header"""
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+
+    @app.after_request
+    def add_query_count_header(response):
+        response.headers['X-DB-Query-Count'] = str(g.get('db_query_count', 0))
+        return response
@@ -0,0 +1,176 @@
+"""
+Compiled row serializers
+List endpoints select only the columns they return (query.with_entities)
+and turn each result row into a dict with a function generated once per
+model and field set, instead of loading ORM objects and calling to_dict().
+Output matches the model's to_dict() for the same fields.
+
+    plan = medicine_rows.plan()
+    rows = query.with_entities(*plan.columns).all()
+    medicines = plan.dump_all(rows)
+
+List views leave out each model's heavy (long text/JSON) fields unless the
+client asks for them with ?fields=name,composition or ?fields=all.
+"""
+
+import threading
+from flask import request
+from hospital import db
+from hospital.models import medicine as medicine_fields
+from hospital.models.medicine import Medicine, StockMovement
+from hospital.models.patient import Patient, age
+from hospital.models.user import User
+from hospital.models.doctor import Doctor
+
+DATE_TYPES = (db.Date, db.DateTime)
+MAX_CACHED_PLANS = 64
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class SerializerPlan:
+    """Columns to select plus the compiled row -> dict function for one field set"""
+
+    def __init__(self, columns, function, fields):
+        self.columns = columns
+        self.fields = fields
+        self.dump = function
+
+    def dump_all(self, rows):
+        dump = self.dump
+        return [dump(row) for row in rows]
+
+
+class RowSerializer:
+    """Field definitions for one model; plans are compiled on first use and cached"""
+
+    def __init__(self, model, columns, computed=None, heavy=()):
+        self.model = model
+        self.columns = list(columns)
+        # name -> (input column names, function of those values)
+        self.computed = dict(computed or {})
+        self.fields = self.columns + list(self.computed)
+        # Fields list views skip unless asked for
+        self.heavy = tuple(heavy)
+        self.list_fields = tuple(field for field in self.fields if field not in self.heavy)
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def plan(self, fields=None, offset=0):
+        """Plan for a subset of fields (all by default); offset is where this model's columns start in the row"""
+        if fields is not None:
+            wanted = set(fields)
+            fields = tuple(field for field in self.fields if field in wanted)
+        key = (fields, offset)
+        plan = self._plans.get(key)
+        if plan is None:
+            with self._lock:
+                plan = self._plans.get(key) or self._compile(tuple(self.fields) if fields is None else fields, offset)
+                if len(self._plans) < MAX_CACHED_PLANS:  # ?fields= combinations are client-chosen
+                    self._plans[key] = plan
+        return plan
+
+    def _compile(self, fields, offset):
+        # Source columns: the requested ones plus whatever the computed fields read
+        sources = [name for name in self.columns if name in fields]
+        for name in fields:
+            for source in self.computed.get(name, ((), None))[0]:
+                if source not in sources:
+                    sources.append(source)
+        index = {name: offset + position for position, name in enumerate(sources)}
+
+        namespace = {}
+        items = []
+        for name in fields:
+            if name in self.computed:
+                inputs, function = self.computed[name]
+                namespace[f'_{name}'] = function
+                arguments = ', '.join(f'row[{index[source]}]' for source in inputs)
+                items.append(f'{name!r}: _{name}({arguments})')
+            elif isinstance(getattr(self.model, name).type, DATE_TYPES):
+                value = f'row[{index[name]}]'
+                items.append(f'{name!r}: {value}.isoformat() if {value} is not None else None')
+            else:
+                items.append(f'{name!r}: row[{index[name]}]')
+
+        source = 'def dump(row):\n    return {' + ', '.join(items) + '}\n'
+        exec(compile(source, f'<serializer {self.model.__name__}>', 'exec'), namespace)
+        columns = [getattr(self.model, name) for name in sources]
+        return SerializerPlan(columns, namespace['dump'], fields)
+
+
+def parse_fields(available, default=None):
+    """Field names from ?fields=, checked against available; default (or all) when absent, all for ?fields=all"""
+    value = request.args.get('fields', '').strip()
+    if not value:
+        return tuple(available if default is None else default)
+    if value == 'all':
+        return tuple(available)
+
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names:
+        raise InvalidFields(f"No fields requested. Available: {', '.join(available)}")
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise InvalidFields(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+    return tuple(names)
+
+
+def requested_fields(serializer, extra=(), required=()):
+    """?fields= for a serializer's list view; returns (model fields, requested extras).
+
+    extra: names the endpoint adds itself (e.g. a nested 'user'), included by default.
+    required: model fields the endpoint needs internally, always selected.
+    """
+    names = parse_fields(serializer.fields + list(extra), serializer.list_fields + tuple(extra))
+    fields = [name for name in names if name in serializer.fields]
+    fields += [name for name in required if name not in fields]
+    return tuple(fields), {name for name in names if name in extra}
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}"
+
+
+medicine_rows = RowSerializer(Medicine, [
+    'id', 'hospital_id', 'name', 'generic_name', 'brand_name', 'manufacturer', 'category',
+    'therapeutic_class', 'composition', 'strength', 'dosage_form', 'batch_number', 'quantity_in_stock',
+    'unit_of_measurement', 'reorder_level', 'max_stock_level', 'cost_price', 'selling_price', 'mrp',
+    'discount_percentage', 'manufacturing_date', 'expiry_date', 'storage_location', 'storage_temperature',
+    'drug_license_number', 'schedule', 'prescription_required', 'is_active', 'is_banned',
+    'created_at', 'updated_at'
+], computed={
+    'is_expired': (('expiry_date',), medicine_fields.is_expired),
+    'days_to_expiry': (('expiry_date',), medicine_fields.days_to_expiry),
+    'is_low_stock': (('quantity_in_stock', 'reorder_level'), medicine_fields.is_low_stock),
+    'stock_status': (('quantity_in_stock', 'reorder_level', 'max_stock_level'), medicine_fields.stock_status),
+    'profit_margin': (('cost_price', 'selling_price'), medicine_fields.profit_margin),
+}, heavy=('composition',))
+
+stock_movement_rows = RowSerializer(StockMovement, [
+    'id', 'medicine_id', 'hospital_id', 'movement_type', 'quantity', 'unit_cost', 'total_cost',
+    'reference_type', 'reference_id', 'supplier_name', 'batch_number', 'expiry_date', 'notes',
+    'created_by', 'created_at'
+])
+
+patient_rows = RowSerializer(Patient, [
+    'id', 'patient_id', 'user_id', 'date_of_birth', 'gender', 'blood_group', 'address',
+    'emergency_contact_name', 'emergency_contact_phone', 'medical_history', 'allergies',
+    'hospital_id', 'created_at', 'updated_at'
+], computed={
+    'age': (('date_of_birth',), age),
+}, heavy=('address', 'medical_history', 'allergies'))
+
+user_rows = RowSerializer(User, [
+    'id', 'email', 'first_name', 'last_name', 'phone', 'role', 'is_active', 'created_at'
+], computed={
+    'full_name': (('first_name', 'last_name'), _full_name),
+})
+
+doctor_rows = RowSerializer(Doctor, [
+    'id', 'doctor_id', 'user_id', 'specialization', 'qualification', 'experience_years',
+    'license_number', 'consultation_fee', 'available_days', 'available_hours', 'is_available',
+    'rating', 'total_patients', 'created_at'
+])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark
+Usage: python scripts/benchmark_login.py [logins] [concurrency] [rounds]
+
+Simulates a shift change: `concurrency` request threads log in `logins` times
+in total. Compares bcrypt checks inline on the request threads with the
+AuthService pool (AUTH_HASH_WORKERS / AUTH_MAX_PENDING), and shows what a
+lower work factor costs per check. No database is needed.
+"""
+
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+from hospital.services.auth_service import AuthBusy, PasswordHasher, hash_password
+
+PASSWORD = 'shift-change-123'
+
+
+def run(label, check, logins, concurrency):
+    latencies = []
+    rejected = 0
+
+    def login(_):
+        nonlocal rejected
+        started = time.perf_counter()
+        try:
+            assert check()
+        except AuthBusy:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as request_threads:
+        list(request_threads.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000 if latencies else 0
+    print(f"  {label:<28} {len(latencies) / elapsed:8.1f} logins/s   "
+          f"p50 {p50:7.1f} ms   p95 {p95:7.1f} ms   rejected {rejected}")
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 12
+
+    print(f"🔐 {logins} logins from {concurrency} request threads, bcrypt cost {rounds}")
+    stored_hash = hash_password(PASSWORD, rounds).encode('utf-8')
+
+    run('inline bcrypt.checkpw', lambda: bcrypt.checkpw(PASSWORD.encode('utf-8'), stored_hash), logins, concurrency)
+
+    hasher = PasswordHasher(rounds=rounds)
+    run(f'pool ({hasher.workers} workers)', lambda: hasher.verify(PASSWORD, stored_hash.decode('utf-8')),
+        logins, concurrency)
+
+    print("\n📊 Cost of one check per work factor:")
+    for cost in range(max(rounds - 2, 4), rounds + 2):
+        sample_hash = hash_password(PASSWORD, cost).encode('utf-8')
+        started = time.perf_counter()
+        bcrypt.checkpw(PASSWORD.encode('utf-8'), sample_hash)
+        print(f"  cost {cost:>2}: {(time.perf_counter() - started) * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
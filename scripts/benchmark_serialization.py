@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Medicine list serialization benchmark
+Usage: python scripts/benchmark_serialization.py [hospital_id] [repeat]
+
+Builds the medicine list payload for one hospital (the first one by default)
+the old way (ORM objects + to_dict() + stdlib json) and the new way
+(column-projected rows + compiled serializer + the app's JSON provider),
+and prints the time per build for each.
+"""
+
+import sys
+import os
+import json
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import create_app, db
+from hospital.models import Hospital, Medicine
+from hospital.utils.serialization import medicine_rows
+
+
+def timed(build, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        size = len(build())
+    return (time.perf_counter() - started) / repeat, size
+
+
+def main():
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    
+    app = create_app()
+    with app.app_context():
+        hospital_id = int(sys.argv[1]) if len(sys.argv) > 1 else db.session.query(Hospital.id).order_by(Hospital.id).scalar()
+        query = Medicine.query.filter_by(hospital_id=hospital_id, is_active=True)
+        count = query.count()
+        print(f"💊 Serializing {count} medicines of hospital {hospital_id}, {repeat} runs each...")
+        
+        def orm_to_dict():
+            db.session.expunge_all()  # Each request loads fresh objects
+            return json.dumps([medicine.to_dict() for medicine in query.all()], sort_keys=True)
+        
+        plan = medicine_rows.plan()
+        
+        def compiled_rows():
+            return app.json.dumps(plan.dump_all(query.with_entities(*plan.columns).all()))
+        
+        before, before_size = timed(orm_to_dict, repeat)
+        after, after_size = timed(compiled_rows, repeat)
+        print(f"  to_dict + json:           {before * 1000:8.1f} ms  ({before_size} chars)")
+        print(f"  rows + {type(app.json).__name__}: {after * 1000:8.1f} ms  ({after_size} chars)")
+        print(f"✅ {before / after:.1f}x faster" if after else "✅ Done")
+
+if __name__ == '__main__':
+    main()
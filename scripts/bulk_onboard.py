@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Bulk onboarding of a hospital chain from a JSON bundle
+Usage: python scripts/bulk_onboard.py bundle.json [hash_workers]
+
+Bundle format: {"hospitals": [{"name", "address", "phone", "email",
+"admin": {...}, "subscription": {...}, "staff": [...], "doctors": [...],
+"patients": [...], "medicines": [...]}]}
+Each hospital is loaded in its own transaction.
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import create_app
+from hospital.services.bulk_onboarding import BulkOnboardingService
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/bulk_onboard.py bundle.json [hash_workers]")
+        sys.exit(1)
+    
+    with open(sys.argv[1], encoding='utf-8') as bundle_file:
+        bundle = json.load(bundle_file)
+    hash_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    
+    app = create_app()
+    with app.app_context():
+        print(f"🏥 Onboarding {len(bundle.get('hospitals', []))} hospitals...")
+        report = BulkOnboardingService(hash_workers=hash_workers).load(bundle)
+        
+        for result in report['hospitals']:
+            if result['success']:
+                counts = result['counts']
+                print(f"✅ {result['name']}: {counts['users']} users, {counts['doctors']} doctors, "
+                      f"{counts['patients']} patients, {counts['medicines']} medicines ({result['seconds']}s)")
+            else:
+                print(f"❌ {result['name']}: {result['error']}")
+        
+        totals = report['totals']
+        print(f"\n📊 Loaded {totals['hospitals']} hospitals, {totals['users']} users, "
+              f"{totals['medicines']} medicines in {report['elapsed_seconds']}s "
+              f"({report['rows_per_second']} rows/s)")
+        
+        if report['failed_hospitals']:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Batch risk scoring job
+Usage: python scripts/compute_risk_scores.py [--full] [hospital_id]
+
+Scores every patient of each hospital (or one hospital) and stores the
+results in patient_risk_scores. Without --full only patients whose data
+changed since their last score are recomputed.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import create_app, db
+from hospital.models import Hospital
+from hospital.services.risk_engine import BatchRiskEngine
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--full']
+    full = '--full' in sys.argv[1:]
+    
+    app = create_app()
+    with app.app_context():
+        db.create_all()  # Make sure patient_risk_scores exists
+        
+        if args:
+            hospital_ids = [int(args[0])]
+        else:
+            hospital_ids = [hospital_id for (hospital_id,) in db.session.query(Hospital.id).all()]
+        
+        print(f"🩺 Scoring patients for {len(hospital_ids)} hospitals ({'full' if full else 'incremental'})...")
+        for hospital_id in hospital_ids:
+            try:
+                summary = BatchRiskEngine(hospital_id).run(full=full)
+                print(f"✅ Hospital {hospital_id}: {summary['recomputed']} recomputed, "
+                      f"{summary['unchanged']} unchanged of {summary['patients']} patients "
+                      f"({summary['elapsed_seconds']}s)")
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Hospital {hospital_id}: {e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Usage counter repair job
+Usage: python scripts/repair_usage_counters.py [hospital_id]
+
+Recounts patients, doctors, staff and this month's appointments from the
+source tables and overwrites hospital_usage, printing any drift it fixed.
+Safe to run at any time (e.g. nightly from cron).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import create_app, db
+from hospital.services.usage_counters import reconcile, reconcile_all
+
+def main():
+    app = create_app()
+    with app.app_context():
+        db.create_all()  # Make sure hospital_usage exists
+        
+        if sys.argv[1:]:
+            hospital_id = int(sys.argv[1])
+            _, drift = reconcile(hospital_id)
+            db.session.commit()
+            report = {hospital_id: drift} if drift else {}
+        else:
+            print("🔢 Reconciling usage counters for all hospitals...")
+            report = reconcile_all()
+        
+        if not report:
+            print("✅ All usage counters match the source tables")
+            return
+        
+        for hospital_id, drift in report.items():
+            changes = ', '.join(f"{name} {delta:+d}" for name, delta in drift.items())
+            print(f"🔧 Hospital {hospital_id}: {changes}")
+        print(f"✅ Repaired {len(report)} hospitals")
+
+if __name__ == '__main__':
+    main()
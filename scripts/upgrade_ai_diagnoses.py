@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+AI diagnosis history upgrade
+Usage: python scripts/upgrade_ai_diagnoses.py [days]
+
+db.create_all() creates missing tables but never alters existing ones, so a
+database created before diagnosis history was stored still has an
+ai_diagnoses table without patient_id or the history indexes. This adds
+whatever is missing, creates the daily condition counter table, and
+rebuilds the last `days` (default 7) of condition counts for every hospital
+from the stored diagnoses. Safe to run more than once; also useful later to
+repair the counters.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import create_app, db
+from hospital.models.ai_diagnosis import AIDiagnosis
+from hospital.models.hospital import Hospital
+from hospital.services.diagnosis_history import DiagnosisHistory
+
+def upgrade_schema():
+    """Add ai_diagnoses.patient_id and the history indexes when missing; returns what was changed"""
+    changes = []
+    inspector = db.inspect(db.engine)
+
+    columns = {column['name'] for column in inspector.get_columns('ai_diagnoses')}
+    if 'patient_id' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(db.text(
+                'ALTER TABLE ai_diagnoses ADD COLUMN patient_id INTEGER REFERENCES patients(id)'
+            ))
+        changes.append('column ai_diagnoses.patient_id')
+
+    indexes = {index['name'] for index in inspector.get_indexes('ai_diagnoses')}
+    for index in AIDiagnosis.__table__.indexes:
+        if index.name not in indexes:
+            index.create(db.engine)
+            changes.append(f'index {index.name}')
+
+    return changes
+
+def main():
+    days = int(sys.argv[1]) if sys.argv[1:] else 7
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()  # New tables, including ai_diagnosis_condition_counts
+
+        print("🩺 Checking ai_diagnoses schema...")
+        changes = upgrade_schema()
+        for change in changes:
+            print(f"🔧 Added {change}")
+        if not changes:
+            print("✅ Schema already up to date")
+
+        print(f"🔢 Rebuilding condition counts for the last {days} days...")
+        for (hospital_id,) in db.session.query(Hospital.id).all():
+            rows = DiagnosisHistory(hospital_id).rebuild_counts(days=days)
+            if rows:
+                print(f"   Hospital {hospital_id}: {rows} counter rows")
+        print("✅ AI diagnosis history upgraded")
+
+if __name__ == '__main__':
+    main()
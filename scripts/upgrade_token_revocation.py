@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Token revocation upgrade
+Usage: python scripts/upgrade_token_revocation.py
+
+db.create_all() never alters existing tables, so a database created before
+user revocations were persisted has a users table without
+tokens_valid_after. This adds the column. Safe to run more than once.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import create_app, db
+
+def upgrade_schema():
+    """Add users.tokens_valid_after when missing; returns True if it was added"""
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns('users')}
+    if 'tokens_valid_after' in columns:
+        return False
+    with db.engine.begin() as connection:
+        connection.execute(db.text('ALTER TABLE users ADD COLUMN tokens_valid_after INTEGER'))
+    return True
+
+def main():
+    app = create_app()
+    with app.app_context():
+        print("🔐 Checking users schema...")
+        if upgrade_schema():
+            print("🔧 Added column users.tokens_valid_after")
+        else:
+            print("✅ Schema already up to date")
+
+if __name__ == '__main__':
+    main()
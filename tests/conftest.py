@@ -0,0 +1,49 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from hospital import create_app, db
+from hospital.models.hospital import Hospital
+from hospital.models.user import User
+from hospital.utils.current_user import user_claims
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def hospital(app):
+    hospital = Hospital(name='Test Hospital', address='1 Main St', phone='5550000000',
+                        email='info@test-hospital.com', license_number='LIC-TEST')
+    db.session.add(hospital)
+    db.session.commit()
+    return hospital
+
+
+@pytest.fixture
+def admin(hospital):
+    user = User(email='admin@test-hospital.com', first_name='Ada', last_name='Admin',
+                role='admin', hospital_id=hospital.id, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization header for a user, as issued at login"""
+    def headers(user):
+        token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
+        return {'Authorization': f'Bearer {token}'}
+    return headers
@@ -0,0 +1,167 @@
+import time
+
+import pytest
+
+from hospital.services.ai_providers import (
+    AllProvidersFailed, CircuitBreaker, ProviderRouter, StubProvider, ThreadedProvider
+)
+
+
+def blocking_call(seconds, reply):
+    def call(message, context):
+        time.sleep(seconds)
+        return {'reply': reply}
+    return call
+
+
+def test_timeout_bounds_latency_of_blocking_provider():
+    router = ProviderRouter([
+        ThreadedProvider('slow', blocking_call(3.0, 'slow')),
+        StubProvider('fast', reply='fast')
+    ], timeout=0.5)
+
+    started = time.monotonic()
+    name, result = router.complete_sync('hello')
+
+    assert name == 'fast'
+    assert result['reply'] == 'fast'
+    assert time.monotonic() - started < 1.5
+
+
+def test_hedge_returns_fast_provider_before_slow_one_finishes():
+    slow = ThreadedProvider('slow', blocking_call(3.0, 'slow'))
+    fast = StubProvider('fast', reply='fast')
+    router = ProviderRouter([slow, fast], timeout=5.0, hedge=True, hedge_delay=0.2)
+
+    started = time.monotonic()
+    name, _ = router.complete_sync('hello')
+
+    assert name == 'fast'
+    assert time.monotonic() - started < 1.0
+    # Losing a hedge race is not a failure
+    assert router.breakers['slow'].failures == 0
+
+
+def test_fallback_follows_priority_order():
+    first = StubProvider('first', error=RuntimeError('down'))
+    second = StubProvider('second', reply='second')
+    third = StubProvider('third', reply='third')
+    router = ProviderRouter([first, second, third])
+
+    name, _ = router.complete_sync('hello')
+
+    assert name == 'second'
+    assert (first.calls, second.calls, third.calls) == (1, 1, 0)
+
+
+def test_names_restrict_the_providers_tried():
+    router = ProviderRouter([StubProvider('first', reply='first'), StubProvider('second', reply='second')])
+
+    assert router.complete_sync('hello', names=['second'])[0] == 'second'
+
+
+def test_all_providers_failing_raises_with_errors():
+    router = ProviderRouter([StubProvider('a', error=RuntimeError('a down')), StubProvider('b', delay=1.0)], timeout=0.1)
+
+    with pytest.raises(AllProvidersFailed) as excinfo:
+        router.complete_sync('hello')
+
+    assert set(excinfo.value.args[0]) == {'a', 'b'}
+
+
+def test_open_circuit_skips_provider():
+    broken = StubProvider('broken', error=RuntimeError('down'))
+    backup = StubProvider('backup', reply='backup')
+    router = ProviderRouter([broken, backup], failure_threshold=2, reset_timeout=60.0)
+
+    for _ in range(3):
+        assert router.complete_sync('hello')[0] == 'backup'
+
+    assert router.breakers['broken'].state == 'open'
+    assert broken.calls == 2
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+
+def chunk_stream(chunks, first_delay=0.0, error_after=None):
+    def stream(message, context):
+        time.sleep(first_delay)
+        for index, chunk in enumerate(chunks):
+            if index == error_after:
+                raise RuntimeError('stream broke')
+            yield chunk
+    return stream
+
+
+def test_stream_fails_over_when_first_chunk_misses_deadline():
+    slow = ThreadedProvider('slow', None, stream=chunk_stream(['late'], first_delay=2.0))
+    fast = ThreadedProvider('fast', None, stream=chunk_stream(['Hel', 'lo']))
+    router = ProviderRouter([slow, fast], timeout=0.3)
+
+    started = time.monotonic()
+    chunks = list(router.stream_sync('hello'))
+
+    assert chunks == [('fast', 'Hel'), ('fast', 'lo')]
+    assert time.monotonic() - started < 1.5
+    assert router.breakers['slow'].failures == 1
+    assert router.breakers['fast'].failures == 0
+
+
+def test_stream_skips_open_circuit_and_unstreamable_providers():
+    broken = ThreadedProvider('broken', None, stream=chunk_stream([], error_after=0))
+    plain = StubProvider('plain')
+    backup = ThreadedProvider('backup', None, stream=chunk_stream(['ok']))
+    router = ProviderRouter([broken, plain, backup], failure_threshold=1, reset_timeout=60.0)
+
+    assert list(router.stream_sync('hello')) == [('backup', 'ok')]
+    assert router.breakers['broken'].state == 'open'
+    with pytest.raises(AllProvidersFailed) as excinfo:
+        list(router.stream_sync('hello', names=['broken', 'plain']))
+    assert excinfo.value.args[0] == {'broken': 'circuit open', 'plain': 'no streaming'}
+
+
+def test_stream_failure_after_first_chunk_is_raised_and_recorded():
+    flaky = ThreadedProvider('flaky', None, stream=chunk_stream(['a', 'b'], error_after=1))
+    backup = ThreadedProvider('backup', None, stream=chunk_stream(['ok']))
+    router = ProviderRouter([flaky, backup])
+
+    received = []
+    with pytest.raises(RuntimeError):
+        for item in router.stream_sync('hello'):
+            received.append(item)
+
+    assert received == [('flaky', 'a')]
+    assert router.breakers['flaky'].failures == 1
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from hospital import db
+from hospital.models.ai_diagnosis import AIDiagnosis
+from hospital.models.patient import Patient
+from hospital.models.user import User
+
+
+@pytest.fixture
+def doctor(hospital):
+    user = User(email='doctor@test-hospital.com', first_name='Dana', last_name='Doctor',
+                role='doctor', hospital_id=hospital.id, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_ai_status_and_probe_need_an_admin(client, admin, doctor, auth_headers):
+    assert client.get('/api/ai/test-gemini?probe=1').status_code == 401
+    assert client.get('/api/ai/test-gemini?probe=1', headers=auth_headers(doctor)).status_code == 403
+
+    response = client.get('/api/ai/test-gemini', headers=auth_headers(admin))
+    assert response.status_code == 200
+    assert 'provider_health' in response.get_json()
+
+
+@pytest.fixture
+def diagnoses(hospital, doctor):
+    patient_user = User(email='pat@test-hospital.com', first_name='Pat', last_name='Patient',
+                        role='patient', hospital_id=hospital.id, password_hash='x')
+    db.session.add(patient_user)
+    db.session.flush()
+    patient = Patient(user_id=patient_user.id, patient_id='PAT1', date_of_birth=date(1990, 1, 1),
+                      hospital_id=hospital.id)
+    db.session.add(patient)
+    db.session.flush()
+    for risk in ('low', 'high'):
+        db.session.add(AIDiagnosis(patient_id=patient.id, symptoms='fever, cough', risk_assessment=risk,
+                                   model_version='v1.0', hospital_id=hospital.id))
+    db.session.commit()
+    db.session.expire_all()  # Read back from the database, not the identity map
+
+
+def test_diagnosis_fields_select_only_their_columns(client, admin, diagnoses, auth_headers):
+    headers = auth_headers(admin)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if 'ai_diagnoses' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/api/ai/diagnoses?fields=id,risk_assessment', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    assert [set(entry) for entry in response.get_json()['diagnoses']] == [{'id', 'risk_assessment'}] * 2
+    assert len(statements) == 1
+    assert 'symptoms' not in statements[0] and 'users' not in statements[0]
+
+    entry = client.get('/api/ai/diagnoses', headers=headers).get_json()['diagnoses'][0]
+    assert set(entry) == set(AIDiagnosis.FIELDS)
+    assert (entry['patient_name'], entry['doctor_name']) == ('Pat Patient', None)
+
+
+def test_chatbot_cache_stats_need_the_platform_admin(client, admin, auth_headers):
+    assert client.get('/api/ai/chatbot/cache-stats').status_code == 401
+    assert client.get('/api/ai/chatbot/cache-stats', headers=auth_headers(admin)).status_code == 401
+
+    response = client.get('/api/ai/chatbot/cache-stats', headers={'Authorization': 'Bearer admin_authenticated'})
+    assert response.status_code == 200
+    assert 'hit_rate' in response.get_json()
@@ -0,0 +1,31 @@
+import threading
+import time
+
+import pytest
+
+from hospital.services.auth_service import AuthBusy, PasswordHasher, hash_password
+
+
+def test_full_queue_rejects_at_once():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1)
+    release = threading.Event()
+    busy = threading.Thread(target=hasher._run, args=(release.wait,))
+    busy.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with pytest.raises(AuthBusy):
+        hasher.verify('secret', hash_password('secret', 4))
+    assert time.monotonic() - started < 0.1
+
+    release.set()
+    busy.join()
+    assert hasher.verify('secret', hash_password('secret', 4))
+
+
+def test_rehash_needed_when_work_factor_changes():
+    hasher = PasswordHasher(rounds=5, workers=1)
+
+    assert hasher.needs_rehash(hash_password('secret', 4))
+    assert not hasher.needs_rehash(hasher.hash('secret'))
+    assert not hasher.verify('secret', 'pbkdf2:sha256:legacy')
@@ -0,0 +1,29 @@
+from hospital.models.user import User
+from hospital.services import auth_service
+from hospital.services.bulk_onboarding import BulkOnboardingService
+from hospital.utils.allocators import EmailAllocator
+
+
+def test_explicit_emails_are_reserved_before_generated_ones(app, monkeypatch):
+    monkeypatch.setattr(auth_service, 'BCRYPT_ROUNDS', 4)
+    bundle = {'hospitals': [{
+        'name': 'City Care', 'address': '1 Road', 'phone': '5550001111', 'email': 'info@citycare.com',
+        'admin': {'first_name': 'Ada', 'last_name': 'Admin', 'email': 'admin@citycare.com'},
+        # The doctor comes first and has no email; the nurse later in the bundle owns john.smith@
+        'doctors': [{'first_name': 'John', 'last_name': 'Smith'}],
+        'staff': [{'first_name': 'John', 'last_name': 'Smith', 'email': 'John.Smith@citycare.com', 'role': 'nurse'}],
+    }]}
+
+    report = BulkOnboardingService(hash_workers=2).load(bundle)
+
+    assert report['failed_hospitals'] == 0, report
+    emails = dict(User.query.with_entities(User.role, User.email).filter(User.role != 'admin').all())
+    assert emails == {'nurse': 'John.Smith@citycare.com', 'doctor': 'john.smith1@citycare.com'}
+
+
+def test_allocator_skips_reserved_addresses(app):
+    allocator = EmailAllocator('citycare')
+    allocator.reserve('Jane.Doe@CityCare.com')
+
+    assert allocator.allocate('jane.doe') == 'jane.doe1@citycare.com'
+    assert allocator.allocate('jane.doe') == 'jane.doe2@citycare.com'
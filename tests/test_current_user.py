@@ -0,0 +1,46 @@
+import pytest
+from flask_jwt_extended import create_refresh_token
+
+from hospital import db
+from hospital.models.user import User
+
+STAFF = '/api/hospital/staff'
+
+
+@pytest.fixture
+def colleague(hospital):
+    user = User(email='colleague@test-hospital.com', first_name='Cole', last_name='League',
+                role='admin', hospital_id=hospital.id, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_claims_of_a_deactivated_user_are_not_trusted(client, admin, colleague, auth_headers):
+    headers = auth_headers(colleague)
+    assert client.get(STAFF, headers=headers).status_code == 200
+
+    response = client.put(f'{STAFF}/{colleague.id}/toggle-status', headers=auth_headers(admin))
+    assert response.get_json()['staff_member']['is_active'] is False
+
+    assert client.get(STAFF, headers=headers).status_code == 401
+
+
+def test_claims_of_a_deleted_user_are_not_trusted(client, admin, colleague, auth_headers):
+    headers = auth_headers(colleague)
+    assert client.delete(f'{STAFF}/{colleague.id}', headers=auth_headers(admin)).status_code == 200
+
+    assert client.get(STAFF, headers=headers).status_code == 401
+
+
+def test_refresh_reads_role_from_the_database(client, admin):
+    refresh_token = create_refresh_token(identity=str(admin.id))
+    admin.role = 'doctor'
+    db.session.commit()
+
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+
+    assert response.status_code == 200
+    access_token = response.get_json()['access_token']
+    profile = client.get('/api/auth/profile', headers={'Authorization': f'Bearer {access_token}'})
+    assert profile.get_json()['user']['role'] == 'doctor'
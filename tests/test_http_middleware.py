@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+from flask import Response, jsonify
+
+from hospital.utils.http_middleware import transfer_stats
+
+ITEMS = [{'id': number, 'name': f'Medicine {number}', 'category': 'Analgesic'} for number in range(100)]
+
+
+@pytest.fixture
+def client(app):
+    app.add_url_rule('/test/items', 'test_items', lambda: jsonify({'items': ITEMS}))
+    app.add_url_rule('/test/small', 'test_small', lambda: jsonify({'ok': True}))
+    app.add_url_rule('/test/stream', 'test_stream',
+                     lambda: Response((chunk for chunk in ['data: 1\n\n']), mimetype='text/event-stream'))
+    return app.test_client()
+
+
+def test_matching_etag_gets_an_empty_304(client):
+    first = client.get('/test/items')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    before = transfer_stats.report()
+
+    again = client.get('/test/items', headers={'If-None-Match': etag})
+
+    assert again.status_code == 304
+    assert again.data == b''
+    after = transfer_stats.report()
+    assert after['not_modified_responses'] == before['not_modified_responses'] + 1
+    assert after['saved_bytes'] - before['saved_bytes'] == len(first.data)
+
+    assert client.get('/test/items', headers={'If-None-Match': 'W/"stale"'}).status_code == 200
+
+
+def test_large_json_is_gzipped_for_clients_that_accept_it(client):
+    before = transfer_stats.report()
+
+    response = client.get('/test/items', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)) == {'items': ITEMS}
+    assert transfer_stats.report()['compressed_responses'] == before['compressed_responses'] + 1
+
+    # The ETag is the same whether or not the body was compressed
+    plain = client.get('/test/items')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['ETag'] == response.headers['ETag']
+
+
+def test_small_and_streamed_bodies_are_sent_as_is(client):
+    small = client.get('/test/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    assert small.get_json() == {'ok': True}
+
+    stream = client.get('/test/stream', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in stream.headers
+    assert 'ETag' not in stream.headers
+    assert stream.data == b'data: 1\n\n'
+
+
+def test_authenticated_responses_must_be_revalidated(client):
+    response = client.get('/test/small', headers={'Authorization': 'Bearer token'})
+
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert 'Cache-Control' not in client.get('/test/small').headers
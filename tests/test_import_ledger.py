@@ -0,0 +1,75 @@
+from hospital.utils.import_ledger import ImportLedger, file_content_hash, row_hash
+
+
+def make_ledger(rows=None):
+    return ImportLedger(1, 'medicines', rows=dict(rows or {}))
+
+
+def test_row_hash_ignores_whitespace_and_missing_values():
+    assert row_hash(' Paracetamol ', None) == row_hash('Paracetamol', float('nan'))
+    assert row_hash('Paracetamol', 10) != row_hash('Paracetamol', 11)
+
+
+def test_file_content_hash_is_sha256():
+    assert len(file_content_hash(b'name,quantity\n')) == 64
+
+
+def test_unchanged_row_with_live_record_is_skipped():
+    key, content = row_hash('paracetamol'), row_hash('Paracetamol', 10)
+    ledger = make_ledger({key: (7, content)})
+
+    assert ledger.is_unchanged(key, content, live=True)
+
+
+def test_unchanged_row_is_reapplied_when_record_was_deleted():
+    key, content = row_hash('paracetamol'), row_hash('Paracetamol', 10)
+    ledger = make_ledger({key: (7, content)})
+
+    assert not ledger.is_unchanged(key, content, live=False)
+
+
+def test_changed_row_is_applied():
+    key = row_hash('paracetamol')
+    ledger = make_ledger({key: (7, row_hash('Paracetamol', 10))})
+
+    assert not ledger.is_unchanged(key, row_hash('Paracetamol', 20), live=True)
+
+
+def test_unknown_row_is_applied():
+    assert not make_ledger().is_unchanged(row_hash('ibuprofen'), row_hash('Ibuprofen', 5), live=True)
+
+
+def test_recorded_row_counts_as_applied_within_the_same_import():
+    key, content = row_hash('ibuprofen'), row_hash('Ibuprofen', 5)
+    ledger = make_ledger()
+    ledger.record(key, content)
+
+    assert ledger.is_unchanged(key, content, live=True)
+    assert not ledger.is_unchanged(key, row_hash('Ibuprofen', 6), live=True)
+
+
+def test_was_imported_only_for_earlier_imports():
+    key = row_hash('paracetamol')
+    ledger = make_ledger({key: (7, row_hash('Paracetamol', 10))})
+    ledger.record(row_hash('ibuprofen'), row_hash('Ibuprofen', 5))
+
+    assert ledger.was_imported(key)
+    assert not ledger.was_imported(row_hash('ibuprofen'))
+
+
+def test_pending_mappings_split_inserts_and_updates():
+    known, new = row_hash('paracetamol'), row_hash('ibuprofen')
+    ledger = make_ledger({known: (7, row_hash('Paracetamol', 10))})
+    ledger.record(known, 'changed')
+    ledger.record(new, 'added')
+
+    inserts, updates = ledger.pending_mappings(batch_id=3)
+
+    assert updates == [{'id': 7, 'content_hash': 'changed', 'batch_id': 3}]
+    assert inserts == [{
+        'hospital_id': 1, 'entity': 'medicines', 'key_hash': new, 'content_hash': 'added', 'batch_id': 3
+    }]
+
+
+def test_rows_are_never_staged_without_record():
+    assert make_ledger().pending_mappings(batch_id=None) == ([], [])
@@ -0,0 +1,129 @@
+import io
+
+import pytest
+
+from hospital import db
+from hospital.models.import_record import ImportBatch
+from hospital.models.medicine import Medicine, StockMovement
+from hospital.routes import import_medicines
+
+URL = '/api/hospital/pharmacy/import-medicines'
+
+
+@pytest.fixture
+def upload(client, admin, auth_headers):
+    headers = auth_headers(admin)
+
+    def post(csv_text, filename='medicines.csv', query=''):
+        data = {'file': (io.BytesIO(csv_text.encode('utf-8')), filename)}
+        response = client.post(URL + query, data=data, headers=headers, content_type='multipart/form-data')
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+    return post
+
+
+def stock(name):
+    return db.session.query(Medicine.quantity_in_stock).filter_by(name=name, is_active=True).scalar()
+
+
+def test_new_medicines_are_created(upload):
+    result = upload('name,quantity,mrp\nParacetamol,100,30\nIbuprofen,50,40\n')
+
+    assert result['imported_count'] == 2
+    assert stock('Paracetamol') == 100
+    assert stock('Ibuprofen') == 50
+
+
+def test_delivery_of_stocked_medicine_adds_to_stock(upload):
+    upload('name,quantity\nParacetamol,100\n')
+    result = upload('name,quantity\nParacetamol,40\nIbuprofen,5\n', filename='delivery.csv')
+
+    assert stock('Paracetamol') == 140
+    assert result['skipped'][0]['message'] == 'Medicine already exists. Added 40 to stock'
+    movement = StockMovement.query.one()
+    assert (movement.movement_type, movement.quantity, movement.reference_type) == ('IN', 40, 'IMPORT')
+
+
+def test_same_file_again_is_skipped_whole(upload):
+    csv_text = 'name,quantity\nParacetamol,100\n'
+    upload(csv_text)
+
+    result = upload(csv_text)
+
+    assert result['already_imported'] is True
+    assert stock('Paracetamol') == 100
+
+
+def test_rows_already_imported_unchanged_are_not_added_again(upload):
+    upload('name,quantity\nParacetamol,100\n')
+
+    # A corrected resend: the first row is identical, the second is new
+    result = upload('name,quantity\nParacetamol,100\nIbuprofen,5\n', filename='resend.csv')
+
+    assert result['unchanged_count'] == 1
+    assert stock('Paracetamol') == 100
+    assert stock('Ibuprofen') == 5
+
+
+def test_identical_rows_within_a_file_count_once(upload):
+    result = upload('name,quantity\nParacetamol,100\nParacetamol,100\nParacetamol,20\n')
+
+    assert result['unchanged_count'] == 1
+    assert stock('Paracetamol') == 120
+
+
+def test_deactivated_medicine_is_recreated_from_unchanged_row(upload):
+    upload('name,quantity\nParacetamol,100\n')
+    Medicine.query.filter_by(name='Paracetamol').update({'is_active': False})
+    db.session.commit()
+
+    result = upload('name,quantity\nParacetamol,100\nIbuprofen,5\n', filename='again.csv')
+
+    assert result['unchanged_count'] == 0
+    assert stock('Paracetamol') == 100
+
+
+def test_failing_row_keeps_the_rest_and_skips_ledger(upload, monkeypatch):
+    stock_rows = import_medicines._stock_rows
+
+    def failing_on_bad(rows, existing_by_name, user):
+        results = stock_rows(rows, existing_by_name, user)  # Written first, so the savepoint has to undo it
+        if any(item['name'] == 'Bad' for item in rows):
+            raise ValueError('bad row')
+        return results
+
+    monkeypatch.setattr(import_medicines, '_stock_rows', failing_on_bad)
+    csv_text = 'name,quantity\nParacetamol,100\nBad,1\nIbuprofen,5\n'
+
+    result = upload(csv_text)
+
+    assert result['errors'] == [{'row': 3, 'error': 'Error processing row: bad row'}]
+    assert stock('Paracetamol') == 100
+    assert stock('Ibuprofen') == 5
+    assert stock('Bad') is None
+    # With a failed row the file is not remembered, so the fixed file can be sent again
+    assert ImportBatch.query.count() == 0
+
+    monkeypatch.setattr(import_medicines, '_stock_rows', stock_rows)
+    result = upload(csv_text)
+    assert result['unchanged_count'] == 2
+    assert stock('Bad') == 1
+    assert stock('Paracetamol') == 100
+
+
+def test_invalid_rows_are_reported_with_file_row_numbers(upload):
+    result = upload('name,quantity\n,5\nAspirin,-1\nIbuprofen,5\n')
+
+    assert [error['row'] for error in result['errors']] == [2, 3]
+    assert stock('Ibuprofen') == 5
+
+
+def test_dry_run_writes_nothing(upload):
+    upload('name,quantity\nParacetamol,100\n')
+
+    report = upload('name,quantity\nParacetamol,10\nIbuprofen,x\n', filename='check.csv', query='?dry_run=1')
+
+    assert report['dry_run'] is True
+    assert report['errors'] == {'quantity': {'not_a_number': {'count': 1, 'rows': [3]}}}
+    assert report['warnings']['name']['exists_in_db']['rows'] == [2]
+    assert stock('Paracetamol') == 100
@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+from hospital.utils.import_readers import iter_excel_chunks, read_import_file
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def workbook_bytes(rows, title='Medicines'):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = title
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_blank_rows_keep_sheet_row_numbers_across_chunks():
+    content = workbook_bytes([
+        ['name', 'quantity'],
+        ['Paracetamol', 100],
+        [None, None],
+        ['Ibuprofen', 5],
+        [None, None],
+        [None, None],
+        ['Aspirin', 'x'],
+    ])
+
+    chunks = list(iter_excel_chunks(content, entity='medicines', chunk_size=2))
+
+    assert [list(chunk['name']) for chunk in chunks] == [['Paracetamol', 'Ibuprofen'], ['Aspirin']]
+    assert [index + 2 for chunk in chunks for index in chunk.index] == [2, 4, 7]
+
+
+def test_header_only_sheet_gives_one_empty_chunk():
+    chunks = list(iter_excel_chunks(workbook_bytes([['name', 'quantity']])))
+
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert list(chunks[0].columns) == ['name', 'quantity']
+
+
+def test_read_import_file_concatenates_with_sheet_rows():
+    content = workbook_bytes([['name'], ['A'], [None], ['B']])
+
+    frame = read_import_file(content, '.xlsx', entity='medicines')
+
+    assert list(frame.index + 2) == [2, 4]
@@ -0,0 +1,99 @@
+import pandas as pd
+
+from hospital.utils.import_validation import ImportValidator, MEDICINE_DATE_FORMATS, PATIENT_DATE_FORMATS
+
+
+def test_require_reports_blank_and_nan_cells_with_file_rows():
+    validator = ImportValidator(pd.DataFrame({'name': ['Paracetamol', '', None, 'nan']}))
+    validator.require('name')
+
+    assert validator.errors == {'name': {'missing': {'count': 3, 'rows': [3, 4, 5]}}}
+    assert validator.report()['invalid_rows'] == 3
+
+
+def test_require_missing_column_fails_every_row():
+    validator = ImportValidator(pd.DataFrame({'name': ['a', 'b']}))
+    validator.require('quantity')
+
+    assert validator.errors['quantity']['missing']['count'] == 2
+
+
+def test_numeric_checks():
+    validator = ImportValidator(pd.DataFrame({'quantity': ['10', 'ten', '-1', '2.5', '']}))
+    validator.numeric('quantity', min_value=0, integer=True)
+
+    assert validator.errors['quantity'] == {
+        'not_a_number': {'count': 1, 'rows': [3]},
+        'not_an_integer': {'count': 1, 'rows': [5]},
+        'below_minimum': {'count': 1, 'rows': [4]},
+    }
+
+
+def test_warnings_do_not_invalidate_rows():
+    validator = ImportValidator(pd.DataFrame({'mrp': ['abc', '5']}))
+    validator.numeric('mrp', min_value=0, warning=True)
+
+    report = validator.report()
+    assert report['warnings'] == {'mrp': {'not_a_number': {'count': 1, 'rows': [2]}}}
+    assert report['errors'] == {}
+    assert report['valid_rows'] == 2
+
+
+def test_dates_accept_any_listed_format():
+    validator = ImportValidator(pd.DataFrame({'expiry_date': ['2025-12-31', '31/12/2025', '12-31-2025', '']}))
+    validator.dates('expiry_date', MEDICINE_DATE_FORMATS)
+
+    assert validator.errors == {'expiry_date': {'invalid_date': {'count': 1, 'rows': [4]}}}
+
+
+def test_patient_dates_accept_us_format():
+    validator = ImportValidator(pd.DataFrame({'date_of_birth': ['09/23/1975']}))
+    validator.dates('date_of_birth', PATIENT_DATE_FORMATS)
+
+    assert validator.errors == {}
+
+
+def test_min_digits_counts_digits_only():
+    validator = ImportValidator(pd.DataFrame({'phone': ['+91 98765-43210', '12345']}))
+    validator.min_digits('phone', 10)
+
+    assert validator.errors == {'phone': {'too_few_digits': {'count': 1, 'rows': [3]}}}
+
+
+def test_choices():
+    validator = ImportValidator(pd.DataFrame({'gender': ['Male', 'X', '']}))
+    validator.choices('gender', ['Male', 'Female', 'Other'])
+
+    assert validator.errors == {'gender': {'invalid_choice': {'count': 1, 'rows': [3]}}}
+
+
+def test_unique_in_file_is_case_insensitive_and_flags_later_rows():
+    validator = ImportValidator(pd.DataFrame({'name': ['Aspirin', 'aspirin', 'Ibuprofen', '', '']}))
+    validator.unique_in_file('name')
+
+    assert validator.errors == {'name': {'duplicate_in_file': {'count': 1, 'rows': [3]}}}
+
+
+def test_not_in_uses_given_values():
+    df = pd.DataFrame({'phone': ['+91 9876543210', '1112223333']})
+    validator = ImportValidator(df)
+    phones = validator.text('phone').str.replace(r'\D', '', regex=True).str[-10:]
+    validator.not_in('phone', {'9876543210'}, values=phones)
+
+    assert validator.errors == {'phone': {'exists_in_db': {'count': 1, 'rows': [2]}}}
+
+
+def test_rows_listed_are_capped():
+    validator = ImportValidator(pd.DataFrame({'name': [''] * 30}), max_rows_listed=5)
+    validator.require('name')
+
+    assert validator.errors['name']['missing'] == {'count': 30, 'rows': [2, 3, 4, 5, 6]}
+
+
+def test_invalid_rows_counted_once_across_checks():
+    validator = ImportValidator(pd.DataFrame({'name': ['', 'Aspirin'], 'quantity': ['x', '1']}))
+    validator.require('name')
+    validator.numeric('quantity')
+
+    report = validator.report()
+    assert (report['total_rows'], report['valid_rows'], report['invalid_rows']) == (2, 1, 1)
@@ -0,0 +1,32 @@
+import json
+from datetime import date
+
+import pytest
+from flask import jsonify
+
+from hospital.utils.json_provider import OrjsonProvider
+
+pytest.importorskip('orjson')
+
+
+def test_orjson_output_matches_the_default_provider(app):
+    assert isinstance(app.json, OrjsonProvider)
+    payload = {'name': 'Paracetamol', 'expiry': date(2025, 12, 31), 'price': 12.5, 1: 'non-str key'}
+
+    with app.test_request_context():
+        body = jsonify(payload).get_data(as_text=True)
+
+    assert json.loads(body) == {'name': 'Paracetamol', 'expiry': 'Wed, 31 Dec 2025 00:00:00 GMT',
+                                'price': 12.5, '1': 'non-str key'}
+
+
+def test_values_orjson_rejects_fall_back_to_the_stdlib_encoder(app):
+    numpy = pytest.importorskip('numpy')
+    payload = {'score': numpy.float64(0.25), 'big': 2 ** 70}
+
+    with app.test_request_context():
+        response = jsonify(payload)
+
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == {'score': 0.25, 'big': 2 ** 70}
+    assert json.loads(app.json.dumps(payload)) == {'score': 0.25, 'big': 2 ** 70}
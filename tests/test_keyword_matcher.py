@@ -0,0 +1,49 @@
+from hospital.utils.keyword_matcher import KeywordMatcher
+
+
+def matcher():
+    keywords = KeywordMatcher()
+    keywords.register('symptom', ['headache', 'chest pain', 'joint pain', 'fever'], {'stomach ache': 'headache'})
+    keywords.register('topic', ['pain'])
+    return keywords
+
+
+def test_match_finds_overlapping_terms_in_one_pass():
+    found = matcher().match('Severe CHEST PAIN and a fever')
+
+    assert found.get('symptom') == ['chest pain', 'fever']
+    assert found.has('topic')
+    assert not found.has('missing')
+
+
+def test_synonyms_map_to_canonical_terms():
+    found = matcher().match('bad stomach ache')
+
+    assert found.get('symptom') == ['headache']
+    assert found.synonyms('symptom') == {'stomach ache': 'headache'}
+
+
+def test_lookup_partial_matches_substrings_like_the_original_check():
+    keywords = matcher()
+
+    assert keywords.lookup_partial('ache', 'symptom') == ['headache']
+    assert keywords.lookup_partial('pain', 'symptom') == ['chest pain', 'joint pain']
+    assert keywords.lookup_partial('  Chest   Pain ', 'symptom') == ['chest pain']
+    assert keywords.lookup_partial('hest p', 'symptom') == ['chest pain']
+
+
+def test_lookup_partial_empty_fragment_or_unknown_category():
+    keywords = matcher()
+
+    assert keywords.lookup_partial('', 'symptom') == []
+    assert keywords.lookup_partial('pain', 'missing') == []
+
+
+def test_register_replaces_the_vocabulary():
+    keywords = matcher()
+    keywords.match('fever')
+
+    keywords.register('symptom', ['cough'])
+
+    assert keywords.match('fever and cough').get('symptom') == ['cough']
+    assert keywords.lookup_partial('ache', 'symptom') == []
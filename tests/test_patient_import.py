@@ -0,0 +1,83 @@
+import io
+from datetime import date
+
+import pytest
+
+from hospital import db
+from hospital.models.patient import Patient
+from hospital.models.user import User
+from hospital.utils.import_ledger import ImportLedger, row_hash
+
+URL = '/api/hospital/patients/import'
+HEADER = 'first_name,last_name,phone,email\n'
+
+
+@pytest.fixture
+def upload(client, admin, auth_headers):
+    headers = auth_headers(admin)
+
+    def post(csv_text, filename='patients.csv', query=''):
+        data = {'file': (io.BytesIO(csv_text.encode('utf-8')), filename)}
+        response = client.post(URL + query, data=data, headers=headers, content_type='multipart/form-data')
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+    return post
+
+
+@pytest.fixture
+def add_patient(hospital):
+    def add(phone, email, imported=False):
+        user = User(email=email, first_name='Old', last_name='Name', phone=phone, role='patient',
+                    hospital_id=hospital.id, password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Patient(user_id=user.id, patient_id=f'PAT{phone}', date_of_birth=date(1990, 1, 1),
+                               hospital_id=hospital.id))
+        if imported:
+            ledger = ImportLedger(hospital.id, 'patients')
+            ledger.record(row_hash(phone), 'old')
+            ledger.finish(f'earlier-{phone}', 'earlier.csv', 1, None)
+        db.session.commit()
+        return user
+    return add
+
+
+def test_dry_run_warns_about_updates_the_import_will_apply(upload, add_patient):
+    add_patient('9000000001', 'one@example.com', imported=True)
+    add_patient('9000000002', 'two@example.com')
+
+    report = upload(HEADER + 'New,Name,9000000001,one@example.com\nOther,Name,9000000002,\n', query='?dry_run=1')
+
+    assert report['warnings']['phone'] == {'will_update': {'count': 1, 'rows': [2]}}
+    assert report['errors'] == {'phone': {'exists_in_db': {'count': 1, 'rows': [3]}}}
+
+    result = upload(HEADER + 'New,Name,9000000001,one@example.com\nOther,Name,9000000002,\n')
+
+    assert result['updated'] == 1
+    assert result['errors'] == ['Row 3: Patient with phone 9000000002 already exists']
+    assert User.query.filter_by(phone='9000000001').one().first_name == 'New'
+
+
+def test_email_of_another_user_is_a_row_error_not_a_crash(upload, add_patient, admin):
+    add_patient('9000000001', 'one@example.com', imported=True)
+    add_patient('9000000003', 'three@example.com', imported=True)
+    csv_text = HEADER + 'New,Name,9000000001,Admin@Test-Hospital.com\nNew,Three,9000000003,three@example.com\n'
+
+    report = upload(csv_text, query='?dry_run=1')
+    assert report['errors'] == {'email': {'exists_in_db': {'count': 1, 'rows': [2]}}}
+
+    result = upload(csv_text)
+
+    assert result['errors'] == ['Row 2: User with email Admin@Test-Hospital.com already exists']
+    assert result['updated'] == 1
+    assert User.query.filter_by(phone='9000000001').one().email == 'one@example.com'
+
+
+def test_email_taken_by_an_earlier_row_of_the_file(upload, add_patient):
+    add_patient('9000000001', 'one@example.com', imported=True)
+    add_patient('9000000003', 'three@example.com', imported=True)
+
+    result = upload(HEADER + 'A,B,9000000001,shared@example.com\nC,D,9000000003,shared@example.com\n')
+
+    assert result['errors'] == ['Row 3: User with email shared@example.com already exists']
+    assert User.query.filter_by(phone='9000000003').one().email == 'three@example.com'
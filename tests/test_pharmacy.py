@@ -0,0 +1,46 @@
+import pytest
+
+from hospital import db
+from hospital.models.medicine import Medicine
+
+CHECK = '/api/hospital/pharmacy/drug-interactions/check'
+
+
+@pytest.fixture
+def medicine(admin):
+    medicine = Medicine(name='Aspirin', quantity_in_stock=10, hospital_id=admin.hospital_id, is_active=True)
+    db.session.add(medicine)
+    db.session.commit()
+    return medicine
+
+
+def test_interaction_check_accepts_names_and_prescription_entries(client, admin, auth_headers):
+    response = client.post(CHECK, headers=auth_headers(admin), json={
+        'medications': [{'name': 'Warfarin', 'dosage': '5mg'}],
+        'current_medications': ['Aspirin']
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['checked_medications'] == 1
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'medications': 'Warfarin'}, 'medications must be a list'),
+    ({'medications': ['Warfarin'], 'current_medications': 'Aspirin'}, 'current_medications must be a list'),
+    ({'medications': ['Warfarin'], 'current_medications': {'name': 'Aspirin'}}, 'current_medications must be a list'),
+])
+def test_interaction_check_rejects_non_lists(client, admin, auth_headers, body, error):
+    response = client.post(CHECK, headers=auth_headers(admin), json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+
+
+def test_dispensing_rejects_non_list_current_medications(client, admin, auth_headers, medicine):
+    response = client.post(f'/api/hospital/pharmacy/medicines/{medicine.id}/stock', headers=auth_headers(admin), json={
+        'movement_type': 'OUT', 'quantity': 1, 'current_medications': 'Warfarin'
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'current_medications must be a list'
+    assert db.session.get(Medicine, medicine.id).quantity_in_stock == 10
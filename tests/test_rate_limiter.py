@@ -0,0 +1,120 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from config import TestingConfig
+from hospital import create_app, db
+from hospital.models.user import User
+from hospital.services.rate_limiter import MemoryRateLimitStore, get_rate_limiter
+from hospital.utils.current_user import user_claims
+
+PROFILE = '/api/hospital-auth/hospital-profile'
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    """App with rate limiting on, a 2-request default burst and one trusted proxy"""
+    monkeypatch.setenv('RATE_LIMIT_DEFAULT', '2,1')
+    monkeypatch.setattr(TestingConfig, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'TRUSTED_PROXY_COUNT', 1)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_testing_config_disables_rate_limits(client):
+    for _ in range(5):
+        response = client.get(PROFILE)
+        assert response.status_code != 429
+        assert 'X-RateLimit-Limit' not in response.headers
+
+
+def test_over_budget_request_gets_429_with_retry_after(limited_app):
+    client = limited_app.test_client()
+
+    first = client.get(PROFILE)
+    assert first.headers['X-RateLimit-Class'] == 'default'
+    assert first.headers['X-RateLimit-Limit'] == '2'
+    assert first.headers['X-RateLimit-Remaining'] == '1'
+    client.get(PROFILE)
+
+    rejected = client.get(PROFILE)
+    assert rejected.status_code == 429
+    assert int(rejected.headers['Retry-After']) >= 1
+    assert rejected.get_json()['retry_after'] == int(rejected.headers['Retry-After'])
+
+
+def test_anonymous_clients_behind_proxy_get_their_own_buckets(limited_app):
+    client = limited_app.test_client()
+
+    for _ in range(2):
+        client.get(PROFILE, headers={'X-Forwarded-For': '203.0.113.1'})
+    assert client.get(PROFILE, headers={'X-Forwarded-For': '203.0.113.1'}).status_code == 429
+    assert client.get(PROFILE, headers={'X-Forwarded-For': '203.0.113.2'}).status_code != 429
+
+
+def test_authenticated_users_are_keyed_by_hospital_and_user(limited_app):
+    client = limited_app.test_client()
+    admin = User(email='admin@test-hospital.com', first_name='Ada', last_name='Admin',
+                 role='admin', hospital_id=7, password_hash='x')
+    db.session.add(admin)
+    db.session.commit()
+    token = create_access_token(identity=str(admin.id), additional_claims=user_claims(admin))
+    headers = {'Authorization': f'Bearer {token}'}
+
+    with limited_app.test_request_context(PROFILE, headers=headers):
+        assert get_rate_limiter().client_key() == f'{admin.hospital_id}:{admin.id}'
+
+    # Exhausting the anonymous bucket of the same address does not affect the user
+    for _ in range(3):
+        client.get(PROFILE)
+    assert client.get(PROFILE, headers=headers).status_code != 429
+
+
+def test_directory_endpoints_are_not_limited(limited_app):
+    client = limited_app.test_client()
+
+    for _ in range(5):
+        response = client.get('/api/hospital-auth/hospitals')
+        assert response.status_code == 200
+        assert 'X-RateLimit-Limit' not in response.headers
+
+
+def test_memory_store_refills_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('hospital.services.rate_limiter.time.monotonic', lambda: now[0])
+    store = MemoryRateLimitStore()
+
+    assert store.consume('key', capacity=1, rate=0.5)[0]
+    allowed, _, retry_after = store.consume('key', capacity=1, rate=0.5)
+    assert not allowed
+    assert retry_after == pytest.approx(2.0)
+
+    now[0] += 2.0
+    assert store.consume('key', capacity=1, rate=0.5)[0]
+
+
+def test_redis_store_skips_redis_for_a_while_after_a_failure(monkeypatch):
+    redis = pytest.importorskip('redis')
+    from hospital.services.rate_limiter import RedisRateLimitStore
+
+    now = [1000.0]
+    monkeypatch.setattr('hospital.services.rate_limiter.time.monotonic', lambda: now[0])
+    store = RedisRateLimitStore('redis://localhost:1/0')
+    calls = []
+
+    def unreachable(keys, args):
+        calls.append(keys)
+        raise redis.ConnectionError('down')
+
+    store._consume = unreachable
+
+    assert store.consume('key', capacity=5, rate=1.0)[0]
+    assert store.consume('key', capacity=5, rate=1.0)[0]
+    assert len(calls) == 1  # Second call went straight to the local buckets
+
+    now[0] += 10
+    store.consume('key', capacity=5, rate=1.0)
+    assert len(calls) == 2
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hospital.services import simple_ai
+from hospital.services.simple_ai import SimpleSymptomChecker
+
+pytest.importorskip('numpy')
+
+
+def test_batch_ranks_by_risk_and_caches_matrices_per_knowledge_base():
+    checker = SimpleSymptomChecker()
+
+    results = checker.analyze_batch([
+        {'id': 'a', 'symptoms': 'slight cough'},
+        {'id': 'b', 'symptoms': 'chest pain and shortness of breath'},
+        {'id': 'c', 'symptoms': 'nothing to report'},
+    ])
+
+    assert [result['id'] for result in results][0] == 'b'
+    assert results[-1]['predicted_conditions'] == []
+    assert simple_ai._BATCH_MATRICES[0] == checker.knowledge_base.checksum
+    assert checker._batch_matrices() is simple_ai._BATCH_MATRICES[1]
+
+
+def test_batch_with_an_empty_knowledge_base(monkeypatch):
+    monkeypatch.setattr(simple_ai, '_BATCH_MATRICES', None)
+    checker = SimpleSymptomChecker()
+    checker.knowledge_base = SimpleNamespace(checksum='empty', specialists={})
+    checker.symptom_conditions = {}
+
+    results = checker.analyze_batch([{'id': 1, 'symptoms': 'fever', 'age': 70}, {'id': 2, 'symptoms': ''}])
+
+    assert [result['predicted_conditions'] for result in results] == [[], []]
+    assert [result['risk_level'] for result in results] == ['medium', 'low']
@@ -0,0 +1,68 @@
+import time
+
+from hospital import db
+from hospital.models.user import User
+from hospital.services import token_revocation
+from hospital.services.token_revocation import MemoryRevocationStore, revoke_user_tokens
+
+STAFF = '/api/hospital/staff'
+
+
+def payload(user, iat):
+    return {'jti': 'some-jti', 'sub': str(user.id), 'iat': iat}
+
+
+def test_revoked_user_token_gets_401_and_later_login_works(client, admin, auth_headers, monkeypatch):
+    headers = auth_headers(admin)
+    assert client.get(STAFF, headers=headers).status_code == 200
+
+    later = time.time() + 5
+    monkeypatch.setattr(token_revocation.time, 'time', lambda: later)
+    revoke_user_tokens(admin.id)
+    monkeypatch.undo()
+
+    assert client.get(STAFF, headers=headers).status_code == 401
+    store = MemoryRevocationStore(3600)
+    assert not store.is_revoked(payload(admin, int(later)))  # Issued in the second of the revocation
+
+
+def test_revocation_survives_a_restart_through_the_users_table(admin):
+    revoke_user_tokens(admin.id)
+    revoked_at = db.session.query(User.tokens_valid_after).filter_by(id=admin.id).scalar()
+
+    # A new store, as in another worker or after a restart
+    store = MemoryRevocationStore(3600)
+    assert store.is_revoked(payload(admin, revoked_at - 1))
+    assert not store.is_revoked(payload(admin, revoked_at))
+
+
+def test_deactivated_and_deleted_users_are_revoked(admin, hospital):
+    other = User(email='nurse@test-hospital.com', first_name='N', last_name='N', role='nurse',
+                 hospital_id=hospital.id, password_hash='x')
+    db.session.add(other)
+    admin.is_active = False
+    db.session.commit()
+    other_payload = payload(other, int(time.time()))
+    db.session.delete(other)
+    db.session.commit()
+
+    store = MemoryRevocationStore(3600)
+    assert store.is_revoked(payload(admin, int(time.time())))
+    assert store.is_revoked(other_payload)
+
+
+def test_user_state_is_read_once_per_ttl(admin, monkeypatch):
+    calls = []
+    load = token_revocation.load_tokens_valid_after
+    monkeypatch.setattr(token_revocation, 'load_tokens_valid_after', lambda user_id: calls.append(user_id) or load(user_id))
+    now = [time.time()]
+    monkeypatch.setattr(token_revocation.time, 'time', lambda: now[0])
+    store = MemoryRevocationStore(3600)
+
+    for _ in range(3):
+        assert not store.is_revoked(payload(admin, int(now[0])))
+    assert len(calls) == 1
+
+    now[0] += token_revocation.USER_STATE_TTL_SECONDS
+    store.is_revoked(payload(admin, int(now[0])))
+    assert len(calls) == 2
@@ -0,0 +1,76 @@
+import pytest
+
+from hospital import db
+from hospital.models.doctor import Doctor
+from hospital.models.hospital_usage import HospitalUsage
+from hospital.models.user import User
+from hospital.services.usage_counters import adjust_usage, get_usage, reconcile
+
+
+def staff_user(hospital, email, role='nurse'):
+    return User(email=email, first_name='S', last_name='T', role=role, hospital_id=hospital.id, password_hash='x')
+
+
+def test_first_read_counts_without_committing_the_callers_work(hospital, admin):
+    db.session.add(staff_user(hospital, 'pending@test-hospital.com'))
+
+    with db.session.no_autoflush:
+        usage = get_usage(hospital.id)
+    db.session.rollback()
+
+    assert usage['staff'] == 1
+    assert HospitalUsage.query.filter_by(hospital_id=hospital.id).count() == 1
+    assert User.query.filter_by(email='pending@test-hospital.com').first() is None
+
+
+def test_inserts_and_deletes_adjust_counters_in_the_same_transaction(hospital, admin):
+    assert get_usage(hospital.id)['staff'] == 1
+
+    doctor_user = staff_user(hospital, 'doc@test-hospital.com', role='doctor')
+    db.session.add(doctor_user)
+    db.session.flush()
+    doctor = Doctor(doctor_id='DOC1', user_id=doctor_user.id, specialization='GP', hospital_id=hospital.id)
+    db.session.add(doctor)
+    db.session.commit()
+    assert (get_usage(hospital.id)['staff'], get_usage(hospital.id)['doctors']) == (2, 1)
+
+    db.session.add(staff_user(hospital, 'rolled-back@test-hospital.com'))
+    db.session.flush()
+    db.session.rollback()
+    assert get_usage(hospital.id)['staff'] == 2
+
+    db.session.delete(doctor)
+    db.session.delete(doctor_user)
+    db.session.commit()
+    assert (get_usage(hospital.id)['staff'], get_usage(hospital.id)['doctors']) == (1, 0)
+
+
+def test_patients_are_not_counted_as_staff(hospital, admin):
+    get_usage(hospital.id)
+    db.session.add(staff_user(hospital, 'patient@test-hospital.com', role='patient'))
+    db.session.commit()
+
+    assert get_usage(hospital.id)['staff'] == 1
+
+
+def test_adjust_usage_for_bulk_inserts(hospital, admin):
+    get_usage(hospital.id)
+
+    adjust_usage(hospital.id, patients=3, staff=0)
+    db.session.commit()
+
+    assert get_usage(hospital.id)['patients'] == 3
+
+
+def test_reconcile_repairs_drift(hospital, admin):
+    get_usage(hospital.id)
+    db.session.execute(db.text('UPDATE hospital_usage SET staff = 9, patients = 2'))
+    db.session.commit()
+
+    _, drift = reconcile(hospital.id)
+    db.session.commit()
+
+    assert drift == {'staff': -8, 'patients': -2}
+    usage = get_usage(hospital.id)
+    assert (usage['staff'], usage['patients']) == (1, 0)
+    assert usage['reconciled_at'] is not None